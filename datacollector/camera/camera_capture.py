@@ -12,6 +12,8 @@
 #   save_interval: 이미지 저장 간격(초)
 #   stop_flag    : [True/False] 종료 신호 공유 리스트
 #   state_getter : (servo_angle, motor_speed) 반환 함수 (drive 모듈로부터 제공)
+#   dedup_threshold : (선택) 직전 저장 프레임과 ROI pHash 거리가 이 값 이하이고
+#                     조향각이 같으면 저장 생략 (정차 중 같은 장면 반복 방지, None 이면 끔)
 #
 # Author : Youngchul Jung
 # =============================================================================
@@ -22,6 +24,8 @@ import os
 import time
 from datetime import datetime
 
+from camera.frame_hash import hamming, phash
+
 
 def camera_capture_loop(
     output_dir,
@@ -31,6 +35,9 @@ def camera_capture_loop(
     save_interval,
     stop_flag,
     state_getter,
+    dedup_threshold=None,
+    crop_top_ratio=0.4,
+    crop_bottom_ratio=1.0,
 ):
     """
     웹캠으로부터 프레임을 실시간으로 읽고,
@@ -44,6 +51,8 @@ def camera_capture_loop(
         save_interval: 몇 초 간격으로 1장을 저장할지
         stop_flag    : stop_flag[0] == True 이면 루프 종료
         state_getter : 현재 주행 상태(servo_angle, motor_speed) 조회 콜백 함수
+        dedup_threshold  : 중복 판정 pHash Hamming 거리 (None 이면 모든 프레임 저장)
+        crop_top_ratio / crop_bottom_ratio : pHash 계산 ROI (학습 전처리와 같은 크롭)
     """
     
     # -------------------------------------------------------------------------
@@ -70,6 +79,9 @@ def camera_capture_loop(
         return
 
     last_save = time.time()  # 마지막 저장 시점
+    last_hash = None         # 마지막 저장 프레임의 pHash (중복 필터용)
+    last_angle = None
+    skipped = 0
 
     # -------------------------------------------------------------------------
     # 3) 메인 캡처 루프
@@ -93,20 +105,35 @@ def camera_capture_loop(
             # 주행 상태(서보 각도, 모터 속도)를 외부 모듈(drive)에서 조회
             servo_angle, motor_speed = state_getter()
 
-            # 파일 이름에 timestamp + angle + speed 포함 → 라벨링 자동화 용이
-            filename = f"{timestamp}_angle{servo_angle}_speed{motor_speed}.png"
-            image_path = os.path.join(output_dir, filename)
-
-            # 이미지 파일 저장
-            cv2.imwrite(image_path, frame)
-
-            # CSV 라벨 기록
-            with open(csv_file, "a", newline="") as f:
-                writer = csv.writer(f)
-                writer.writerow([timestamp, filename, servo_angle, motor_speed])
-
-            #print(f"[SAVE] {filename} | angle={servo_angle} | speed={motor_speed}")
-            last_save = now  # 저장 시점 업데이트
+            # 중복 필터: 조향각이 같고 직전 저장 프레임과 거의 같은 장면이면 저장 생략
+            duplicate = False
+            if dedup_threshold is not None:
+                frame_hash = phash(frame, crop_top_ratio, crop_bottom_ratio)
+                duplicate = (
+                    last_hash is not None
+                    and servo_angle == last_angle
+                    and hamming(frame_hash, last_hash) <= dedup_threshold
+                )
+                if not duplicate:
+                    last_hash, last_angle = frame_hash, servo_angle
+
+            if duplicate:
+                skipped += 1
+            else:
+                # 파일 이름에 timestamp + angle + speed 포함 → 라벨링 자동화 용이
+                filename = f"{timestamp}_angle{servo_angle}_speed{motor_speed}.png"
+                image_path = os.path.join(output_dir, filename)
+
+                # 이미지 파일 저장
+                cv2.imwrite(image_path, frame)
+
+                # CSV 라벨 기록
+                with open(csv_file, "a", newline="") as f:
+                    writer = csv.writer(f)
+                    writer.writerow([timestamp, filename, servo_angle, motor_speed])
+
+                #print(f"[SAVE] {filename} | angle={servo_angle} | speed={motor_speed}")
+            last_save = now  # 저장(또는 중복 판정) 시점 업데이트
 
         # ---------------------------------------------------------------------
         # 3-2) 모니터에 현재 프레임 출력
@@ -123,3 +150,6 @@ def camera_capture_loop(
     # -------------------------------------------------------------------------
     cap.release()
     cv2.destroyAllWindows()
+
+    if dedup_threshold is not None:
+        print(f"[INFO] near-duplicate frames skipped: {skipped}")
@@ -0,0 +1,124 @@
+# camera/frame_hash.py
+# =============================================================================
+# Description : 프레임 중복(거의 같은 장면) 검출용 perceptual hash + 검색 인덱스
+#               - phash(): 학습과 같은 ROI(아래쪽 도로 영역)만 잘라 64bit pHash 계산
+#                 (회색조 → 32x32 INTER_AREA 축소 → DCT → 저주파 8x8 계수의 중앙값 비교)
+#                 → 센서 노이즈 / 작은 밝기 변화에는 거의 그대로, 장면이 바뀌면 크게 바뀜
+#               - FrameHashIndex: Hamming 거리 threshold 이내의 해시 검색
+#                 multi-index hashing: 64bit 를 m 조각(최대 4 x 16bit)으로 나눠 조각별 테이블에 등록
+#                 → 거리가 threshold 이하인 두 해시는 적어도 한 조각의 거리가
+#                   threshold // m 이하 (비둘기집 원리) → 그 반경의 조각 키만 조회
+#                 → 전체 비교 없이 후보만 비교 (수십만 프레임에서도 빠름)
+#               - OpenCV + NumPy 만 사용 (Jetson 수집 환경에서 그대로 사용)
+#
+# 사용처:
+#   camera_capture.py : 캡처 시 직전 저장 프레임과 거의 같으면 저장 생략 (선택)
+#   img-dedup.py      : 수집된 데이터셋 중복 제거 매니페스트 생성
+# =============================================================================
+
+import itertools
+
+import cv2
+import numpy as np
+
+HASH_BITS = 64
+CHUNK_BITS = 16
+
+# 바이트 → 1 의 개수
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def phash(img, crop_top_ratio=0.4, crop_bottom_ratio=1.0):
+    """
+    BGR (H, W, 3) 또는 회색조 (H, W) 이미지 → 64bit pHash (Python int)
+    - crop 비율은 RCPreprocessor 와 같은 의미 (세로 방향, 0~1)
+    """
+    h = img.shape[0]
+    roi = img[int(h * crop_top_ratio):int(h * crop_bottom_ratio)]
+    if roi.ndim == 3:
+        roi = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY)
+
+    small = cv2.resize(roi, (32, 32), interpolation=cv2.INTER_AREA).astype(np.float32)
+    low = cv2.dct(small)[:8, :8].flatten()
+    # DC 성분(전체 밝기)은 중앙값 계산에서 제외
+    bits = low > np.median(low[1:])
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def hamming(a, b):
+    """두 해시(int) 사이의 Hamming 거리"""
+    return bin(a ^ b).count("1")
+
+
+def hamming_many(h, hashes):
+    """해시 h 와 uint64 배열 hashes 각각의 Hamming 거리 (int 배열)"""
+    x = np.bitwise_xor(np.asarray(hashes, dtype=np.uint64), np.uint64(h))
+    return _POPCOUNT[x.view(np.uint8)].reshape(-1, 8).sum(axis=1, dtype=np.int64)
+
+
+class FrameHashIndex:
+    """
+    pHash 근접 검색 인덱스 (추가 / 검색만, 삭제 없음)
+    - add(h)    : 해시 등록 → id (등록 순서 0, 1, 2, ...)
+    - nearest(h): threshold 이내에서 가장 가까운 등록 해시 (id, 거리), 없으면 None
+    """
+
+    def __init__(self, threshold: int = 6):
+        if not 0 <= threshold < HASH_BITS:
+            raise ValueError(f"[ERROR] threshold must be in [0, {HASH_BITS}), got {threshold}")
+        self.threshold = threshold
+
+        # 조각 경계: threshold 가 작으면 (threshold + 1) 조각 → 조각이 정확히 같은 후보만,
+        # 크면 16bit x 4 조각 + 조각별 반경 threshold // 4 이내 키 조회
+        # (조각이 짧으면 버킷이 커져 후보가 너무 많아짐)
+        n_chunks = min(threshold + 1, HASH_BITS // CHUNK_BITS)
+        self._radius = threshold // n_chunks
+        bounds = np.linspace(0, HASH_BITS, n_chunks + 1).astype(int)
+        self._chunks = [(int(lo), (1 << int(hi - lo)) - 1) for lo, hi in zip(bounds[:-1], bounds[1:])]
+        self._flips = [self._flip_masks(int(hi - lo), self._radius)
+                       for lo, hi in zip(bounds[:-1], bounds[1:])]
+        self._tables = [{} for _ in range(n_chunks)]
+
+        self._hashes = np.zeros(1024, dtype=np.uint64)
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    @staticmethod
+    def _flip_masks(bits: int, radius: int):
+        """bits 길이 조각에서 1 의 개수가 radius 이하인 XOR 마스크 목록"""
+        return [sum(1 << i for i in flipped)
+                for r in range(radius + 1)
+                for flipped in itertools.combinations(range(bits), r)]
+
+    def _keys(self, h: int):
+        return [(h >> shift) & mask for shift, mask in self._chunks]
+
+    def add(self, h: int) -> int:
+        idx = self._count
+        if idx == len(self._hashes):
+            self._hashes = np.concatenate([self._hashes, np.zeros_like(self._hashes)])
+        self._hashes[idx] = h
+        self._count += 1
+        for table, key in zip(self._tables, self._keys(h)):
+            table.setdefault(key, []).append(idx)
+        return idx
+
+    def nearest(self, h: int):
+        candidates = []
+        for table, key, flips in zip(self._tables, self._keys(h), self._flips):
+            for flip in flips:
+                bucket = table.get(key ^ flip)
+                if bucket:
+                    candidates.extend(bucket)
+        if not candidates:
+            return None
+
+        # 여러 조각에서 중복으로 나온 후보는 그대로 둠 (argmin 결과는 같음)
+        ids = np.asarray(candidates, dtype=np.int64)
+        dist = hamming_many(h, self._hashes[ids])
+        best = int(np.argmin(dist))
+        if dist[best] > self.threshold:
+            return None
+        return int(ids[best]), int(dist[best])
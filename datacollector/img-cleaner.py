@@ -10,6 +10,7 @@ DATASET_FOLDER = "dataset"
 BASE_DIR = os.path.join(os.path.expanduser('~'), "Desktop")
 dataset_root = os.path.join(BASE_DIR, DATASET_FOLDER)
 file_path = os.path.join(dataset_root, "data_labels.csv") # 원본 CSV 파일 경로
+                                                          # (img-dedup.py 로 중복 제거했다면 data_labels_dedup.csv)
 
 
 try:
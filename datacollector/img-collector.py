@@ -35,6 +35,10 @@ CSV_FILE = "dataset/data_labels.csv"
 IMAGE_W, IMAGE_H = 640, 480
 SAVE_INTERVAL = 0.5  # 초 단위 (0.5초 = 초당 2프레임 저장)
 
+# 정차 중 중복 프레임 저장 생략 (ROI pHash Hamming 거리, None 이면 모든 프레임 저장)
+# 수집 후 일괄 정리는 img-dedup.py 사용
+DEDUP_THRESHOLD = None  # 예: 6
+
 
 # -----------------------------------------------------------------------------
 # 현재 주행 상태 조회 함수
@@ -81,6 +85,7 @@ if __name__ == "__main__":
                 stop_flag,       # 종료 플래그 공유
                 get_state,       # 라벨(각도/속도) 조회 콜백
             ),
+            kwargs={"dedup_threshold": DEDUP_THRESHOLD},
             daemon=True,
         )
 
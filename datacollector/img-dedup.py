@@ -0,0 +1,134 @@
+# img-dedup.py (data-collector 루트)
+# =============================================================================
+# Description : 수집된 데이터셋에서 거의 같은 프레임(정차 중 반복 촬영 등)을 찾아
+#               중복을 뺀 CSV 매니페스트를 만드는 스크립트 (이미지 파일은 지우지 않음).
+#               - 학습 크롭과 같은 ROI 의 pHash (camera/frame_hash.py)
+#               - CSV 순서(= 촬영 순서)대로 보면서, 이미 남긴 프레임 중
+#                 Hamming 거리 threshold 이내인 것이 있으면 중복으로 표시
+#               - 검색은 multi-index hashing 인덱스 → 수십만 프레임도 전체 쌍 비교 없이 처리
+#               - 기본은 같은 조향각(servo_angle)끼리만 비교 (라벨이 다른 프레임은 남김)
+#
+# 출력 (dataset 폴더):
+#   <out>.csv        : 중복을 뺀 CSV (입력과 같은 컬럼) → img-cleaner.py / 학습 입력으로 사용
+#   <out>_groups.csv : 전체 행의 pHash / 중복 대상(duplicate_of) / 거리
+#
+# 실행 예시:
+#   python3 img-dedup.py --root ~/Desktop/dataset --csv data_labels --threshold 6
+# =============================================================================
+
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import pandas as pd
+
+from camera.frame_hash import FrameHashIndex, phash
+
+
+def hash_file(path, crop_top_ratio, crop_bottom_ratio):
+    """이미지 파일 → pHash (읽기 실패 시 None)"""
+    img = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+    if img is None:
+        return None
+    return phash(img, crop_top_ratio, crop_bottom_ratio)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="near-duplicate frame deduplication")
+    parser.add_argument("--root", default=os.path.join(os.path.expanduser("~"), "Desktop", "dataset"),
+                        help="dataset 폴더 (CSV + 이미지)")
+    parser.add_argument("--csv", default="data_labels", help="입력 CSV 이름 (.csv 제외)")
+    parser.add_argument("--out", default="data_labels_dedup", help="출력 CSV 이름 (.csv 제외)")
+    parser.add_argument("--threshold", type=int, default=6, help="중복 판정 Hamming 거리 (0~63)")
+    parser.add_argument("--crop-top", type=float, default=0.4, help="ROI 위쪽 비율 (학습 전처리와 동일)")
+    parser.add_argument("--crop-bottom", type=float, default=1.0, help="ROI 아래쪽 비율")
+    parser.add_argument("--global", dest="per_label", action="store_false",
+                        help="조향각과 관계없이 전체 프레임끼리 비교")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="해시 계산 스레드 수")
+    args = parser.parse_args()
+
+    csv_path = os.path.join(args.root, f"{args.csv}.csv")
+    df = pd.read_csv(csv_path)
+    print(f"[INFO] {csv_path}: {len(df)}개 프레임")
+
+    # -------------------------------------------------------------------------
+    # 1) pHash 계산 (디코드가 대부분 → 스레드 병렬, OpenCV 는 GIL 을 놓음)
+    # -------------------------------------------------------------------------
+    paths = [os.path.join(args.root, str(p).replace("\\", "/")) for p in df["image_path"]]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        hashes = list(pool.map(
+            lambda p: hash_file(p, args.crop_top, args.crop_bottom), paths, chunksize=64
+        ))
+    hash_time = time.perf_counter() - start
+
+    # -------------------------------------------------------------------------
+    # 2) 촬영 순서대로 중복 검색 (남긴 프레임만 인덱스에 등록)
+    # -------------------------------------------------------------------------
+    start = time.perf_counter()
+    indexes = {}      # 그룹(조향각 또는 전체) → (FrameHashIndex, 인덱스 id → 행 번호)
+    duplicate_of = [None] * len(df)
+    distance = [None] * len(df)
+    unreadable = 0
+    for row, (h, angle) in enumerate(zip(hashes, df["servo_angle"])):
+        if h is None:
+            unreadable += 1   # 읽기 실패 프레임은 그대로 남김 (check_dataset 으로 정리)
+            continue
+        group = angle if args.per_label else None
+        if group not in indexes:
+            indexes[group] = (FrameHashIndex(args.threshold), [])
+        index, rows = indexes[group]
+
+        match = index.nearest(h)
+        if match is None:
+            index.add(h)
+            rows.append(row)
+        else:
+            duplicate_of[row] = df["image_path"].iat[rows[match[0]]]
+            distance[row] = match[1]
+    search_time = time.perf_counter() - start
+
+    # -------------------------------------------------------------------------
+    # 3) 매니페스트 저장 (파일은 지우지 않음)
+    # -------------------------------------------------------------------------
+    keep = [d is None for d in duplicate_of]
+    df_dedup = df[keep]
+    out_path = os.path.join(args.root, f"{args.out}.csv")
+    df_dedup.to_csv(out_path, index=False)
+
+    groups = pd.DataFrame({
+        "image_path": df["image_path"],
+        "servo_angle": df["servo_angle"],
+        "phash": [f"{h:016x}" if h is not None else "" for h in hashes],
+        "duplicate_of": duplicate_of,
+        "distance": pd.array(distance, dtype="Int64"),
+    })
+    groups_path = os.path.join(args.root, f"{args.out}_groups.csv")
+    groups.to_csv(groups_path, index=False)
+
+    # -------------------------------------------------------------------------
+    # 4) 결과 출력
+    # -------------------------------------------------------------------------
+    n = len(df)
+    print(f"[INFO] hash  : {hash_time:.2f}s ({n / max(hash_time, 1e-9):.0f} frames/s, workers={args.workers})")
+    print(f"[INFO] search: {search_time:.2f}s (threshold={args.threshold}, "
+          f"{'조향각별' if args.per_label else '전체'} 비교)")
+    if unreadable:
+        print(f"[WARN] 읽기 실패 {unreadable}개 (중복 검사 없이 남김)")
+    print(f"[INFO] 중복 {n - len(df_dedup)}개 제외 → {len(df_dedup)}개 남김")
+
+    counts = pd.DataFrame({
+        "before": df["servo_angle"].value_counts(),
+        "after": df_dedup["servo_angle"].value_counts(),
+    }).fillna(0).astype(int).sort_index()
+    print("\n각도별 개수:")
+    print(counts)
+
+    print(f"\n✅ 중복 제거 CSV: {out_path}")
+    print(f"   중복 목록     : {groups_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -22,10 +22,17 @@ class TRTInferenceEngine:
         input_shape = self.engine.get_binding_shape(self.input_idx)
         output_shape = self.engine.get_binding_shape(self.output_idx)
 
+        # 입력 형식은 엔진에서 읽음
+        # - (1, 3, 66, 200) float32 : RCPreprocessor 결과
+        # - (1, H, W, 3)    uint8   : 전처리 포함 모델 (training/preproc_graph.py), 카메라 프레임 그대로
+        self.input_shape = tuple(input_shape)
+        self.input_dtype = np.dtype(trt.nptype(self.engine.get_binding_dtype(self.input_idx)))
+        self.fused_preproc = self.input_shape[-1] == 3
+
         self.input_size = int(np.prod(input_shape))
         self.output_size = int(np.prod(output_shape))
 
-        self.d_input = cuda.mem_alloc(self.input_size * np.float32().nbytes)
+        self.d_input = cuda.mem_alloc(self.input_size * self.input_dtype.itemsize)
         self.d_output = cuda.mem_alloc(self.output_size * np.float32().nbytes)
 
         self.h_output = np.empty(self.output_size, dtype=np.float32)
@@ -35,9 +42,10 @@ class TRTInferenceEngine:
     def infer(self, input_np):
         """
         input_np: (1, 3, 66, 200) float32
+                  또는 전처리 포함 엔진이면 (1, H, W, 3) / (H, W, 3) uint8 BGR 프레임
         """
-        # ★ dtype 및 contiguous 보장
-        input_np = np.asarray(input_np, dtype=np.float32)
+        # ★ dtype 및 contiguous 보장 (이미 맞으면 복사 없음)
+        input_np = np.asarray(input_np, dtype=self.input_dtype)
         if not input_np.flags["C_CONTIGUOUS"]:
             input_np = np.ascontiguousarray(input_np)
 
@@ -28,6 +28,13 @@ def main():
         crop_bottom_ratio=1.0
     )
 
+    # 전처리 결과를 받을 입력 버퍼 (매 프레임 재사용)
+    input_batch = np.empty((1, 3, preproc.out_h, preproc.out_w), dtype=np.float32)
+
+    # 전처리 포함 엔진 (training/preproc_graph.py 로 export): 카메라 프레임을 그대로 입력
+    if engine.fused_preproc:
+        print(f"[INFO] engine input {engine.input_shape} {engine.input_dtype} → preprocessing in graph")
+
     # 3) 카메라 설정
     cap = cv2.VideoCapture(0)
     cap.set(cv2.CAP_PROP_FRAME_WIDTH,  640)
@@ -120,13 +127,18 @@ def main():
             # ------------------------------------------------------
             # 1) 전처리
             # ------------------------------------------------------
-            img_chw = preproc(frame)                  # (3,66,200)
-            input_batch = img_chw[np.newaxis, ...]    # (1,3,66,200)
+            if engine.fused_preproc:
+                if frame.shape != engine.input_shape[1:]:
+                    print(f"[ERROR] frame {frame.shape} != engine input {engine.input_shape[1:]}")
+                    break
+                engine_input = frame                      # (480,640,3) uint8, 엔진 안에서 전처리
+            else:
+                engine_input = preproc.batch([frame], out=input_batch)   # (1,3,66,200)
 
             # ------------------------------------------------------
             # 2) TensorRT 추론
             # ------------------------------------------------------
-            logits = engine.infer(input_batch)        # (1,num_classes)
+            logits = engine.infer(engine_input)       # (1,num_classes)
             pred_idx = int(np.argmax(logits, axis=1))
             pred_angle = ANGLE_LIST[pred_idx]
 
@@ -4,17 +4,33 @@ import random
 
 class RCAugmentor:
     """
-    훈련 전용 증강 
+    훈련 전용 증강
+    - __call__(): 샘플 1장 단위 (Python random)
+    - batch()   : uint8 배치 단위 (numpy.Generator, seed 로 재현 가능)
+    - return_flip=True: 좌우 반전 여부도 함께 반환 (90도처럼 반전해도 라벨이 같은 샘플 구분용)
     """
-    def __init__(self, hflip_prob=0.5, brightness_delta=0.2, blur_prob=0.3):
+    def __init__(self, hflip_prob=0.5, brightness_delta=0.2, blur_prob=0.3, seed=None):
         self.hflip_prob = hflip_prob
         self.brightness_delta = brightness_delta
         self.blur_prob = blur_prob
         self.flip_map = {30:150, 60:120, 90:90, 120:60, 150:30}
 
-    def __call__(self, img_bgr: np.ndarray, angle: int):
+        # batch() 용 난수 생성기
+        self.rng = np.random.default_rng(seed)
+
+        # 각도 → 플립 후 각도 조회 테이블 (flip_map 에 없는 각도는 그대로)
+        self._flip_lut = np.arange(max(181, max(self.flip_map) + 1))
+        for a, b in self.flip_map.items():
+            self._flip_lut[a] = b
+
+    def reseed(self, seed):
+        """batch() 난수 생성기 재설정 (DataLoader worker 별 seed 분리용)"""
+        self.rng = np.random.default_rng(seed)
+
+    def __call__(self, img_bgr: np.ndarray, angle: int, return_flip: bool = False):
         # 좌우 플립
-        if random.random() < self.hflip_prob:
+        flipped = random.random() < self.hflip_prob
+        if flipped:
             img_bgr = cv2.flip(img_bgr, 1)
             angle = self.flip_map.get(angle, angle)
 
@@ -27,4 +43,60 @@ class RCAugmentor:
         if random.random() < self.blur_prob:
             img_bgr = cv2.GaussianBlur(img_bgr, (3, 3), 0)
 
+        if return_flip:
+            return img_bgr, angle, flipped
         return img_bgr, angle
+
+    def batch(self, images: np.ndarray, angles, rng: np.random.Generator = None,
+              channels_first: bool = False, return_flip: bool = False):
+        """
+        배치 단위 증강 (입력은 수정하지 않고 새 배열 반환)
+        - images: (N, H, W, C) uint8  (channels_first=True 이면 (N, C, H, W))
+        - angles: (N,) 서보 각도
+        - rng   : numpy.Generator (없으면 self.rng)
+        - 반환  : (images_aug, angles_aug), return_flip=True 이면 (images_aug, angles_aug, flip (N,) bool)
+        """
+        rng = self.rng if rng is None else rng
+        n = len(images)
+        angles = np.array(angles, copy=True)
+        w_axis = 3 if channels_first else 2
+
+        # 샘플별 난수는 한 번에 뽑는다
+        flip = rng.random(n) < self.hflip_prob
+        alpha = 1.0 + rng.uniform(-self.brightness_delta, self.brightness_delta, n)
+        blur = rng.random(n) < self.blur_prob
+
+        # 1) 밝기 변화: 샘플별 256 엔트리 LUT (float 변환 없이 uint8 → uint8)
+        #    LUT 값 = clip(v * alpha, 0, 255) → uint8, __call__ 과 같은 값
+        out = np.empty_like(images)
+        if self.brightness_delta > 0:
+            levels = np.arange(256, dtype=np.float32)
+            luts = np.clip(levels[None, :] * alpha[:, None].astype(np.float32), 0, 255)
+            luts = luts.astype(np.uint8)
+            for i in range(n):
+                src = images[i]
+                dst = out[i]
+                if channels_first:
+                    src = src.reshape(-1, src.shape[-1])
+                    dst = dst.reshape(-1, dst.shape[-1])
+                cv2.LUT(np.ascontiguousarray(src), luts[i], dst=dst)
+        else:
+            np.copyto(out, images)
+
+        # 2) 좌우 플립: 선택된 샘플만 슬라이싱으로 뒤집고, 라벨은 조회 테이블로 한 번에 변환
+        idx = np.flatnonzero(flip)
+        if idx.size:
+            out[idx] = np.flip(out[idx], axis=w_axis)
+            angles[idx] = self._flip_lut[angles[idx]]
+
+        # 3) 블러: 선택된 샘플만
+        for i in np.flatnonzero(blur):
+            if channels_first:
+                for c in range(out.shape[1]):
+                    cv2.GaussianBlur(out[i, c], (3, 3), 0, dst=out[i, c])
+            else:
+                cv2.GaussianBlur(out[i], (3, 3), 0, dst=out[i])
+
+        if return_flip:
+            return out, angles, flip
+        return out, angles
@@ -3,11 +3,27 @@
 import cv2
 import numpy as np
 
+# 축소 디코드 배율 → OpenCV imread/imdecode 플래그
+# (JPEG 는 DCT 단계에서 축소되어 디코드 자체가 빨라짐)
+REDUCED_DECODE_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
 class RCPreprocessor:
     """
     RC 자율주행용 공통 전처리기 (훈련 + 추론용)
     - 입력: BGR uint8 (H, W, 3)  (OpenCV 기본 포맷)
     - 출력: float32 (3, H, W), [0,1]
+    - batch(): 여러 프레임을 미리 할당된 (N, 3, H, W) float32 버퍼에 바로 기록
+    - to_uint8() / normalize(): 크롭·리사이즈·CHW 단계와 [0,1] 정규화 단계를 분리해서 사용
+
+    입력 해상도별로 크롭 범위/중간 버퍼/채널 분리 대상을 처음 한 번만 계산해 캐시하고,
+    이후 프레임은 resize → (채널 분리 + BGR->RGB + CHW) → LUT 정규화 순으로 바로 기록한다.
+    결과는 기존 체인(slice → resize → cvtColor → astype/255 → transpose)과
+    비트 단위로 동일하다 (허용 오차 0).
     """
     def __init__(self,
                  out_size=(200, 66),      # (width, height)
@@ -17,31 +33,151 @@ class RCPreprocessor:
         self.crop_top_ratio = crop_top_ratio
         self.crop_bottom_ratio = crop_bottom_ratio
 
+        # uint8 → float32 [0,1] 변환 테이블 (astype(float32) / 255.0 과 동일한 값)
+        self._lut = np.arange(256, dtype=np.float32) / np.float32(255.0)
+
+        # 입력 해상도 (H, W) → 전처리 계획
+        self._plans = {}
+
     def __call__(self, img_bgr: np.ndarray) -> np.ndarray:
         """
         BGR 이미지를 받아 PilotNet에 들어갈 CHW 텐서 형태로 변환
         """
+        chw = np.empty((3, self.out_h, self.out_w), dtype=np.float32)
+        self._fill(img_bgr, chw)
+        return chw
+
+    def config(self) -> dict:
+        """
+        출력 값에 영향을 주는 설정 (캐시 키 / export 메타데이터용)
+        """
+        return {
+            "out_size": [self.out_w, self.out_h],
+            "crop_top_ratio": self.crop_top_ratio,
+            "crop_bottom_ratio": self.crop_bottom_ratio,
+        }
+
+    def max_decode_scale(self, src_h: int, src_w: int) -> int:
+        """
+        원본 (src_h, src_w) 에서 크롭 영역이 출력 크기보다 작아지지 않는
+        (= 업샘플링이 생기지 않는) 가장 큰 축소 디코드 배율
+        - 크롭은 비율 기준이므로 축소된 이미지에도 그대로 맞는다
+        """
+        best = 1
+        for scale in sorted(REDUCED_DECODE_FLAGS):
+            h, w = src_h // scale, src_w // scale
+            crop_h = int(h * self.crop_bottom_ratio) - int(h * self.crop_top_ratio)
+            if w >= self.out_w and crop_h >= self.out_h:
+                best = scale
+        return best
+
+    def to_uint8(self, img_bgr: np.ndarray, out: np.ndarray = None) -> np.ndarray:
+        """
+        크롭 + 리사이즈 + BGR->RGB + CHW 까지만 수행한 uint8 (3, out_h, out_w) 반환
+        - normalize(to_uint8(img)) == self(img)
+        """
         h, w, _ = img_bgr.shape
+        chw = self._to_chw_u8(img_bgr, self._plan(h, w))
+        if out is None:
+            return chw.copy()
+        np.copyto(out, chw)
+        return out
+
+    def normalize(self, chw_u8: np.ndarray, out: np.ndarray = None) -> np.ndarray:
+        """
+        uint8 CHW (또는 NCHW) → float32 [0,1] (LUT, astype(float32)/255.0 과 동일)
+        - out: chw_u8 와 같은 모양의 float32 C-contiguous 버퍼 (없으면 새로 할당)
+          (strided view 는 reshape 가 복사본을 만들어 LUT 결과가 out 에 기록되지 않음)
+        """
+        if out is None:
+            out = np.empty(chw_u8.shape, dtype=np.float32)
+        elif (out.shape != chw_u8.shape or out.dtype != np.float32
+              or not out.flags["C_CONTIGUOUS"]):
+            raise ValueError(
+                f"[ERROR] out must be C-contiguous float32 {chw_u8.shape}, "
+                f"got {out.dtype} {out.shape} (C-contiguous={out.flags['C_CONTIGUOUS']})"
+            )
+        src = np.ascontiguousarray(chw_u8)
+        cv2.LUT(src.reshape(-1, src.shape[-1]), self._lut,
+                dst=out.reshape(-1, out.shape[-1]))
+        return out
+
+    def batch(self, frames, out: np.ndarray = None) -> np.ndarray:
+        """
+        여러 프레임을 한 번에 전처리
+        - frames: BGR uint8 이미지 리스트 또는 (N, H, W, 3) 스택
+        - out   : (N, 3, out_h, out_w) float32 C-contiguous 버퍼 (없으면 새로 할당)
+        - 반환  : out (프레임마다 임시 배열을 만들지 않고 out에 직접 기록)
+        """
+        n = len(frames)
+        shape = (n, 3, self.out_h, self.out_w)
 
-        # 1) 세로 방향 크롭 (위쪽 하늘/보닛 잘라내기)
-        y1 = int(h * self.crop_top_ratio)
-        y2 = int(h * self.crop_bottom_ratio)
-        cropped = img_bgr[y1:y2, :, :]
+        if out is None:
+            out = np.empty(shape, dtype=np.float32)
+        elif (out.shape != shape or out.dtype != np.float32
+              or not out.flags["C_CONTIGUOUS"]):
+            raise ValueError(
+                f"[ERROR] out must be C-contiguous float32 {shape}, "
+                f"got {out.dtype} {out.shape}"
+            )
+
+        for i in range(n):
+            self._fill(frames[i], out[i])
+
+        return out
+
+    def _plan(self, h: int, w: int) -> dict:
+        """
+        입력 해상도 (h, w) 에만 의존하는 값들을 계산해 캐시
+        - rows   : 세로 크롭 범위 (위쪽 하늘/보닛 잘라내기)
+        - resized: 리사이즈 결과 (out_h, out_w, 3) uint8 버퍼
+        - chw    : RGB 순서의 (3, out_h, out_w) uint8 버퍼
+        - planes : cv2.split 대상 (B→chw[2], G→chw[1], R→chw[0]) = BGR->RGB
+        """
+        plan = self._plans.get((h, w))
+        if plan is None:
+            y1 = int(h * self.crop_top_ratio)
+            y2 = int(h * self.crop_bottom_ratio)
+            chw = np.empty((3, self.out_h, self.out_w), dtype=np.uint8)
+            plan = {
+                "rows": slice(y1, y2),
+                "resized": np.empty((self.out_h, self.out_w, 3), dtype=np.uint8),
+                "chw": chw,
+                "planes": [chw[2], chw[1], chw[0]],
+            }
+            self._plans[(h, w)] = plan
+        return plan
 
-        # 2) 리사이즈 (width, height)
-        resized = cv2.resize(
-            cropped,
+    def _to_chw_u8(self, img_bgr: np.ndarray, plan: dict) -> np.ndarray:
+        """
+        크롭 + 리사이즈 + BGR->RGB + CHW → plan["chw"] (재사용 버퍼) 반환
+        """
+        # 1) 크롭(view) + INTER_AREA 리사이즈 → 계획의 버퍼에 기록
+        cv2.resize(
+            img_bgr[plan["rows"]],
             (self.out_w, self.out_h),
+            dst=plan["resized"],
             interpolation=cv2.INTER_AREA
         )
 
-        # 3) BGR -> RGB
-        rgb = cv2.cvtColor(resized, cv2.COLOR_BGR2RGB)
+        # 2) 채널 분리 = BGR->RGB + (H, W, C)->(C, H, W) 를 uint8 상태에서 한 번에
+        planes = cv2.split(plan["resized"], plan["planes"])
+        if planes[0] is not plan["planes"][0]:
+            # OpenCV 바인딩이 새 배열을 돌려준 경우 (제자리 기록 실패) 대비
+            np.copyto(plan["chw"], plan["resized"][:, :, ::-1].transpose(2, 0, 1))
 
-        # 4) [0,255] -> [0,1] float32
-        rgb = rgb.astype(np.float32) / 255.0
+        return plan["chw"]
 
-        # 5) (H, W, C) -> (C, H, W)
-        chw = np.transpose(rgb, (2, 0, 1))  # (3, H, W)
+    def _fill(self, img_bgr: np.ndarray, out_chw: np.ndarray):
+        """
+        한 프레임을 전처리하여 out_chw (3, out_h, out_w) float32 에 기록
+        """
+        h, w, _ = img_bgr.shape
+        chw = self._to_chw_u8(img_bgr, self._plan(h, w))
 
-        return chw
+        # 3) LUT 로 [0,255] -> [0,1] float32 변환하며 out에 직접 기록
+        cv2.LUT(
+            chw.reshape(3 * self.out_h, self.out_w),
+            self._lut,
+            dst=out_chw.reshape(3 * self.out_h, self.out_w)
+        )
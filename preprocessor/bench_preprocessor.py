@@ -0,0 +1,128 @@
+# preprocessor/bench_preprocessor.py
+# =============================================================================
+# Description : RCPreprocessor 마이크로벤치마크
+#               - 기존 체인 (slice → resize → cvtColor → astype/255 → transpose)
+#               - 프레임 단위 호출 (preproc(frame)) vs batch(frames, out=buf)
+#               - 배치 크기 1 / 32 / 128 에서 처리량(frames/s) 비교
+#               - 기존 체인 대비 출력 최대 오차 확인 (기대값 0)
+#
+# 실행 예시 (저장소 루트에서):
+#   python -m preprocessor.bench_preprocessor
+#   python -m preprocessor.bench_preprocessor --image-dir C:/Users/YJU/Desktop/dataset
+# =============================================================================
+
+import argparse
+import glob
+import os
+import time
+
+import cv2
+import numpy as np
+
+from preprocessor.RCPreprocessor import RCPreprocessor
+
+
+def load_frames(image_dir, count, width=640, height=480, seed=0):
+    """
+    벤치마크용 BGR 프레임 준비
+    - image_dir 가 있으면 실제 PNG를 읽고, 없으면 난수 프레임 생성
+    """
+    frames = []
+    if image_dir:
+        paths = sorted(glob.glob(os.path.join(image_dir, "*.png")))[:count]
+        frames = [cv2.imread(p) for p in paths]
+        frames = [f for f in frames if f is not None]
+
+    if not frames:
+        rng = np.random.default_rng(seed)
+        frames = [
+            rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+            for _ in range(count)
+        ]
+
+    # 개수가 모자라면 반복해서 채움
+    while len(frames) < count:
+        frames.extend(frames[:count - len(frames)])
+    return frames
+
+
+def legacy_chain(preproc, img_bgr):
+    """기존 RCPreprocessor.__call__ 체인 (비교 기준)"""
+    h, w, _ = img_bgr.shape
+    y1 = int(h * preproc.crop_top_ratio)
+    y2 = int(h * preproc.crop_bottom_ratio)
+    resized = cv2.resize(img_bgr[y1:y2, :, :], (preproc.out_w, preproc.out_h),
+                         interpolation=cv2.INTER_AREA)
+    rgb = cv2.cvtColor(resized, cv2.COLOR_BGR2RGB)
+    rgb = rgb.astype(np.float32) / 255.0
+    return np.transpose(rgb, (2, 0, 1))
+
+
+def bench(fn, repeat):
+    """fn 을 repeat 번 실행하고 최단 시간(초)을 반환"""
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RCPreprocessor benchmark")
+    parser.add_argument("--image-dir", default=None,
+                        help="실제 PNG 프레임 폴더 (없으면 난수 프레임 사용)")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 32, 128])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    preproc = RCPreprocessor(
+        out_size=(200, 66),
+        crop_top_ratio=0.4,
+        crop_bottom_ratio=1.0
+    )
+
+    frames_all = load_frames(args.image_dir, max(args.batch_sizes))
+    stack_all = np.stack(frames_all)
+
+    max_err = max(
+        float(np.abs(preproc(f) - legacy_chain(preproc, f)).max()) for f in frames_all
+    )
+    print(f"[INFO] frame shape = {frames_all[0].shape}, repeat = {args.repeat}")
+    print(f"[INFO] max |new - legacy| = {max_err:.3g}")
+    print(f"{'batch':>6} | {'legacy (fps)':>13} | {'per-frame (fps)':>16} | "
+          f"{'batch (fps)':>12} | {'speedup':>7}")
+    print("-" * 68)
+
+    for bs in args.batch_sizes:
+        frames = frames_all[:bs]
+        stack = stack_all[:bs]
+        out = np.empty((bs, 3, preproc.out_h, preproc.out_w), dtype=np.float32)
+
+        def legacy():
+            np.stack([legacy_chain(preproc, f) for f in frames])
+
+        def per_frame():
+            # 프레임 단위 호출: 프레임마다 CHW 생성 후 배치로 쌓기
+            np.stack([preproc(f) for f in frames])
+
+        def batched():
+            preproc.batch(stack, out=out)
+
+        # 워밍업
+        legacy()
+        per_frame()
+        batched()
+
+        t_legacy = bench(legacy, args.repeat)
+        t_frame = bench(per_frame, args.repeat)
+        t_batch = bench(batched, args.repeat)
+
+        print(
+            f"{bs:>6} | {bs / t_legacy:>13.1f} | {bs / t_frame:>16.1f} | "
+            f"{bs / t_batch:>12.1f} | {t_legacy / t_batch:>6.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
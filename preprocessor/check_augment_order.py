@@ -0,0 +1,102 @@
+# preprocessor/check_augment_order.py
+# =============================================================================
+# Description : 증강 순서(원본 해상도 vs 축소 후) 등가성 확인 스크립트
+#               - 기존: augment(640x480 BGR) → crop/resize
+#               - 변경: crop/resize → augment(3x66x200 uint8)
+#
+# 판정 기준 (uint8 LSB 단위):
+#   - 좌우 플립 : 완전히 동일해야 함 (INTER_AREA 가중치가 좌우 대칭)
+#   - 밝기      : alpha <= 1 이면 모든 픽셀 1 LSB 이내 (반올림 차이)
+#                 alpha > 1 이면 포화(255) 영역 경계에서만 차이 발생
+#                 (클립 후 평균 vs 평균 후 클립) → 1 LSB 초과 픽셀 비율만 보고
+#   - 블러      : 등가 아님 (문서화된 차이)
+#                 66x200 에서의 3x3 가우시안은 원본 기준 약 3x4 배 넓은 블러와 같고,
+#                 원본 해상도 3x3 블러는 INTER_AREA 축소 후 거의 남지 않는다.
+#                 → 축소 후 블러가 더 강한 증강이 된다. 평균 차이만 보고
+#
+# 실행 예시 (저장소 루트에서):
+#   python -m preprocessor.check_augment_order --image-dir C:/Users/YJU/Desktop/dataset
+# =============================================================================
+
+import argparse
+import sys
+
+import cv2
+import numpy as np
+
+from preprocessor.RCPreprocessor import RCPreprocessor
+from preprocessor.bench_preprocessor import load_frames
+
+
+def brightness_lut(alpha):
+    """RCAugmentor 와 같은 밝기 LUT"""
+    levels = np.arange(256, dtype=np.float32)
+    return np.clip(levels * np.float32(alpha), 0, 255).astype(np.uint8)
+
+
+def blur_chw(chw):
+    return np.stack([cv2.GaussianBlur(np.ascontiguousarray(c), (3, 3), 0) for c in chw])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="augmentation order equivalence check")
+    parser.add_argument("--image-dir", default=None,
+                        help="실제 PNG 프레임 폴더 (없으면 난수 프레임 사용)")
+    parser.add_argument("--count", type=int, default=50)
+    args = parser.parse_args()
+
+    preproc = RCPreprocessor(out_size=(200, 66), crop_top_ratio=0.4, crop_bottom_ratio=1.0)
+    frames = load_frames(args.image_dir, args.count)
+
+    # ----------------------------
+    # 1) 좌우 플립
+    # ----------------------------
+    flip_err = 0
+    for img in frames:
+        full = preproc.to_uint8(cv2.flip(img, 1)).astype(np.int16)
+        small = np.flip(preproc.to_uint8(img), axis=2).astype(np.int16)
+        flip_err = max(flip_err, int(np.abs(full - small).max()))
+
+    # ----------------------------
+    # 2) 밝기
+    # ----------------------------
+    bright_ok = True
+    print(f"{'alpha':>6} | {'max diff':>8} | {'mean diff':>9} | {'>1 LSB':>7}")
+    print("-" * 42)
+    for alpha in (0.8, 0.9, 1.1, 1.2):
+        lut = brightness_lut(alpha)
+        max_d, mean_d, over = 0, 0.0, 0.0
+        for img in frames:
+            full = preproc.to_uint8(cv2.LUT(img, lut)).astype(np.int16)
+            small = cv2.LUT(preproc.to_uint8(img), lut).astype(np.int16)
+            d = np.abs(full - small)
+            max_d = max(max_d, int(d.max()))
+            mean_d += float(d.mean()) / len(frames)
+            over += float((d > 1).mean()) / len(frames)
+        if alpha <= 1.0 and max_d > 1:
+            bright_ok = False
+        print(f"{alpha:>6.2f} | {max_d:>8d} | {mean_d:>9.3f} | {over * 100:>6.2f}%")
+
+    # ----------------------------
+    # 3) 블러 (문서화된 차이)
+    # ----------------------------
+    blur_full, blur_small = 0.0, 0.0
+    for img in frames:
+        base = preproc.to_uint8(img).astype(np.int16)
+        full = preproc.to_uint8(cv2.GaussianBlur(img, (3, 3), 0)).astype(np.int16)
+        small = blur_chw(preproc.to_uint8(img)).astype(np.int16)
+        blur_full += float(np.abs(full - base).mean()) / len(frames)
+        blur_small += float(np.abs(small - base).mean()) / len(frames)
+
+    print("\n" + "=" * 42)
+    print(f"flip       : max diff = {flip_err} LSB  -> {'OK' if flip_err == 0 else 'FAIL'}")
+    print(f"brightness : alpha<=1 within 1 LSB -> {'OK' if bright_ok else 'FAIL'}")
+    print(f"blur       : mean change vs no-blur = {blur_full:.3f} (full-res) / "
+          f"{blur_small:.3f} (resized) LSB  [not equivalent, documented]")
+
+    if flip_err != 0 or not bright_ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
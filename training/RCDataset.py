@@ -1,16 +1,46 @@
 import os
+import random
+import multiprocessing as mp
 import cv2
-import pandas as pd
 import numpy as np
 import torch
-from torch.utils.data import Dataset
-from preprocessor.RCPreprocessor import RCPreprocessor
+import torch.distributed as dist
+from torch.utils.data import Dataset, get_worker_info
+from preprocessor.RCPreprocessor import RCPreprocessor, REDUCED_DECODE_FLAGS
 from preprocessor.RCAugmentor import RCAugmentor
+from training.RCTensorCache import RCTensorCache
+from training.RCSharedCache import RCSharedImageCache
+from training.RCSplit import RCSplitManifest
+
+AUGMENT_STAGES = ("resized", "full")
+OUTPUT_DTYPES = ("float32", "uint8")
 
 
 class RCDataset(Dataset):
     """
     RC 자율주행용 Dataset
+
+    augment_stage (train + augmentor 가 있을 때의 처리 순서):
+    - "resized": 크롭/리사이즈 → 증강(3x66x200 uint8, 캐시된 텐서에도 적용 가능) → 정규화
+    - "full"   : 증강(원본 640x480 BGR) → 크롭/리사이즈 → 정규화 (기존 방식)
+    플립은 두 순서가 동일하고, 밝기는 포화 영역 경계를 제외하면 1 LSB 이내로 같다.
+    블러는 축소 후 적용하면 원본 기준으로 더 넓은 블러가 된다 (preprocessor/check_augment_order.py).
+
+    decode_scale (1 / 2 / 4 / 8):
+    - JPEG 파일은 OpenCV 축소 디코드(IMREAD_REDUCED_COLOR_*)로 1/scale 크기로 바로 디코드
+    - PNG 등 축소 디코드를 지원하지 않는 형식은 원본 크기로 디코드 (OpenCV 는 전체 디코드 후
+      축소하므로 이득이 없음) → PNG 데이터셋은 RCShards --encode jpg 로 변환해서 사용
+    - 크롭 영역이 출력 크기보다 작아지지 않도록 첫 이미지 기준으로 배율을 제한
+
+    set_epoch(epoch):
+    - 증강 난수는 (random_seed, epoch, worker id) 로 epoch 마다 다시 정해짐
+      → persistent worker 를 써도 같은 epoch 는 같은 증강 (체크포인트 재개 시 동일하게 이어짐)
+    - 분산 학습이면 rank 도 seed 에 포함 (rank 마다 다른 증강)
+
+    output_dtype:
+    - "float32": [0,1] float32 (3, H, W) 반환 (기존 방식)
+    - "uint8"  : 정규화 전 uint8 (3, H, W) 반환 → worker IPC / pinned memory / H2D 복사량 1/4
+                 /255 정규화는 device 에서 모델 첫 단계(model.InputNorm)가 수행 (결과 동일)
     """
 
     def __init__(
@@ -22,7 +52,13 @@ class RCDataset(Dataset):
         split: str = "train",
         split_ratio: float = 0.8,
         shuffle: bool = True,
-        random_seed: int = 42
+        random_seed: int = 42,
+        cache_dir: str = None,
+        augment_stage: str = "resized",
+        shared_cache_mb: float = None,
+        shared_cache_policy: str = "static",
+        decode_scale: int = 1,
+        output_dtype: str = "float32"
     ):
         
         # ----------------------------
@@ -35,100 +71,289 @@ class RCDataset(Dataset):
         self.augmentor = augmentor
         self.split = split
 
-        # CSV 파일 경로
-        csv_path = f"{self.image_root}/{csv_filename}.csv"
-        self.df_full = pd.read_csv(csv_path)
+        if augment_stage not in AUGMENT_STAGES:
+            raise ValueError(f"[ERROR] augment_stage must be one of {AUGMENT_STAGES}, got '{augment_stage}'")
+        self.augment_stage = augment_stage
+        self.random_seed = random_seed
+
+        # persistent worker 에도 보이도록 epoch 는 공유 메모리에 둔다 (RCShardDataset 과 같은 방식)
+        self._epoch = mp.RawValue("i", 0)
+        self._rng_epoch = None
+        self._rng = None
+        self._rank = dist.get_rank() if dist.is_available() and dist.is_initialized() else 0
 
-        # ============================
-        # CSV 컬럼명 검증 (수정 완료)
-        # ============================
-        required_cols = ["image_path", "servo_angle"]
-        for col in required_cols:
-            if col not in self.df_full.columns:
-                raise ValueError(f"[ERROR] CSV must contain column '{col}'")
+        if output_dtype not in OUTPUT_DTYPES:
+            raise ValueError(f"[ERROR] output_dtype must be one of {OUTPUT_DTYPES}, got '{output_dtype}'")
+        self.output_dtype = output_dtype
 
         # -------------------------------
-        # 1) split 컬럼 존재 시 사용
+        # 1) split 매니페스트 (training/RCSplit.py)
+        #    - CSV 읽기 / 섞기 / stratified 분할은 CSV 당 한 번만 수행해 .npy 로 저장
+        #    - 이후 인스턴스는 mmap 으로 바로 사용 (CSV 가 바뀌면 자동 재생성)
+        #    - split 컬럼이 있으면 그 값을, 없으면 servo_angle 별 split_ratio 분할을 사용
         # -------------------------------
-        if "split" in self.df_full.columns:
+        manifest = RCSplitManifest(root, csv_filename, split_ratio, shuffle, random_seed)
+        if manifest.meta["source"] == "column":
             print("[RCDataset] Using existing 'split' column.")
-            self.df = (
-                self.df_full[self.df_full["split"] == split]
-                .reset_index(drop=True)
-            )
+        arrays = manifest.arrays(split)
+        # split 식별 정보 (split 에 딸린 캐시의 키로 사용: 예) training/distill.py 의 teacher logits)
+        self.split_meta = {
+            "manifest": manifest.dir,
+            "csv_sha1": manifest.meta["csv_sha1"],
+            "split": manifest.resolve(split),
+        }
 
         # -------------------------------
-        # 2) split 없으면 stratified split (수정 완료)
+        # 2) 컬럼형 NumPy 배열 (경로: utf-8 바이트 버퍼 + 오프셋, 각도: int64)
+        #    → 샘플마다 iloc 로 Series 를 만들지 않고,
+        #      fork 된 worker 마다 DataFrame 사본을 들고 있지 않음
         # -------------------------------
-        else:
-            print("[RCDataset] Performing stratified split...")
-
-            if shuffle:
-                self.df_full = self.df_full.sample(frac=1.0, random_state=random_seed)
+        self._path_offsets = arrays["offsets"]
+        self._path_bytes = arrays["paths"]
+        self._servo_angles = arrays["angles"]
 
-            df_list = []
-            for angle, df_group in self.df_full.groupby("servo_angle"):
-                n = len(df_group)
-                n_train = int(n * split_ratio)
+        # -------------------------------
+        # 3) angle → class index 매핑
+        # -------------------------------
+        angles, counts = np.unique(self._servo_angles, return_counts=True)
+        self.angles = angles.tolist()
+        self.angle_to_idx = {a: i for i, a in enumerate(self.angles)}
+        self._angle_to_label = np.full(max(181, max(self.angles) + 1), -1, dtype=np.int64)
+        self._angle_to_label[self.angles] = np.arange(len(self.angles))
 
-                if split == "train":
-                    df_split = df_group.iloc[:n_train]
-                else:
-                    df_split = df_group.iloc[n_train:]
+        print(f"[RCDataset:{split}] samples={len(self._servo_angles)}")
+        for a, c in zip(self.angles, counts.tolist()):
+            print(f"  {a:>4} : {c}")
 
-                df_list.append(df_split)
+        # -------------------------------
+        # 축소 디코드 배율 (JPEG 전용)
+        # -------------------------------
+        if decode_scale not in REDUCED_DECODE_FLAGS:
+            raise ValueError(f"[ERROR] decode_scale must be one of {sorted(REDUCED_DECODE_FLAGS)}")
+        self.decode_scale = 1
+        self.decode_scale = self._clamp_decode_scale(decode_scale)
 
-            self.df = pd.concat(df_list).reset_index(drop=True)
+        # -------------------------------
+        # 4) 전처리 결과 캐시 (선택)
+        #    - 증강 전 크롭/리사이즈 결과는 항상 같으므로
+        #      augmentation 이 꺼져 있거나 augment_stage="resized" 일 때 사용
+        # -------------------------------
+        self.cache = None
+        if cache_dir is not None:
+            paths = [self._image_path(i) for i in range(len(self))]
+            extra = {"decode_scale": self.decode_scale} if self.decode_scale > 1 else None
+            self.cache = RCTensorCache(cache_dir, preprocessor, paths, extra_config=extra)
+            print(f"[RCDataset:{split}] tensor cache = {self.cache.dir}")
 
         # -------------------------------
-        # 3) angle → class index 매핑 (수정 완료)
+        # 5) worker 간 공유 RAM 캐시 (선택)
+        #    - 메인 프로세스에서 만들어 두면 DataLoader worker 들이 같은 메모리를 사용
         # -------------------------------
-        self.angles = sorted(self.df["servo_angle"].unique().tolist())
-        self.angle_to_idx = {a: i for i, a in enumerate(self.angles)}
+        self.shared_cache = None
+        if shared_cache_mb is not None:
+            self.shared_cache = RCSharedImageCache(
+                num_items=len(self),
+                item_shape=(3, preprocessor.out_h, preprocessor.out_w),
+                budget_bytes=int(shared_cache_mb * 1024 * 1024),
+                policy=shared_cache_policy,
+            )
 
-        print(f"[RCDataset:{split}] samples={len(self.df)}")
-        print(self.df["servo_angle"].value_counts().sort_index())
+    def _image_path(self, idx):
+        # 🚨 CSV와 이미지 파일이 'dataset' 폴더 바로 아래에 있다고 가정
+        start, end = self._path_offsets[idx], self._path_offsets[idx + 1]
+        filename = self._path_bytes[start:end].tobytes().decode("utf-8")
+        return f"{self.image_root}/{filename}"
 
-    def __len__(self):
-        return len(self.df)
+    def sample_info(self, idx):
+        """
+        (이미지 경로, servo_angle) 반환 (shard 변환 등 이미지 파일이 직접 필요한 곳에서 사용)
+        """
+        return self._image_path(idx), int(self._servo_angles[idx])
 
-    def __getitem__(self, idx):
-        row = self.df.iloc[idx]
+    def _clamp_decode_scale(self, decode_scale):
+        if decode_scale == 1 or len(self) == 0:
+            return 1
+        img_bgr = self._read_image(self._image_path(0))
+        h, w = img_bgr.shape[:2]
+        scale = min(decode_scale, self.preprocessor.max_decode_scale(h, w))
+        if scale != decode_scale:
+            print(f"[RCDataset:{self.split}] decode_scale {decode_scale} → {scale} "
+                  f"(크롭 영역이 {self.preprocessor.out_w}x{self.preprocessor.out_h} 보다 작아짐)")
+        else:
+            print(f"[RCDataset:{self.split}] decode_scale = {scale} (JPEG 만 적용)")
+        return scale
+
+    def _read_image(self, img_path):
+        flags = cv2.IMREAD_COLOR
+        if self.decode_scale > 1 and img_path.lower().endswith((".jpg", ".jpeg")):
+            flags = REDUCED_DECODE_FLAGS[self.decode_scale]
+        img_bgr = cv2.imread(img_path, flags)
 
-        # --------------------------------------
-        # 1) 이미지 경로 생성 (최종 수정: 하위 폴더 제거)
-        # --------------------------------------
-        filename = str(row["image_path"]).replace("\\", "/")
-        
-        # 🚨 코드 최종 확인: CSV와 이미지 파일이 'dataset' 폴더 바로 아래에 있다고 가정
-        img_path = f"{self.image_root}/{filename}" 
-        
-        img_bgr = cv2.imread(img_path)
-        
         if img_bgr is None:
             print(f"[DEBUG] Attempted path: {img_path}") 
             raise RuntimeError(f"[ERROR] Failed to read image: {img_path}. 파일이 'dataset' 폴더 바로 아래에 있는지 확인해주세요.")
 
-        # --------------------------------------
-        # 2) servo_angle 가져오기 (수정 완료)
-        # --------------------------------------
-        angle = int(row["servo_angle"])
+        return img_bgr
 
-        # --------------------------------------
-        # 3) augmentation (train only)
-        # --------------------------------------
-        if self.split == "train" and self.augmentor is not None:
-            img_bgr, angle = self.augmentor(img_bgr, angle)
+    def _load_uint8(self, idx, out=None):
+        """
+        크롭/리사이즈된 uint8 (3, H, W)
+        - 공유 RAM 캐시 → 디스크 캐시 → 디코드 순서로 조회
+        - 디스크 캐시에 없거나 원본이 바뀌었으면 이 항목만 다시 생성
+        - out 이 주어지면 그 버퍼에 기록
+        """
+        if self.shared_cache is not None:
+            if out is None:
+                out = np.empty(
+                    (3, self.preprocessor.out_h, self.preprocessor.out_w), dtype=np.uint8
+                )
+            if self.shared_cache.get(idx, out):
+                return out
+            chw_u8 = self._load_uint8_uncached(idx, out)
+            self.shared_cache.put(idx, chw_u8)
+            return chw_u8
+
+        return self._load_uint8_uncached(idx, out)
+
+    def _load_uint8_uncached(self, idx, out=None):
+        img_path = self._image_path(idx)
+
+        if self.cache is None:
+            return self.preprocessor.to_uint8(self._read_image(img_path), out=out)
+
+        slot = self.cache.slots[idx]
+        chw_u8, stamp = self.cache.lookup(slot, img_path)
+        if chw_u8 is None:
+            img_bgr = self._read_image(img_path)
+            chw_u8 = self.cache.store(slot, stamp, self.preprocessor.to_uint8(img_bgr))
+        if out is not None:
+            np.copyto(out, chw_u8)
+            return out
+        return chw_u8
 
+    def __len__(self):
+        return len(self._servo_angles)
+
+    def set_epoch(self, epoch: int):
+        """epoch 마다 호출 → 증강 난수가 (seed, epoch, worker) 로 다시 정해짐"""
+        self._epoch.value = epoch
+
+    def _augment_rng(self):
+        """
+        현재 프로세스(worker)의 증강 난수 생성기
+        - epoch 가 바뀐 뒤 처음 호출될 때 (random_seed, epoch, worker id) 로 재설정
+        - augment_stage="full" 은 python random 도 같은 seed 로 재설정
+        """
+        epoch = self._epoch.value
+        if self._rng_epoch != epoch:
+            info = get_worker_info()
+            worker_id = 0 if info is None else info.id
+            key = [self.random_seed, epoch, worker_id] + ([self._rank] if self._rank else [])
+            self._rng = np.random.default_rng(key)
+            if self.augment_stage == "full":
+                random.seed(int(self._rng.integers(2 ** 63)))
+            self._rng_epoch = epoch
+        return self._rng
+
+    def __getitem__(self, idx):
+        image, label, _ = self.sample_with_flip(idx)
+        return image, label
+
+    def sample_with_flip(self, idx):
+        """
+        (tensor, label, flipped) — flipped: 증강에서 좌우 반전됐는지 (증강 없으면 False)
+        - 90도(직진)처럼 반전해도 라벨이 같은 샘플도 구분 (training/distill.py 의 teacher 출력 선택)
+        """
         # --------------------------------------
-        # 4) 전처리 → CHW float32 tensor
+        # 1) servo_angle 가져오기
         # --------------------------------------
-        img_chw = self.preprocessor(img_bgr)
-        img_tensor = torch.from_numpy(img_chw).float()
+        angle = int(self._servo_angles[idx])
+        flipped = False
+
+        augment = self.split == "train" and self.augmentor is not None
+
+        if augment and self.augment_stage == "full":
+            # --------------------------------------
+            # 2) augmentation (원본 해상도) → 전처리 → CHW float32
+            # --------------------------------------
+            img_bgr = self._read_image(self._image_path(idx))
+            self._augment_rng()  # python random 재설정 (__call__ 은 random 모듈 사용)
+            img_bgr, angle, flipped = self.augmentor(img_bgr, angle, return_flip=True)
+            if self.output_dtype == "uint8":
+                img_chw = self.preprocessor.to_uint8(img_bgr)
+            else:
+                img_chw = self.preprocessor(img_bgr)
+        else:
+            # --------------------------------------
+            # 2) 크롭/리사이즈 → uint8 CHW (캐시 사용 시 캐시에서)
+            # --------------------------------------
+            chw_u8 = self._load_uint8(idx)
+
+            # --------------------------------------
+            # 3) augmentation (train only, 축소된 이미지에 적용)
+            # --------------------------------------
+            if augment:
+                chw_aug, angles, flip = self.augmentor.batch(
+                    chw_u8[np.newaxis], [angle], rng=self._augment_rng(), channels_first=True,
+                    return_flip=True
+                )
+                chw_u8, angle, flipped = chw_aug[0], int(angles[0]), bool(flip[0])
+
+            # --------------------------------------
+            # 4) 정규화 → CHW float32 (uint8 모드는 device 에서 정규화)
+            # --------------------------------------
+            if self.output_dtype == "uint8":
+                # 디스크 캐시 memmap view 는 복사해서 반환
+                img_chw = chw_u8 if chw_u8.flags.owndata else chw_u8.copy()
+            else:
+                img_chw = self.preprocessor.normalize(chw_u8)
+
+        img_tensor = torch.from_numpy(img_chw)
+        if self.output_dtype == "float32":
+            img_tensor = img_tensor.float()
 
         # --------------------------------------
         # 5) angle → class index 변환
         # --------------------------------------
         label = self.angle_to_idx[angle]
 
-        return img_tensor, label
\ No newline at end of file
+        return img_tensor, label, flipped
+
+    def __getitems__(self, indices):
+        """
+        DataLoader 가 배치 단위로 호출 (torch >= 2.0)
+        - 배치 전체를 (N, 3, H, W) uint8 버퍼 하나에 모은 뒤
+          증강 / 정규화(float32 모드) / 라벨 변환을 배치 단위로 한 번씩 수행
+        - 반환: 샘플 리스트 [(tensor, label), ...] (기본 collate_fn 과 호환)
+        """
+        return [(image, label) for image, label, _ in self.samples_with_flip(indices)]
+
+    def samples_with_flip(self, indices):
+        """__getitems__ 와 같은 배치 처리, 샘플마다 (tensor, label, flipped) 반환"""
+        augment = self.split == "train" and self.augmentor is not None
+        if augment and self.augment_stage == "full":
+            return [self.sample_with_flip(i) for i in indices]
+
+        idx = np.asarray(indices, dtype=np.int64)
+        chw_u8 = np.empty(
+            (len(idx), 3, self.preprocessor.out_h, self.preprocessor.out_w), dtype=np.uint8
+        )
+        for j, i in enumerate(idx):
+            self._load_uint8(i, out=chw_u8[j])
+
+        angles = self._servo_angles[idx]
+        flip = np.zeros(len(idx), dtype=bool)
+        if augment:
+            chw_u8, angles, flip = self.augmentor.batch(
+                chw_u8, angles, rng=self._augment_rng(), channels_first=True, return_flip=True
+            )
+
+        if self.output_dtype == "uint8":
+            images = torch.from_numpy(chw_u8)
+        else:
+            images = torch.from_numpy(self.preprocessor.normalize(chw_u8))
+        labels = self._angle_to_label[angles].tolist()
+
+        flip = flip.tolist()
+
+        return [(images[j], labels[j], flip[j]) for j in range(len(idx))]
@@ -0,0 +1,275 @@
+# training/RCShards.py
+# =============================================================================
+# Description : CSV + 낱개 PNG 데이터셋을 고정 크기 shard 파일로 묶는 변환기와
+#               shard 를 순차로 읽는 스트리밍 IterableDataset.
+#               - 작은 파일 수만 개를 임의 순서로 여는 대신 큰 파일을 순서대로 읽음
+#                 (SD카드 / 네트워크 디스크에서 훨씬 빠르고, 데이터셋 복사도 빨라짐)
+#
+# 디렉토리 구조:
+#   <out_dir>/<split>/
+#       manifest.json          : 각도 목록, shard 목록(이름, 샘플 수), 원본 CSV 정보
+#       shard_00000.bin        : 인코딩된 이미지 바이트 연결 (원본 그대로 또는 JPEG 재인코딩)
+#       shard_00000.idx.npy    : (offset, length, servo_angle) 구조체 배열
+#
+# 변환 실행 예시 (저장소 루트에서):
+#   python -m training.RCShards --root C:/Users/YJU/Desktop/dataset \
+#       --csv data_labels_clean --out C:/Users/YJU/Desktop/dataset_shards --shard-mb 64
+#
+#   축소 디코드(decode_scale > 1)를 쓰려면 JPEG 로 재인코딩해서 묶는다
+#   (PNG 는 OpenCV 가 전체 디코드 후 축소하므로 디코드 시간이 줄지 않음):
+#   python -m training.RCShards ... --encode jpg --jpeg-quality 95
+# =============================================================================
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import time
+
+import cv2
+import numpy as np
+import torch
+from torch.utils.data import IterableDataset, get_worker_info
+
+from preprocessor.RCPreprocessor import RCPreprocessor, REDUCED_DECODE_FLAGS
+from preprocessor.RCAugmentor import RCAugmentor
+from training.RCDataset import OUTPUT_DTYPES
+
+SHARD_VERSION = 1
+INDEX_DTYPE = np.dtype([("offset", "<u8"), ("length", "<u4"), ("angle", "<i2")])
+ENCODINGS = ("keep", "jpg")
+
+
+# =============================================================================
+# 1. 변환기 (CSV + PNG → shard)
+# =============================================================================
+def pack_shards(dataset, out_dir: str, shard_mb: int = 64,
+                encode: str = "keep", jpeg_quality: int = 95):
+    """
+    RCDataset 한 split 의 이미지 파일들을 shard 로 묶는다
+    - dataset : RCDataset (split / 각도 목록을 그대로 사용)
+    - out_dir : <out_dir>/manifest.json, shard_*.bin, shard_*.idx.npy 생성
+    - encode  : "keep" = 원본 파일 바이트 그대로, "jpg" = JPEG 로 재인코딩 (축소 디코드용)
+    """
+    if encode not in ENCODINGS:
+        raise ValueError(f"[ERROR] encode must be one of {ENCODINGS}, got '{encode}'")
+    os.makedirs(out_dir, exist_ok=True)
+    shard_bytes = shard_mb * 1024 * 1024
+
+    shards = []
+    records = []
+    f = None
+    written = 0
+    start = time.time()
+
+    def close_shard():
+        nonlocal f
+        if f is None:
+            return
+        f.close()
+        name = f"shard_{len(shards):05d}"
+        np.save(f"{out_dir}/{name}.idx.npy", np.array(records, dtype=INDEX_DTYPE))
+        shards.append({"name": name, "count": len(records)})
+        records.clear()
+        f = None
+
+    for i in range(len(dataset)):
+        img_path, angle = dataset.sample_info(i)
+        if encode == "jpg":
+            img_bgr = cv2.imread(img_path, cv2.IMREAD_COLOR)
+            if img_bgr is None:
+                raise RuntimeError(f"[ERROR] Failed to read image: {img_path}")
+            ok, buf = cv2.imencode(".jpg", img_bgr, [cv2.IMWRITE_JPEG_QUALITY, jpeg_quality])
+            if not ok:
+                raise RuntimeError(f"[ERROR] Failed to encode image: {img_path}")
+            data = buf.tobytes()
+        else:
+            with open(img_path, "rb") as src:
+                data = src.read()
+
+        if f is not None and written + len(data) > shard_bytes and records:
+            close_shard()
+        if f is None:
+            f = open(f"{out_dir}/shard_{len(shards):05d}.bin", "wb")
+            written = 0
+
+        records.append((written, len(data), angle))
+        f.write(data)
+        written += len(data)
+
+        if (i + 1) % 1000 == 0:
+            print(f"  > {i + 1} / {len(dataset)} packed")
+
+    close_shard()
+
+    manifest = {
+        "version": SHARD_VERSION,
+        "split": dataset.split,
+        "angles": [int(a) for a in dataset.angles],
+        "count": len(dataset),
+        "encoding": encode if encode == "keep" else f"jpg:q{jpeg_quality}",
+        "shards": shards,
+    }
+    with open(f"{out_dir}/manifest.json", "w", encoding="utf-8") as mf:
+        json.dump(manifest, mf, indent=2)
+
+    print(f"[INFO] packed {len(dataset)} samples into {len(shards)} shards "
+          f"→ {out_dir} ({time.time() - start:.1f}s)")
+    return manifest
+
+
+# =============================================================================
+# 2. 스트리밍 Dataset
+# =============================================================================
+class RCShardDataset(IterableDataset):
+    """
+    shard 를 순차로 읽는 스트리밍 Dataset
+    - shard 순서 셔플 (epoch 마다) + 메모리 버퍼 안에서 샘플 셔플
+    - DataLoader worker 마다 서로 다른 shard 를 나눠 읽음
+    - 반환 형식은 RCDataset 과 동일: (float32 (3, H, W) tensor, class index)
+    - decode_scale > 1: JPEG shard 를 1/scale 크기로 축소 디코드 (PNG 는 원본 크기)
+    - output_dtype="uint8": 정규화 전 uint8 (3, H, W) 반환 (RCDataset 과 같은 의미)
+    """
+
+    def __init__(
+        self,
+        shard_dir: str,
+        preprocessor: RCPreprocessor,
+        augmentor: RCAugmentor = None,
+        shuffle: bool = True,
+        shuffle_buffer: int = 1024,
+        random_seed: int = 42,
+        decode_scale: int = 1,
+        output_dtype: str = "float32"
+    ):
+        if decode_scale not in REDUCED_DECODE_FLAGS:
+            raise ValueError(f"[ERROR] decode_scale must be one of {sorted(REDUCED_DECODE_FLAGS)}")
+        self.shard_dir = shard_dir.replace("\\", "/").rstrip("/")
+        self.preprocessor = preprocessor
+        self.augmentor = augmentor
+        self.shuffle = shuffle
+        self.shuffle_buffer = shuffle_buffer
+        self.random_seed = random_seed
+        self.decode_flags = REDUCED_DECODE_FLAGS[decode_scale]
+
+        if output_dtype not in OUTPUT_DTYPES:
+            raise ValueError(f"[ERROR] output_dtype must be one of {OUTPUT_DTYPES}, got '{output_dtype}'")
+        self.output_dtype = output_dtype
+
+        with open(f"{self.shard_dir}/manifest.json", "r", encoding="utf-8") as f:
+            self.manifest = json.load(f)
+
+        self.split = self.manifest["split"]
+        self.angles = self.manifest["angles"]
+        self.angle_to_idx = {a: i for i, a in enumerate(self.angles)}
+
+        # persistent worker 에도 보이도록 epoch 는 공유 메모리에 둔다
+        self._epoch = mp.RawValue("i", 0)
+
+        encoding = self.manifest.get("encoding", "keep")
+        if decode_scale > 1 and not encoding.startswith("jpg"):
+            print(f"[WARN] shard encoding '{encoding}': 축소 디코드는 JPEG 에서만 빨라집니다 "
+                  f"(--encode jpg 로 다시 변환하세요)")
+
+        print(f"[RCShardDataset:{self.split}] samples={self.manifest['count']} "
+              f"shards={len(self.manifest['shards'])} encoding={encoding} "
+              f"decode_scale={decode_scale}")
+
+    def __len__(self):
+        return self.manifest["count"]
+
+    def set_epoch(self, epoch: int):
+        """epoch 마다 호출 → shard / 버퍼 셔플 순서가 바뀜"""
+        self._epoch.value = epoch
+
+    def _read_shard(self, name):
+        # shard 한 개를 한 번의 순차 읽기로 메모리에 올림
+        with open(f"{self.shard_dir}/{name}.bin", "rb") as f:
+            data = f.read()
+        index = np.load(f"{self.shard_dir}/{name}.idx.npy")
+        return data, index
+
+    def _make_sample(self, encoded, angle, rng):
+        img_bgr = cv2.imdecode(np.frombuffer(encoded, dtype=np.uint8), self.decode_flags)
+        if img_bgr is None:
+            raise RuntimeError(f"[ERROR] Failed to decode image in {self.shard_dir}")
+
+        chw_u8 = self.preprocessor.to_uint8(img_bgr)
+        if self.augmentor is not None:
+            chw_aug, angles = self.augmentor.batch(
+                chw_u8[np.newaxis], [angle], rng=rng, channels_first=True
+            )
+            chw_u8, angle = chw_aug[0], int(angles[0])
+
+        if self.output_dtype == "uint8":
+            img_tensor = torch.from_numpy(chw_u8)
+        else:
+            img_tensor = torch.from_numpy(self.preprocessor.normalize(chw_u8))
+        return img_tensor, self.angle_to_idx[angle]
+
+    def __iter__(self):
+        info = get_worker_info()
+        worker_id = 0 if info is None else info.id
+        num_workers = 1 if info is None else info.num_workers
+        epoch = self._epoch.value
+
+        # shard 순서는 모든 worker 가 같은 seed 로 섞고, worker 별로 나눠 가짐
+        names = [s["name"] for s in self.manifest["shards"]]
+        order = np.arange(len(names))
+        if self.shuffle:
+            order = np.random.default_rng([self.random_seed, epoch]).permutation(order)
+        mine = order[worker_id::num_workers]
+        if worker_id == 0 and len(names) < num_workers:
+            print(f"[WARN] shards({len(names)}) < num_workers({num_workers}): "
+                  f"일부 worker 는 쉬게 됩니다. --shard-mb 를 줄여 다시 변환하세요.")
+
+        rng = np.random.default_rng([self.random_seed, epoch, worker_id])
+        buffer_size = self.shuffle_buffer if self.shuffle else 0
+        buffer = []
+
+        for s in mine:
+            data, index = self._read_shard(names[s])
+            view = memoryview(data)
+            for offset, length, angle in index:
+                sample = (view[offset:offset + length], int(angle))
+                if len(buffer) < buffer_size:
+                    buffer.append(sample)
+                    continue
+                if buffer_size:
+                    # 버퍼의 임의 위치와 교체하며 내보냄
+                    j = int(rng.integers(buffer_size))
+                    buffer[j], sample = sample, buffer[j]
+                yield self._make_sample(*sample, rng)
+
+        if buffer_size:
+            for j in rng.permutation(len(buffer)):
+                yield self._make_sample(*buffer[j], rng)
+
+
+if __name__ == "__main__":
+    from training.RCDataset import RCDataset
+
+    parser = argparse.ArgumentParser(description="pack RC dataset into shards")
+    parser.add_argument("--root", required=True, help="dataset 폴더 (CSV + 이미지)")
+    parser.add_argument("--csv", default="data_labels_clean", help="CSV 파일 이름 (.csv 제외)")
+    parser.add_argument("--out", required=True, help="shard 출력 폴더")
+    parser.add_argument("--shard-mb", type=int, default=64)
+    parser.add_argument("--split-ratio", type=float, default=0.8)
+    parser.add_argument("--encode", choices=ENCODINGS, default="keep",
+                        help="keep = 원본 바이트, jpg = JPEG 재인코딩 (축소 디코드용)")
+    parser.add_argument("--jpeg-quality", type=int, default=95)
+    args = parser.parse_args()
+
+    preproc = RCPreprocessor(out_size=(200, 66), crop_top_ratio=0.4, crop_bottom_ratio=1.0)
+
+    for split in ("train", "test"):
+        ds = RCDataset(
+            csv_filename=args.csv,
+            root=args.root,
+            preprocessor=preproc,
+            augmentor=None,
+            split=split,
+            split_ratio=args.split_ratio,
+        )
+        pack_shards(ds, f"{args.out.rstrip('/')}/{split}", shard_mb=args.shard_mb,
+                    encode=args.encode, jpeg_quality=args.jpeg_quality)
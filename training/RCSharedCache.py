@@ -0,0 +1,213 @@
+# training/RCSharedCache.py
+# =============================================================================
+# Description : DataLoader worker 들이 함께 쓰는 RAM 캐시 (공유 메모리)
+#               - 크롭/리사이즈된 uint8 (3, H, W) 이미지를 샘플 index 단위로 보관
+#               - 바이트 예산(budget) 안에서 슬롯 수를 정하고, 넘치면 policy 에 따라 처리
+#               - worker 별 hit / miss 카운터 → epoch 끝에 stats() 로 보고
+#
+# 공유 메모리 배치 (하나의 SharedMemory 세그먼트):
+#   data    : (capacity, *item_shape) uint8
+#   slot_of : (num_items,)  int32   샘플 index → 슬롯 (-1 = 없음)
+#   owner   : (capacity,)   int32   슬롯 → 샘플 index (-1 = 빈 슬롯, -2 = 기록 중)
+#   ref     : (capacity,)   uint8   CLOCK 참조 비트
+#   state   : (2,)          int64   [clock hand, 다음 빈 슬롯]
+#   counters: (max_workers + 1, 2) int64   [hit, miss] (0번 = 메인 프로세스)
+# =============================================================================
+
+import atexit
+import multiprocessing as mp
+import os
+from multiprocessing import shared_memory
+
+import numpy as np
+from torch.utils.data import get_worker_info
+
+POLICIES = ("static", "clock")
+
+
+class RCSharedImageCache:
+    """
+    worker 간 공유 이미지 캐시
+    - policy="static": 슬롯이 다 차면 더 이상 넣지 않음 (먼저 들어온 샘플 고정)
+                       epoch 마다 균등하게 셔플하는 학습에서는 hit rate ≈ capacity / N 으로
+                       교체 방식보다 높다 (교체 비용도 없음)
+    - policy="clock" : 최근에 안 쓰인 슬롯부터 교체 (LRU 근사)
+                       가중 샘플링처럼 일부 샘플이 자주 반복될 때 유리
+    - 메인 프로세스에서 생성 → DataLoader worker 는 fork / pickle 로 같은 세그먼트를 공유
+    """
+
+    def __init__(self, num_items: int, item_shape, budget_bytes: int,
+                 policy: str = "static", max_workers: int = 64):
+        if policy not in POLICIES:
+            raise ValueError(f"[ERROR] policy must be one of {POLICIES}, got '{policy}'")
+
+        self.num_items = num_items
+        self.item_shape = tuple(item_shape)
+        self.item_bytes = int(np.prod(self.item_shape))
+        self.capacity = int(max(0, min(num_items, budget_bytes // self.item_bytes)))
+        self.policy = policy
+        self.max_workers = max_workers
+
+        self._layout = self._make_layout()
+        size = max(1, self._layout["total"])
+        self._shm = shared_memory.SharedMemory(create=True, size=size)
+        self._owner_pid = os.getpid()
+        self._lock = mp.Lock()
+        self._bind()
+
+        self._slot_of[:] = -1
+        self._owner[:] = -1
+        self._ref[:] = 0
+        self._state[:] = 0
+        self._counters[:] = 0
+
+        atexit.register(self._release)
+
+        print(f"[RCSharedImageCache] capacity={self.capacity}/{num_items} items "
+              f"({self.capacity * self.item_bytes / 1024 ** 2:.1f} MB, policy={policy})")
+
+    # ------------------------------------------------------------------
+    # 공유 메모리 배치 / 연결
+    # ------------------------------------------------------------------
+    def _make_layout(self):
+        fields = [
+            ("data", np.uint8, (self.capacity, *self.item_shape)),
+            ("slot_of", np.int32, (self.num_items,)),
+            ("owner", np.int32, (self.capacity,)),
+            ("ref", np.uint8, (self.capacity,)),
+            ("state", np.int64, (2,)),
+            ("counters", np.int64, (self.max_workers + 1, 2)),
+        ]
+        layout = {}
+        offset = 0
+        for name, dtype, shape in fields:
+            offset = (offset + 7) // 8 * 8  # 8바이트 정렬
+            layout[name] = (offset, dtype, shape)
+            offset += int(np.prod(shape)) * np.dtype(dtype).itemsize
+        layout["total"] = offset
+        return layout
+
+    def _bind(self):
+        buf = self._shm.buf
+        for name in ("data", "slot_of", "owner", "ref", "state", "counters"):
+            offset, dtype, shape = self._layout[name]
+            arr = np.ndarray(shape, dtype=dtype, buffer=buf, offset=offset)
+            setattr(self, f"_{name}", arr)
+
+    def __getstate__(self):
+        # spawn 방식 worker 로 넘길 때: 세그먼트 이름만 넘기고 다시 연결
+        state = {k: v for k, v in self.__dict__.items()
+                 if k not in ("_shm", "_data", "_slot_of", "_owner",
+                              "_ref", "_state", "_counters")}
+        state["_shm_name"] = self._shm.name
+        return state
+
+    def __setstate__(self, state):
+        name = state.pop("_shm_name")
+        self.__dict__.update(state)
+        try:
+            self._shm = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:
+            # Python < 3.13: resource_tracker 가 worker 종료 시 세그먼트를 지우지 않도록 해제
+            from multiprocessing import resource_tracker
+            self._shm = shared_memory.SharedMemory(name=name)
+            try:
+                resource_tracker.unregister(self._shm._name, "shared_memory")
+            except Exception:
+                pass
+        self._bind()
+
+    def _release(self):
+        if getattr(self, "_shm", None) is None or os.getpid() != self._owner_pid:
+            return
+        for name in ("data", "slot_of", "owner", "ref", "state", "counters"):
+            setattr(self, f"_{name}", None)
+        self._shm.close()
+        self._shm.unlink()
+        self._shm = None
+
+    # ------------------------------------------------------------------
+    # 조회 / 저장
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _worker_slot():
+        info = get_worker_info()
+        return 0 if info is None else info.id + 1
+
+    def get(self, idx: int, out: np.ndarray) -> bool:
+        """캐시에 있으면 out 에 복사하고 True"""
+        counters = self._counters[min(self._worker_slot(), self.max_workers)]
+        s = self._slot_of[idx]
+        if s >= 0 and self._owner[s] == idx:
+            np.copyto(out, self._data[s])
+            # 복사하는 동안 다른 worker 가 교체하지 않았는지 다시 확인
+            if self._owner[s] == idx:
+                self._ref[s] = 1
+                counters[0] += 1
+                return True
+        counters[1] += 1
+        return False
+
+    def put(self, idx: int, chw_u8: np.ndarray):
+        """샘플을 캐시에 넣는다 (슬롯이 없고 policy="static" 이면 무시)"""
+        if self.capacity == 0:
+            return
+
+        with self._lock:
+            if self._slot_of[idx] >= 0:
+                return
+            s = self._allocate()
+            if s < 0:
+                return
+            old = self._owner[s]
+            if old >= 0:
+                self._slot_of[old] = -1
+            self._owner[s] = -2
+
+        # 데이터 복사는 잠금 밖에서 (슬롯은 -2 로 예약되어 있음)
+        self._data[s] = chw_u8
+
+        with self._lock:
+            self._owner[s] = idx
+            self._ref[s] = 1
+            self._slot_of[idx] = s
+
+    def _allocate(self) -> int:
+        """(잠금 안에서 호출) 빈 슬롯 또는 교체할 슬롯 번호, 없으면 -1"""
+        hand, next_free = self._state
+        if next_free < self.capacity:
+            self._state[1] = next_free + 1
+            return int(next_free)
+        if self.policy == "static":
+            return -1
+
+        # CLOCK: 참조 비트가 0 이고 기록 중이 아닌 슬롯을 찾을 때까지 회전
+        for _ in range(2 * self.capacity + 1):
+            s = int(hand)
+            hand = (hand + 1) % self.capacity
+            if self._owner[s] == -2:
+                continue
+            if self._ref[s]:
+                self._ref[s] = 0
+                continue
+            self._state[0] = hand
+            return s
+        self._state[0] = hand
+        return -1
+
+    # ------------------------------------------------------------------
+    # 통계
+    # ------------------------------------------------------------------
+    def stats(self) -> dict:
+        hits, misses = (int(v) for v in self._counters.sum(axis=0))
+        total = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / total if total else 0.0,
+            "cached": int((self._owner >= 0).sum()),
+            "capacity": self.capacity,
+        }
+
+    def reset_stats(self):
+        self._counters[:] = 0
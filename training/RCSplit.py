@@ -0,0 +1,231 @@
+# training/RCSplit.py
+# =============================================================================
+# Description : train / test split 매니페스트 (CSV 당 한 번만 분할, 이후 mmap 으로 읽기)
+#               - RCDataset 이 인스턴스마다 CSV 전체를 읽고 섞고 groupby 로 나누던 작업을
+#                 한 번만 수행해 split 별 컬럼형 배열(.npy)로 저장
+#               - 다음 실행부터는 CSV 파싱 없이 np.load(mmap_mode="r") 로 바로 사용
+#               - CSV 가 바뀌면(크기/mtime 변경 + 내용 해시 불일치) 자동으로 다시 생성
+#               - 학습 / 평가 / check_dataset 이 모두 같은 매니페스트 → 같은 split
+#
+# 분할 규칙 (기존 RCDataset 과 동일):
+#   - CSV 에 split 컬럼이 있으면 그 값을 그대로 사용
+#   - 없으면 (shuffle 시 random_seed 로 섞은 뒤) servo_angle 별로 앞 split_ratio 는 train, 나머지는 test
+#
+# 디렉토리 구조:
+#   <root>/.rc_split/<csv 이름>_<분할 설정 해시>/
+#       meta.json               : CSV 해시 / 크기 / mtime, seed, split_ratio, split 별 샘플 수
+#       <split>.rows.npy        : CSV 행 번호 (int64)
+#       <split>.angles.npy      : servo_angle (int64)
+#       <split>.offsets.npy     : 경로 바이트 오프셋 (int64, 길이 N+1)
+#       <split>.paths.npy       : utf-8 경로를 이어 붙인 바이트 (uint8)
+#
+# 실행 예시 (저장소 루트에서, 매니페스트 생성 / 확인):
+#   python -m training.RCSplit --root C:/Users/YJU/Desktop/dataset --csv data_labels_clean
+# =============================================================================
+
+import argparse
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+SPLIT_VERSION = 1
+SPLIT_ARRAYS = ("rows", "angles", "offsets", "paths")
+
+
+def file_sha1(path: str, chunk_size: int = 1 << 20) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _encode_paths(names):
+    encoded = [str(n).replace("\\", "/").encode("utf-8") for n in names]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(n) for n in encoded], out=offsets[1:])
+    paths = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+    return offsets, paths
+
+
+class RCSplitManifest:
+    """
+    CSV 하나 + 분할 설정 하나에 대한 split 매니페스트
+    - 생성자: 매니페스트가 없거나 CSV 가 바뀌었으면 만들고, 아니면 그대로 사용
+    - arrays(split): {"rows", "angles", "offsets", "paths"} (읽기 전용 mmap)
+    """
+
+    def __init__(self, root: str, csv_filename: str, split_ratio: float = 0.8,
+                 shuffle: bool = True, random_seed: int = 42, manifest_dir: str = None):
+        self.root = root.replace("\\", "/").rstrip("/")
+        self.csv_path = f"{self.root}/{csv_filename}.csv"
+        self.settings = {
+            "version": SPLIT_VERSION,
+            "split_ratio": split_ratio,
+            "shuffle": shuffle,
+            "random_seed": random_seed,
+        }
+        key = hashlib.sha1(
+            json.dumps(self.settings, sort_keys=True).encode("utf-8")
+        ).hexdigest()[:12]
+        manifest_dir = (manifest_dir or f"{self.root}/.rc_split").replace("\\", "/")
+        self.dir = f"{manifest_dir}/{csv_filename}_{key}"
+
+        if not os.path.exists(self.csv_path):
+            raise FileNotFoundError(f"[ERROR] CSV not found: {self.csv_path}")
+
+        self.meta = self._load_meta()
+        if self.meta is None:
+            self.meta = self._build()
+
+    # ------------------------------------------------------------------
+    # 유효성 확인 (크기/mtime 이 같으면 해시 생략, 다르면 내용 해시로 판단)
+    # ------------------------------------------------------------------
+    def _load_meta(self):
+        meta_path = f"{self.dir}/meta.json"
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("settings") != self.settings:
+            return None
+
+        st = os.stat(self.csv_path)
+        if meta["csv_size"] == st.st_size and meta["csv_mtime_ns"] == st.st_mtime_ns:
+            return meta
+        if meta["csv_size"] != st.st_size or meta["csv_sha1"] != file_sha1(self.csv_path):
+            print("[RCSplit] CSV changed → rebuild split manifest")
+            return None
+
+        # 내용은 같고 mtime 만 바뀜 (복사 등) → 기록만 갱신
+        meta["csv_mtime_ns"] = st.st_mtime_ns
+        self._write_json(meta_path, meta)
+        return meta
+
+    # ------------------------------------------------------------------
+    # 생성
+    # ------------------------------------------------------------------
+    def _build(self):
+        print(f"[RCSplit] building split manifest → {self.dir}")
+        st = os.stat(self.csv_path)
+        csv_sha1 = file_sha1(self.csv_path)
+        df = pd.read_csv(self.csv_path)
+
+        for col in ("image_path", "servo_angle"):
+            if col not in df.columns:
+                raise ValueError(f"[ERROR] CSV must contain column '{col}'")
+
+        if "split" in df.columns:
+            source = "column"
+            splits = {
+                str(name): group.index.to_numpy(dtype=np.int64)
+                for name, group in df.groupby("split", sort=True)
+            }
+        else:
+            source = "stratified"
+            if self.settings["shuffle"]:
+                df = df.sample(frac=1.0, random_state=self.settings["random_seed"])
+            train_rows, test_rows = [], []
+            for _, group in df.groupby("servo_angle"):
+                n_train = int(len(group) * self.settings["split_ratio"])
+                train_rows.append(group.index[:n_train].to_numpy(dtype=np.int64))
+                test_rows.append(group.index[n_train:].to_numpy(dtype=np.int64))
+            splits = {
+                "train": np.concatenate(train_rows) if train_rows else np.zeros(0, np.int64),
+                "test": np.concatenate(test_rows) if test_rows else np.zeros(0, np.int64),
+            }
+
+        os.makedirs(self.dir, exist_ok=True)
+        # 이전 meta 를 먼저 지움 → 배열을 쓰는 도중 중단돼도 옛 meta + 새 배열 조합이 남지 않음
+        if os.path.exists(f"{self.dir}/meta.json"):
+            os.remove(f"{self.dir}/meta.json")
+        for name, rows in splits.items():
+            sub = df.loc[rows]
+            offsets, paths = _encode_paths(sub["image_path"])
+            arrays = {
+                "rows": rows,
+                "angles": sub["servo_angle"].to_numpy(dtype=np.int64),
+                "offsets": offsets,
+                "paths": paths,
+            }
+            for array_name, arr in arrays.items():
+                self._write_npy(f"{self.dir}/{name}.{array_name}.npy", arr)
+
+        # meta.json 을 마지막에 기록 → meta 가 있으면 배열도 모두 완성된 상태
+        meta = {
+            "settings": self.settings,
+            "csv": os.path.basename(self.csv_path),
+            "csv_sha1": csv_sha1,
+            "csv_size": st.st_size,
+            "csv_mtime_ns": st.st_mtime_ns,
+            "source": source,
+            "counts": {name: int(len(rows)) for name, rows in splits.items()},
+        }
+        self._write_json(f"{self.dir}/meta.json", meta)
+        return meta
+
+    @staticmethod
+    def _write_npy(path, arr):
+        tmp = f"{path}.tmp{os.getpid()}.npy"
+        np.save(tmp, arr)
+        os.replace(tmp, path)
+
+    @staticmethod
+    def _write_json(path, obj):
+        tmp = f"{path}.tmp{os.getpid()}"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(obj, f, indent=2)
+        os.replace(tmp, path)
+
+    # ------------------------------------------------------------------
+    # 조회
+    # ------------------------------------------------------------------
+    @property
+    def splits(self):
+        return list(self.meta["counts"])
+
+    def resolve(self, split: str) -> str:
+        """split 이름 → 매니페스트 split (stratified 분할에서는 train 이 아니면 test)"""
+        if self.meta["source"] == "stratified":
+            return "train" if split == "train" else "test"
+        if split not in self.meta["counts"]:
+            raise ValueError(f"[ERROR] split '{split}' not in CSV split column {self.splits}")
+        return split
+
+    def arrays(self, split: str) -> dict:
+        name = self.resolve(split)
+        out = {}
+        for array_name in SPLIT_ARRAYS:
+            out[array_name] = np.load(f"{self.dir}/{name}.{array_name}.npy", mmap_mode="r")
+        return out
+
+    def summary(self):
+        """split 별 servo_angle 분포 {split: {angle: count}}"""
+        result = {}
+        for name in self.splits:
+            angles, counts = np.unique(self.arrays(name)["angles"], return_counts=True)
+            result[name] = dict(zip(angles.tolist(), counts.tolist()))
+        return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="build / inspect RCDataset split manifest")
+    parser.add_argument("--root", required=True, help="dataset 폴더 (CSV + 이미지)")
+    parser.add_argument("--csv", default="data_labels_clean", help="CSV 파일 이름 (.csv 제외)")
+    parser.add_argument("--split-ratio", type=float, default=0.8)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--no-shuffle", dest="shuffle", action="store_false")
+    args = parser.parse_args()
+
+    manifest = RCSplitManifest(args.root, args.csv, args.split_ratio, args.shuffle, args.seed)
+    print(f"[INFO] manifest = {manifest.dir} (source={manifest.meta['source']}, "
+          f"csv sha1={manifest.meta['csv_sha1'][:12]})")
+    for name, counts in manifest.summary().items():
+        print(f"  {name:>6}: {sum(counts.values())} samples  {counts}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+# training/RCTensorCache.py
+# =============================================================================
+# Description : RCDataset 전처리 결과(uint8 CHW) 디스크 캐시 (memory-mapped)
+#               - 캐시 키 = 전처리 설정(out_size, crop 비율, 디코드 배율) + 파일별 (경로, 크기, mtime)
+#               - 첫 epoch(또는 warm-up 명령)에서 채우고, 이후에는 mmap에서 복사 없이 읽음
+#               - 원본 파일이 바뀌면 해당 항목만 다시 만든다 (전체 재생성 X)
+#
+# 디렉토리 구조:
+#   <cache_dir>/<설정 해시>/
+#       index.json   : 설정 + 경로 목록 (목록 위치 = slot 번호)
+#       index.lock   : 새 경로 slot 예약 시 프로세스 간 배타 잠금 (병렬 sweep / 분산 학습이 같은 캐시 공유)
+#       tensors.u8   : (capacity, 3, H, W) uint8
+#       stamps.i64   : (capacity, 2) int64 = (파일 크기, mtime_ns), 미기록 = -1
+#
+# Warm-up 실행 예시 (저장소 루트에서):
+#   python -m training.RCTensorCache --root C:/Users/YJU/Desktop/dataset \
+#       --csv data_labels_clean --cache-dir C:/Users/YJU/Desktop/dataset/.rc_cache
+# =============================================================================
+
+import argparse
+import contextlib
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+
+CACHE_VERSION = 1
+
+
+@contextlib.contextmanager
+def _file_lock(path: str):
+    """프로세스 간 배타 잠금 (POSIX: flock, Windows: msvcrt.locking), 다른 프로세스가 풀 때까지 대기"""
+    with open(path, "a+b") as f:
+        if os.name == "nt":
+            import msvcrt
+            while True:
+                try:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:  # LK_LOCK 은 약 10 초 뒤 포기 → 다시 시도
+                    continue
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class RCTensorCache:
+    """
+    전처리된 uint8 (3, H, W) 텐서를 파일 경로 단위로 보관하는 mmap 캐시
+    - 슬롯 예약(reserve)은 메인 프로세스에서, 읽기/쓰기는 DataLoader worker에서도 가능
+      (worker들은 서로 다른 슬롯에만 기록하므로 잠금이 필요 없음)
+    - 여러 프로세스가 같은 캐시를 동시에 열 수 있음: 새 경로 예약만 index.lock 으로 직렬화
+    """
+
+    def __init__(self, cache_dir: str, preprocessor, paths, extra_config: dict = None):
+        # extra_config: 전처리 결과에 영향을 주는 그 밖의 설정 (예: 축소 디코드 배율)
+        self.config = dict(preprocessor.config(), version=CACHE_VERSION, **(extra_config or {}))
+        self.shape = (3, preprocessor.out_h, preprocessor.out_w)
+        self.slot_bytes = int(np.prod(self.shape))
+
+        key = hashlib.sha1(
+            json.dumps(self.config, sort_keys=True).encode("utf-8")
+        ).hexdigest()[:16]
+        self.dir = os.path.join(cache_dir, key).replace("\\", "/")
+        os.makedirs(self.dir, exist_ok=True)
+
+        self._tensors = None
+        self._stamps = None
+
+        # 경로별 slot 번호 (paths 와 같은 순서)
+        self.slots = self._reserve(paths)
+
+    # ------------------------------------------------------------------
+    # 슬롯 예약 / 파일 크기 확장
+    # ------------------------------------------------------------------
+    def _read_index(self, index_path: str):
+        """
+        index.json 의 경로 목록 (없거나 설정이 다르면 None)
+        - index.json 은 os.replace 로만 바뀌므로 잠금 없이 읽어도 쓰다 만 파일을 보지 않음
+        """
+        if not os.path.exists(index_path):
+            return None
+        with open(index_path, "r", encoding="utf-8") as f:
+            index = json.load(f)
+        return index["paths"] if index.get("config") == self.config else None
+
+    def _assign(self, known, paths):
+        """paths 의 slot 번호, known 에 없는 경로는 known 뒤에 추가 (제자리) → (slots, 추가된 경로 수)"""
+        slot_of = {p: i for i, p in enumerate(known)}
+        slots = np.empty(len(paths), dtype=np.int64)
+        added = 0
+        for i, p in enumerate(paths):
+            s = slot_of.get(p)
+            if s is None:
+                s = len(known)
+                slot_of[p] = s
+                known.append(p)
+                added += 1
+            slots[i] = s
+        return slots, added
+
+    def _reserve(self, paths) -> np.ndarray:
+        index_path = f"{self.dir}/index.json"
+
+        # 1) 모든 경로에 이미 slot 이 있으면 읽기만 (파일 크기는 index 기록 전에 늘려 둠)
+        known = self._read_index(index_path)
+        if known is not None:
+            slots, added = self._assign(known, paths)
+            if added == 0:
+                self.capacity = len(known)
+                return slots
+
+        # 2) 새 경로 추가: 읽기 → slot 배정 → 파일 확장 → index 기록을 잠금 안에서
+        #    (다른 프로세스와 같은 slot 을 배정하거나 서로의 index 를 덮어쓰지 않도록)
+        with _file_lock(f"{self.dir}/index.lock"):
+            known = self._read_index(index_path) or []
+            slots, added = self._assign(known, paths)
+
+            capacity = len(known)
+            self._grow(f"{self.dir}/tensors.u8", capacity * self.slot_bytes, fill=0)
+            self._grow(f"{self.dir}/stamps.i64", capacity * 16, fill=0xFF)  # -1
+
+            if added or not os.path.exists(index_path):
+                tmp_path = f"{index_path}.tmp{os.getpid()}"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump({"config": self.config, "paths": known}, f)
+                os.replace(tmp_path, index_path)
+
+        self.capacity = capacity
+        return slots
+
+    @staticmethod
+    def _grow(path, nbytes, fill):
+        """파일을 nbytes 까지 늘린다 (새 영역은 fill 바이트로 채움)"""
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        if size >= nbytes:
+            return
+        with open(path, "ab") as f:
+            remaining = nbytes - size
+            chunk = bytes([fill]) * min(remaining, 1 << 20)
+            while remaining > 0:
+                n = min(remaining, len(chunk))
+                f.write(chunk[:n])
+                remaining -= n
+
+    # ------------------------------------------------------------------
+    # mmap 열기 (프로세스마다 지연 생성, pickle 시 제외)
+    # ------------------------------------------------------------------
+    def _open(self):
+        if self._tensors is None:
+            self._tensors = np.memmap(
+                f"{self.dir}/tensors.u8", dtype=np.uint8, mode="r+",
+                shape=(self.capacity, *self.shape)
+            )
+            self._stamps = np.memmap(
+                f"{self.dir}/stamps.i64", dtype=np.int64, mode="r+",
+                shape=(self.capacity, 2)
+            )
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_tensors"] = None
+        state["_stamps"] = None
+        return state
+
+    # ------------------------------------------------------------------
+    # 조회 / 저장
+    # ------------------------------------------------------------------
+    def lookup(self, slot: int, path: str):
+        """
+        반환: (tensor, stamp)
+        - tensor: 유효한 항목이면 mmap view (3, H, W) uint8, 없거나 오래됐으면 None
+        - stamp : 현재 파일의 (크기, mtime_ns) → store() 에 그대로 전달
+        """
+        if self.capacity == 0:
+            return None, None
+        self._open()
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None, None
+        stamp = (st.st_size, st.st_mtime_ns)
+        cached = self._stamps[slot]
+        if cached[0] == stamp[0] and cached[1] == stamp[1]:
+            return self._tensors[slot], stamp
+        return None, stamp
+
+    def store(self, slot: int, stamp, chw_u8: np.ndarray) -> np.ndarray:
+        """
+        전처리 결과를 슬롯에 기록 (데이터 먼저, stamp 나중 → 중간에 죽어도 무효 처리됨)
+        """
+        self._open()
+        self._stamps[slot] = -1
+        self._tensors[slot] = chw_u8
+        self._stamps[slot] = stamp
+        return self._tensors[slot]
+
+
+def warm_up(dataset, log_every: int = 1000):
+    """
+    dataset (augmentor=None) 의 모든 샘플을 한 번 읽어 캐시를 채운다
+    """
+    n = len(dataset)
+    start = time.time()
+    for i in range(n):
+        dataset[i]
+        if (i + 1) % log_every == 0:
+            print(f"  > {i + 1} / {n} cached ({time.time() - start:.1f}s)")
+    print(f"[INFO] cache warm-up done: {n} samples in {time.time() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    from preprocessor.RCPreprocessor import RCPreprocessor
+    from training.RCDataset import RCDataset
+
+    parser = argparse.ArgumentParser(description="RCDataset tensor cache warm-up")
+    parser.add_argument("--root", required=True, help="dataset 폴더 (CSV + 이미지)")
+    parser.add_argument("--csv", default="data_labels_clean", help="CSV 파일 이름 (.csv 제외)")
+    parser.add_argument("--cache-dir", default=None, help="기본값: <root>/.rc_cache")
+    parser.add_argument("--split-ratio", type=float, default=0.8)
+    args = parser.parse_args()
+
+    preproc = RCPreprocessor(out_size=(200, 66), crop_top_ratio=0.4, crop_bottom_ratio=1.0)
+    cache_dir = args.cache_dir or f"{args.root.rstrip('/')}/.rc_cache"
+
+    for split in ("train", "test"):
+        ds = RCDataset(
+            csv_filename=args.csv,
+            root=args.root,
+            preprocessor=preproc,
+            augmentor=None,
+            split=split,
+            split_ratio=args.split_ratio,
+            cache_dir=cache_dir,
+        )
+        warm_up(ds)
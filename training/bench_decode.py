@@ -0,0 +1,124 @@
+# training/bench_decode.py
+# =============================================================================
+# Description : 축소 디코드(IMREAD_REDUCED_COLOR_*) 정확도 / 처리량 비교
+#               - png      : 원본 PNG 전체 디코드 (기준)
+#               - png_rN   : PNG 축소 디코드 (OpenCV 는 전체 디코드 후 축소 → 이득 없음)
+#               - jpg      : JPEG(메모리에서 재인코딩) 전체 디코드
+#               - jpg_rN   : JPEG 축소 디코드 (DCT 단계에서 1/N 로 디코드)
+#
+# 보고 항목:
+#   - samples/s   : 디코드 + 크롭/리사이즈(uint8) 처리량
+#   - MAE / max   : 전처리된 uint8 출력의 기준(png) 대비 오차 (LSB)
+#   - --checkpoint 지정 시: test split 정확도와 기준 대비 예측 일치율
+#
+# 실행 예시 (저장소 루트에서):
+#   python -m training.bench_decode --root C:/Users/YJU/Desktop/dataset \
+#       --checkpoint models/pilotnet_steering_20251205_193224.pth
+# =============================================================================
+
+import argparse
+import time
+
+import cv2
+import numpy as np
+import torch
+
+from preprocessor.RCPreprocessor import RCPreprocessor, REDUCED_DECODE_FLAGS
+from training.RCDataset import RCDataset
+from training.model import PilotNet
+
+
+def decode_all(preproc, blobs, flags):
+    """blobs 를 flags 로 디코드 → (N, 3, H, W) uint8, 경과 시간(초)"""
+    out = np.empty((len(blobs), 3, preproc.out_h, preproc.out_w), dtype=np.uint8)
+    t0 = time.perf_counter()
+    for i, blob in enumerate(blobs):
+        img_bgr = cv2.imdecode(blob, flags)
+        preproc.to_uint8(img_bgr, out=out[i])
+    return out, time.perf_counter() - t0
+
+
+@torch.no_grad()
+def predict(model, preproc, images, batch_size=256):
+    preds = []
+    buf = np.empty((batch_size, 3, preproc.out_h, preproc.out_w), dtype=np.float32)
+    for start in range(0, len(images), batch_size):
+        chunk = images[start:start + batch_size]
+        x = preproc.normalize(chunk, out=buf[:len(chunk)])
+        preds.append(model(torch.from_numpy(x)).argmax(dim=1).numpy())
+    return np.concatenate(preds)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="reduced-resolution decode benchmark")
+    parser.add_argument("--root", required=True, help="dataset 폴더 (CSV + 이미지)")
+    parser.add_argument("--csv", default="data_labels_clean", help="CSV 파일 이름 (.csv 제외)")
+    parser.add_argument("--split-ratio", type=float, default=0.8)
+    parser.add_argument("--count", type=int, default=1000, help="test split 에서 사용할 샘플 수")
+    parser.add_argument("--scales", type=int, nargs="+", default=[2, 4])
+    parser.add_argument("--jpeg-quality", type=int, default=95)
+    parser.add_argument("--checkpoint", default=None, help="정확도 비교용 PilotNet .pth")
+    args = parser.parse_args()
+
+    preproc = RCPreprocessor(out_size=(200, 66), crop_top_ratio=0.4, crop_bottom_ratio=1.0)
+    ds = RCDataset(
+        csv_filename=args.csv,
+        root=args.root,
+        preprocessor=preproc,
+        augmentor=None,
+        split="test",
+        split_ratio=args.split_ratio,
+    )
+    n = min(args.count, len(ds))
+
+    # 원본 파일 바이트 + 메모리에서 만든 JPEG 바이트 (디스크 I/O 는 측정에서 제외)
+    png_blobs, jpg_blobs, labels = [], [], []
+    for i in range(n):
+        path, angle = ds.sample_info(i)
+        png_blobs.append(np.fromfile(path, dtype=np.uint8))
+        img_bgr = cv2.imdecode(png_blobs[-1], cv2.IMREAD_COLOR)
+        _, buf = cv2.imencode(".jpg", img_bgr, [cv2.IMWRITE_JPEG_QUALITY, args.jpeg_quality])
+        jpg_blobs.append(buf)
+        labels.append(ds.angle_to_idx[angle])
+    labels = np.array(labels)
+
+    h, w = cv2.imdecode(png_blobs[0], cv2.IMREAD_COLOR).shape[:2]
+    max_scale = preproc.max_decode_scale(h, w)
+    scales = [s for s in args.scales if s in REDUCED_DECODE_FLAGS and s <= max_scale]
+    if len(scales) < len(args.scales):
+        print(f"[WARN] {w}x{h} 입력에서 가능한 최대 decode_scale = {max_scale}")
+
+    modes = [("png", png_blobs, 1)] + [(f"png_r{s}", png_blobs, s) for s in scales]
+    modes += [("jpg", jpg_blobs, 1)] + [(f"jpg_r{s}", jpg_blobs, s) for s in scales]
+
+    model = None
+    if args.checkpoint:
+        model = PilotNet(num_classes=len(ds.angles), input_shape=(3, preproc.out_h, preproc.out_w))
+        model.load_state_dict(torch.load(args.checkpoint, map_location="cpu"))
+        model.eval()
+
+    print(f"[INFO] {n} samples ({w}x{h}), jpeg quality={args.jpeg_quality}")
+    header = f"{'mode':>8} | {'samples/s':>10} | {'MAE':>6} | {'max':>4}"
+    if model is not None:
+        header += f" | {'acc':>6} | {'agree':>6}"
+    print(header)
+    print("-" * len(header))
+
+    ref, ref_pred = None, None
+    for name, blobs, scale in modes:
+        images, elapsed = decode_all(preproc, blobs, REDUCED_DECODE_FLAGS[scale])
+        if ref is None:
+            ref = images.astype(np.int16)
+        diff = np.abs(images.astype(np.int16) - ref)
+        row = f"{name:>8} | {n / elapsed:>10.1f} | {diff.mean():>6.3f} | {int(diff.max()):>4d}"
+
+        if model is not None:
+            pred = predict(model, preproc, images)
+            if ref_pred is None:
+                ref_pred = pred
+            row += f" | {(pred == labels).mean():>6.3f} | {(pred == ref_pred).mean():>6.3f}"
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# training/bench_distributed.py
+# =============================================================================
+# Description : CPU 분산 학습 확장성 벤치마크
+#               - 프로세스 수 1 / 2 / 4 / 8 로 training.train_distributed 를 차례로 실행
+#               - 전체 배치 크기는 고정 (strong scaling) → rank 당 배치 = 128 / N
+#               - epoch 시간(첫 epoch 제외 평균), 속도 향상, 병렬 효율, 최종 test 정확도 보고
+#
+# 실행 예시 (저장소 루트에서):
+#   python -m training.bench_distributed --root /data/dataset --epochs 3 --procs 1 2 4 8
+# =============================================================================
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from training.loader_tuning import available_cpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description="distributed training scaling benchmark")
+    parser.add_argument("--root", required=True, help="dataset 폴더 (CSV + 이미지)")
+    parser.add_argument("--csv", default="data_labels_clean", help="CSV 파일 이름 (.csv 제외)")
+    parser.add_argument("--epochs", type=int, default=3)
+    parser.add_argument("--procs", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--master-port", type=int, default=29600)
+    parser.add_argument("--out", default=None, help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    cpus = available_cpus()
+    results = []
+    for i, nproc in enumerate(args.procs):
+        if nproc > cpus:
+            print(f"[WARN] nproc={nproc} > available cpus={cpus}: 결과가 과다 구독의 영향을 받습니다")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            result_json = os.path.join(tmp, "summary.json")
+            cmd = [
+                sys.executable, "-m", "training.train_distributed",
+                "--nproc", str(nproc),
+                "--master-port", str(args.master_port + i),
+                "--root", args.root,
+                "--csv", args.csv,
+                "--epochs", str(args.epochs),
+                "--no-save",
+                "--checkpoint-dir", os.path.join(tmp, "ckpt"),
+                "--result-json", result_json,
+            ]
+            print(f"\n========== nproc={nproc} ==========")
+            subprocess.run(cmd, check=True)
+            with open(result_json, "r", encoding="utf-8") as f:
+                summary = json.load(f)
+
+        times = summary["epoch_times"]
+        steady = times[1:] or times
+        results.append({
+            "nproc": nproc,
+            "epoch_time": sum(steady) / len(steady),
+            "test_acc": summary["test_acc"],
+        })
+
+    base = results[0]["epoch_time"] * results[0]["nproc"]
+    print(f"\n{'nproc':>5} | {'epoch(s)':>8} | {'speedup':>7} | {'efficiency':>10} | {'test_acc':>8}")
+    print("-" * 52)
+    for r in results:
+        speedup = base / r["epoch_time"]
+        print(f"{r['nproc']:>5} | {r['epoch_time']:>8.2f} | {speedup:>6.2f}x | "
+              f"{speedup / r['nproc'] * 100:>9.1f}% | {r['test_acc']:>7.2f}%")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"[INFO] saved → {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+# training/bench_input_dtype.py
+# =============================================================================
+# Description : float32 배치 vs uint8 배치 (device 에서 정규화) 비교
+#               - 배치 크기(bytes), DataLoader 처리량 (worker → 메인 IPC 포함)
+#               - host → device 복사 시간 (CUDA 가 없으면 host 버퍼 간 복사로 대신 측정)
+#               - 같은 모델 출력이 두 방식에서 동일한지 확인 (기대값: 최대 차이 0)
+#
+# 실행 예시 (저장소 루트에서):
+#   python -m training.bench_input_dtype --root C:/Users/YJU/Desktop/dataset --num-workers 4
+# =============================================================================
+
+import argparse
+import sys
+import time
+
+import torch
+
+from preprocessor.RCPreprocessor import RCPreprocessor
+from training.RCDataset import RCDataset
+from training.loader_tuning import make_loader
+from training.model import PilotNet
+
+
+def loader_throughput(loader, max_batches):
+    """(batches/s, 첫 배치) — 첫 배치(worker 시작)는 시간에서 제외"""
+    it = iter(loader)
+    first = next(it)
+    n = 0
+    t0 = time.perf_counter()
+    for _ in range(max_batches):
+        try:
+            next(it)
+        except StopIteration:
+            break
+        n += 1
+    elapsed = time.perf_counter() - t0
+    return (n / elapsed if n else 0.0), first
+
+
+def copy_time(batch, device, repeat=20):
+    """배치 1개 host → device 복사 평균 시간(ms) (CUDA 가 없으면 host 버퍼 간 복사)"""
+    if device.type == "cuda":
+        src = batch.pin_memory()
+        torch.cuda.synchronize()
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            src.to(device, non_blocking=True)
+        torch.cuda.synchronize()
+    else:
+        dst = torch.empty_like(batch)
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            dst.copy_(batch)
+    return (time.perf_counter() - t0) / repeat * 1000.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="float32 vs uint8 batch benchmark")
+    parser.add_argument("--root", required=True, help="dataset 폴더 (CSV + 이미지)")
+    parser.add_argument("--csv", default="data_labels_clean", help="CSV 파일 이름 (.csv 제외)")
+    parser.add_argument("--split-ratio", type=float, default=0.8)
+    parser.add_argument("--batch-size", type=int, default=128)
+    parser.add_argument("--num-workers", type=int, default=2)
+    parser.add_argument("--max-batches", type=int, default=20)
+    args = parser.parse_args()
+
+    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    preproc = RCPreprocessor(out_size=(200, 66), crop_top_ratio=0.4, crop_bottom_ratio=1.0)
+
+    model = PilotNet(num_classes=5, input_shape=(3, 66, 200)).to(device).eval()
+
+    print(f"[INFO] device={device}, batch_size={args.batch_size}, num_workers={args.num_workers}")
+    print(f"{'dtype':>8} | {'MB/batch':>8} | {'batches/s':>9} | {'copy ms':>7}")
+    print("-" * 44)
+
+    outputs = {}
+    for dtype in ("float32", "uint8"):
+        ds = RCDataset(
+            csv_filename=args.csv,
+            root=args.root,
+            preprocessor=preproc,
+            augmentor=None,
+            split="test",
+            split_ratio=args.split_ratio,
+            output_dtype=dtype,
+        )
+        loader = make_loader(ds, args.batch_size, shuffle=False,
+                             num_workers=args.num_workers, pin_memory=device.type == "cuda")
+        bps, (images, _) = loader_throughput(loader, args.max_batches)
+        mb = images.element_size() * images.nelement() / 1024 ** 2
+
+        with torch.no_grad():
+            outputs[dtype] = model(images.to(device)).cpu()
+
+        print(f"{dtype:>8} | {mb:>8.2f} | {bps:>9.2f} | {copy_time(images, device):>7.3f}")
+
+    max_diff = (outputs["float32"] - outputs["uint8"]).abs().max().item()
+    print(f"\nmodel output max diff (float32 vs uint8) = {max_diff:.3e}  "
+          f"-> {'OK' if max_diff == 0 else 'FAIL'}")
+    if max_diff != 0:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+# training/bench_pareto.py
+# =============================================================================
+# Description : PilotNet 변형(width_mult / separable)별 지연-정확도 Pareto 벤치마크
+#               - 변형마다 같은 split(training/RCSplit.py 매니페스트)으로 학습 후 test 정확도
+#                 (또는 "<변형>=<.pth>" 로 학습된 가중치를 평가만)
+#               - CPU 지연: 1 프레임(batch 1, 차량 제어 루프) / 배치(--batch) 프레임당 시간
+#               - 파라미터 수, 프레임당 MAC 수
+#               - Pareto frontier(더 빠르면서 더 정확한 변형이 없는 것) 표시,
+#                 --min-acc 를 만족하는 가장 빠른 변형 추천
+#
+# 변형 표기: "<width_mult>[+sep][=<.pth>]"  예) 1.0, 0.5, 0.5+sep, 0.75+sep=models/a.pth
+#
+# 실행 예시 (저장소 루트에서):
+#   python -m training.bench_pareto --root C:/Users/YJU/Desktop/dataset --epochs 10 \
+#       --variants 1.0 0.75 0.5 1.0+sep 0.5+sep 0.25+sep --threads 1 --min-acc 90
+# =============================================================================
+
+import argparse
+import json
+
+import torch
+import torch.nn as nn
+from torch.utils.data import DataLoader
+
+from preprocessor.RCPreprocessor import RCPreprocessor
+from training.RCDataset import RCDataset
+from training.model import PilotNet, load_pilotnet, parse_model_spec
+from training.quantize import frame_latency_ms, predict
+from training.train_pilotnet import train
+
+INPUT_SHAPE = (3, 66, 200)
+
+
+def count_macs(model: nn.Module, input_shape=INPUT_SHAPE) -> int:
+    """프레임 1장 forward 의 곱셈-누적 수 (Conv2d / Linear)"""
+    total = 0
+
+    def hook(module, inputs, output):
+        nonlocal total
+        if isinstance(module, nn.Conv2d):
+            k = module.kernel_size[0] * module.kernel_size[1]
+            total += output.numel() * (module.in_channels // module.groups) * k
+        elif isinstance(module, nn.Linear):
+            total += module.in_features * module.out_features
+
+    handles = [m.register_forward_hook(hook) for m in model.modules()
+               if isinstance(m, (nn.Conv2d, nn.Linear))]
+    with torch.no_grad():
+        model(torch.zeros(1, *input_shape))
+    for h in handles:
+        h.remove()
+    return total
+
+
+def mark_pareto(results, x="latency_ms", y="acc"):
+    """x(작을수록 좋음) / y(클수록 좋음) 기준으로 지배되지 않는 결과에 r["pareto"] = True"""
+    for r in results:
+        r["pareto"] = not any(
+            o is not r and o[x] <= r[x] and o[y] >= r[y] and (o[x] < r[x] or o[y] > r[y])
+            for o in results
+        )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PilotNet variant latency / accuracy Pareto benchmark")
+    parser.add_argument("--root", required=True, help="dataset 폴더 (CSV + 이미지)")
+    parser.add_argument("--csv", default="data_labels_clean", help="CSV 파일 이름 (.csv 제외)")
+    parser.add_argument("--variants", nargs="+",
+                        default=["1.0", "0.75", "0.5", "0.25", "1.0+sep", "0.5+sep", "0.25+sep"])
+    parser.add_argument("--epochs", type=int, default=10, help="변형별 학습 epoch (가중치를 준 변형은 평가만)")
+    parser.add_argument("--threads", type=int, default=1, help="지연 측정 torch 스레드 수")
+    parser.add_argument("--batch", type=int, default=32, help="배치 지연 측정 크기")
+    parser.add_argument("--min-acc", type=float, default=None, help="정확도 기준 (%%) → 가장 빠른 변형 추천")
+    parser.add_argument("--out", default=None, help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    variants = [parse_model_spec(v) for v in args.variants]
+    test_loader = None
+
+    results = []
+    for v in variants:
+        print(f"\n========== {v['name']} ==========")
+        # ---------------------------------------------------------------------
+        # 1) 정확도: 학습 (같은 split 매니페스트) 또는 주어진 가중치 평가
+        # ---------------------------------------------------------------------
+        if v["weights"]:
+            if test_loader is None:
+                preproc = RCPreprocessor(out_size=(200, 66), crop_top_ratio=0.4, crop_bottom_ratio=1.0)
+                test_ds = RCDataset(csv_filename=args.csv, root=args.root, preprocessor=preproc,
+                                    augmentor=None, split="test", output_dtype="uint8")
+                test_loader = DataLoader(test_ds, batch_size=128, shuffle=False)
+            trained = load_pilotnet(v["weights"], INPUT_SHAPE, v["width_mult"], v["separable"])
+            pred, labels = predict(trained, test_loader)
+            acc = (pred == labels).float().mean().item() * 100.0
+        else:
+            summary = train(
+                dataset_root=args.root,
+                csv_filename=args.csv,
+                num_epochs=args.epochs,
+                width_mult=v["width_mult"],
+                separable=v["separable"],
+                autotune_workers=False,
+                save_model=False,
+                checkpoint_dir=None,
+            )
+            acc = summary["test_acc"]
+
+        # ---------------------------------------------------------------------
+        # 2) CPU 지연 (가중치 값과 무관 → 같은 구조의 새 모델로 측정)
+        # ---------------------------------------------------------------------
+        # 측정 스레드 수는 이 구간에만 (다음 변형의 학습 / 평가는 원래 스레드 수로)
+        train_threads = torch.get_num_threads()
+        torch.set_num_threads(args.threads)
+        model = PilotNet(num_classes=5, input_shape=INPUT_SHAPE,
+                         width_mult=v["width_mult"], separable=v["separable"]).eval()
+        frame = torch.randint(0, 256, (1, *INPUT_SHAPE), dtype=torch.uint8)
+        batch = torch.randint(0, 256, (args.batch, *INPUT_SHAPE), dtype=torch.uint8)
+        try:
+            single_ms, single_p95 = frame_latency_ms(model, frame)
+            batch_ms, _ = frame_latency_ms(model, batch, warmup=5, iters=30)
+        finally:
+            torch.set_num_threads(train_threads)
+
+        results.append({
+            "name": v["name"],
+            "width_mult": v["width_mult"],
+            "separable": v["separable"],
+            "weights": v["weights"],
+            "acc": acc,
+            "latency_ms": single_ms,
+            "latency_p95_ms": single_p95,
+            "batch_ms_per_frame": batch_ms / args.batch,
+            "params": sum(p.numel() for p in model.parameters()),
+            "macs": count_macs(model),
+        })
+
+    # -------------------------------------------------------------------------
+    # 3) Pareto 표 (1 프레임 지연 순)
+    # -------------------------------------------------------------------------
+    mark_pareto(results)
+    results.sort(key=lambda r: r["latency_ms"])
+
+    w = max(10, *(len(r["name"]) for r in results))
+    print(f"\n(threads={args.threads}, batch={args.batch})")
+    print(f"{'variant':>{w}} | {'acc':>7} | {'1-frame':>8} | {'p95':>7} | {'batch/frame':>11} | "
+          f"{'params':>8} | {'MMAC':>6} | pareto")
+    print("-" * (76 + w))
+    for r in results:
+        print(f"{r['name']:>{w}} | {r['acc']:>6.2f}% | {r['latency_ms']:>6.3f}ms | {r['latency_p95_ms']:>5.3f}ms | "
+              f"{r['batch_ms_per_frame']:>9.3f}ms | {r['params']:>8d} | {r['macs'] / 1e6:>6.2f} | "
+              f"{'*' if r['pareto'] else ''}")
+
+    if args.min_acc is not None:
+        ok = [r for r in results if r["acc"] >= args.min_acc]
+        if ok:
+            best = ok[0]
+            print(f"[INFO] fastest variant with acc >= {args.min_acc:.1f}%: {best['name']} "
+                  f"(width_mult={best['width_mult']}, separable={best['separable']}, "
+                  f"{best['latency_ms']:.3f}ms, {best['acc']:.2f}%)")
+        else:
+            print(f"[WARN] no variant reached acc >= {args.min_acc:.1f}%")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"[INFO] saved → {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# training/bench_train_modes.py
+# =============================================================================
+# Description : 학습 모드 A/B 벤치마크 (train_pilotnet.train() 을 모드별로 실행)
+#               - fp32 (기준) / bf16 autocast / fp16 autocast + GradScaler (CUDA)
+#               - channels_last / torch.compile 조합
+#               - 모드별 epoch 시간(첫 epoch 제외 평균, 컴파일 / 캐시 워밍업 포함 안 함)과
+#                 최종 test 정확도 비교
+#
+# 실행 예시 (저장소 루트에서):
+#   python -m training.bench_train_modes --root C:/Users/YJU/Desktop/dataset --epochs 3
+#   python -m training.bench_train_modes --root ... --modes fp32 bf16 bf16+cl bf16+cl+compile
+# =============================================================================
+
+import argparse
+import json
+
+import torch
+
+from training.train_pilotnet import train
+
+
+def parse_mode(mode: str) -> dict:
+    """'bf16+cl+compile' → train() 인자"""
+    parts = mode.split("+")
+    amp = parts[0] if parts[0] in ("bf16", "fp16") else "off"
+    unknown = set(parts) - {"fp32", "bf16", "fp16", "cl", "compile"}
+    if unknown:
+        raise ValueError(f"[ERROR] unknown mode parts {sorted(unknown)} in '{mode}'")
+    return {
+        "amp": amp,
+        "channels_last": "cl" in parts,
+        "compile_model": "compile" in parts,
+    }
+
+
+def main():
+    default_modes = ["fp32", "fp32+cl", "bf16", "bf16+cl", "fp32+compile"]
+    if torch.cuda.is_available():
+        default_modes += ["fp16", "fp16+cl"]
+
+    parser = argparse.ArgumentParser(description="PilotNet training mode A/B benchmark")
+    parser.add_argument("--root", required=True, help="dataset 폴더 (CSV + 이미지)")
+    parser.add_argument("--csv", default="data_labels_clean", help="CSV 파일 이름 (.csv 제외)")
+    parser.add_argument("--epochs", type=int, default=3)
+    parser.add_argument("--modes", nargs="+", default=default_modes,
+                        help="fp32 / bf16 / fp16 에 +cl (channels_last), +compile 조합")
+    parser.add_argument("--out", default=None, help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    results = []
+    for mode in args.modes:
+        print(f"\n========== {mode} ==========")
+        summary = train(
+            dataset_root=args.root,
+            csv_filename=args.csv,
+            num_epochs=args.epochs,
+            autotune_workers=False,
+            save_model=False,
+            checkpoint_dir=None,
+            **parse_mode(mode),
+        )
+        times = summary["epoch_times"]
+        steady = times[1:] or times
+        results.append({
+            "mode": mode,
+            "first_epoch": times[0],
+            "epoch_time": sum(steady) / len(steady),
+            "test_acc": summary["test_acc"],
+        })
+
+    base = results[0]["epoch_time"]
+    print(f"\n{'mode':>18} | {'1st epoch':>9} | {'epoch(s)':>8} | {'speedup':>7} | {'test_acc':>8}")
+    print("-" * 64)
+    for r in results:
+        print(f"{r['mode']:>18} | {r['first_epoch']:>9.2f} | {r['epoch_time']:>8.2f} | "
+              f"{base / r['epoch_time']:>6.2f}x | {r['test_acc']:>7.2f}%")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"[INFO] saved → {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,73 +1,266 @@
-import pandas as pd
+# training/check_dataset.py
+# =============================================================================
+# Description : 데이터셋 CSV / 이미지 파일 검증 (병렬 + 증분)
+#               - 파일 검사를 스레드 풀(기본) 또는 프로세스 풀에서 병렬로 수행
+#               - 기본은 헤더 검사: PNG / JPEG 시그니처 + 크기 필드 + 파일 끝 마커(IEND / EOI)
+#                 → 잘린 파일 / 빈 파일 / 형식 불일치를 디코드 없이 검출
+#               - --full-decode: cv2.imdecode 로 전체 디코드 (느리지만 내부 손상까지 검출)
+#               - 파일별 (크기, mtime, sha1, 결과)를 사이드카 매니페스트에 기록
+#                 → 다음 실행에서는 새 파일 / 바뀐 파일만 다시 검사
+#                   (mtime 만 바뀌고 내용 해시가 같으면 이전 결과 재사용)
+#               - 문제 파일을 뺀 CSV 저장, 처리량 보고 + 문제 파일 목록(JSON) 저장
+#
+# 사이드카 매니페스트:
+#   <root>/.rc_check/<csv 이름>.json = {"version", "files": {파일 이름: {size, mtime_ns, sha1, mode, status}}}
+#
+# 실행 예시 (저장소 루트에서):
+#   python -m training.check_dataset --root C:/Users/YJU/Desktop/dataset --csv data_labels_balanced_1813
+#   python -m training.check_dataset --root ... --full-decode --workers 8 --processes
+# =============================================================================
+
+import argparse
+import hashlib
+import json
 import os
-import cv2
+import struct
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import cv2
+import numpy as np
+import pandas as pd
+
+from training.RCSplit import RCSplitManifest
 
 # =======================================================
-# 1. 설정 (train_pilotnet.py와 동일해야 합니다)
+# 1. 기본 설정 (train_pilotnet.py와 동일해야 합니다)
 # =======================================================
 CSV_FILENAME = "data_labels_balanced_1813"
 DATASET_ROOT = "C:/Users/YJU/Desktop/dataset"
 IMAGE_FOLDER = "" # 이미지 파일이 'dataset' 폴더 바로 아래에 있으면 빈 문자열 ("") 유지
                   # 만약 'dataset/images/' 안에 있다면 "images/"로 수정
+CLEAN_CSV_FILENAME = "data_labels_clean"
+SPLIT_RATIO = 0.8
+RANDOM_SEED = 42
+
+CHECK_VERSION = 1
+CHECK_MODES = ("header", "decode")
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+PNG_IEND = b"IEND\xaeB`\x82"
+JPEG_SOF = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+# =======================================================
+# 2. 파일 단위 검사
+# =======================================================
+def _png_header_ok(data: bytes) -> bool:
+    # 시그니처 + 첫 청크가 IHDR + 폭/높이 > 0 + 마지막 청크가 IEND
+    if len(data) < 8 + 25 + 12 or not data.startswith(PNG_SIGNATURE):
+        return False
+    if data[12:16] != b"IHDR":
+        return False
+    width, height = struct.unpack(">II", data[16:24])
+    return width > 0 and height > 0 and data.rstrip(b"\x00").endswith(PNG_IEND)
+
+
+def _jpeg_header_ok(data: bytes) -> bool:
+    # SOI + SOF 세그먼트의 폭/높이 > 0 + 끝이 EOI (일부 카메라는 EOI 뒤에 0 패딩)
+    if len(data) < 4 or data[:2] != b"\xff\xd8":
+        return False
+    if not data.rstrip(b"\x00").endswith(b"\xff\xd9"):
+        return False
+    pos = 2
+    while pos + 4 <= len(data):
+        if data[pos] != 0xFF:
+            return False
+        marker = data[pos + 1]
+        if marker == 0xFF:  # 채움 바이트
+            pos += 1
+            continue
+        length = struct.unpack(">H", data[pos + 2:pos + 4])[0]
+        if marker in JPEG_SOF:
+            if pos + 9 > len(data):
+                return False
+            height, width = struct.unpack(">HH", data[pos + 5:pos + 9])
+            return width > 0 and height > 0
+        if marker == 0xDA:  # SOS 전에 SOF 가 없음
+            return False
+        pos += 2 + length
+    return False
+
+
+def header_ok(data: bytes) -> bool:
+    if data.startswith(PNG_SIGNATURE):
+        return _png_header_ok(data)
+    if data.startswith(b"\xff\xd8"):
+        return _jpeg_header_ok(data)
+    # 그 밖의 형식은 헤더 규칙이 없으므로 디코드로 확인
+    return decode_ok(data)
+
+
+def decode_ok(data: bytes) -> bool:
+    img = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    return img is not None and img.size > 0
+
+
+def check_file(path: str, prev: dict, mode: str):
+    """
+    파일 하나 검사 → (status, record, checked)
+    - status : "ok" / "missing" / "unreadable"
+    - record : 매니페스트 항목 (missing 이면 None)
+    - checked: 실제로 읽었는지 (False = 이전 결과 재사용)
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return "missing", None, False
+
+    # 같은 모드 이상으로 검사한 기록이 있고 크기 / mtime 이 같으면 그대로 사용
+    reusable = prev is not None and CHECK_MODES.index(prev["mode"]) >= CHECK_MODES.index(mode)
+    if reusable and prev["size"] == st.st_size and prev["mtime_ns"] == st.st_mtime_ns:
+        return prev["status"], prev, False
+
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return "unreadable", None, True
+
+    sha1 = hashlib.sha1(data).hexdigest()
+    if reusable and prev["sha1"] == sha1:
+        status = prev["status"]
+    else:
+        ok = decode_ok(data) if mode == "decode" else header_ok(data)
+        status = "ok" if ok else "unreadable"
+
+    record = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha1": sha1,
+              "mode": mode, "status": status}
+    return status, record, True
+
+
+def _check_task(args):
+    return check_file(*args)
 
 
-def check_dataset():
-    csv_path = os.path.join(DATASET_ROOT, f"{CSV_FILENAME}.csv")
-    
+# =======================================================
+# 3. 사이드카 매니페스트
+# =======================================================
+def manifest_path(root: str, csv_filename: str) -> str:
+    return f"{root}/.rc_check/{csv_filename}.json"
+
+
+def load_manifest(path: str) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if data.get("version") != CHECK_VERSION:
+        return {}
+    return data.get("files", {})
+
+
+def save_manifest(path: str, files: dict):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp{os.getpid()}"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"version": CHECK_VERSION, "files": files}, f)
+    os.replace(tmp, path)
+
+
+# =======================================================
+# 4. 데이터셋 검사
+# =======================================================
+def check_dataset(root: str = DATASET_ROOT, csv_filename: str = CSV_FILENAME,
+                  image_folder: str = IMAGE_FOLDER, full_decode: bool = False,
+                  workers: int = None, processes: bool = False,
+                  clean_csv_filename: str = CLEAN_CSV_FILENAME) -> dict:
+    """
+    CSV 의 모든 이미지 검사 → 결과 dict (missing / unreadable 목록, 처리량)
+    - 문제 파일이 있으면 제거한 CSV 를 <root>/<clean_csv_filename>.csv 로 저장
+    - 결과는 <root>/.rc_check/<csv 이름>_report.json 에도 저장
+    """
+    root = root.replace("\\", "/").rstrip("/")
+    csv_path = f"{root}/{csv_filename}.csv"
+
     # ----------------------------
-    # 2. CSV 로드
+    # CSV 로드
     # ----------------------------
     if not os.path.exists(csv_path):
         print(f"🚨 오류: CSV 파일을 찾을 수 없습니다. 경로를 확인하세요: {csv_path}")
         sys.exit(1)
-        
+
     df = pd.read_csv(csv_path)
     print(f"[INFO] CSV 로드 성공. 총 {len(df)}개 샘플 확인.")
-    
+
+    filenames = df["image_path"].astype(str).str.replace("\\", "/", regex=False).tolist()
+    prefix = f"{root}/{image_folder}".rstrip("/")
+    mode = "decode" if full_decode else "header"
+
+    side_path = manifest_path(root, csv_filename)
+    known = load_manifest(side_path)
+    unique_names = list(dict.fromkeys(filenames))
+    tasks = [(f"{prefix}/{name}", known.get(name), mode) for name in unique_names]
+
     # ----------------------------
-    # 3. 이미지 파일 검증
+    # 병렬 검사
     # ----------------------------
-    missing_files = []
-    unreadable_files = []
-    
-    print("\n[INFO] 이미지 파일 존재 및 읽기 가능성 검사 중...")
-    
-    for index, row in df.iterrows():
-        # image_path 컬럼에 있는 파일 이름을 가져옵니다.
-        filename = str(row['image_path']).replace("\\", "/")
-        
-        # 파일 경로 조합 (루트 + 이미지 폴더 + 파일 이름)
-        image_full_path = os.path.join(DATASET_ROOT, IMAGE_FOLDER, filename)
-        image_full_path = image_full_path.replace("\\", "/")
-
-        if not os.path.exists(image_full_path):
-            # 파일이 디스크에 아예 없는 경우
-            missing_files.append(filename)
-        else:
-            # 파일은 있지만, cv2.imread가 읽지 못하는 경우 (손상 또는 권한 문제)
-            img = cv2.imread(image_full_path)
-            if img is None:
-                unreadable_files.append(filename)
-
-        # 진행 상황 표시
-        if (index + 1) % 1000 == 0:
-            print(f"  > {index + 1} / {len(df)}개 파일 검사 완료.")
+    workers = workers or min(32, (os.cpu_count() or 1) * (1 if processes else 4))
+    pool_cls = ProcessPoolExecutor if processes else ThreadPoolExecutor
+    print(f"\n[INFO] 이미지 검사 중... (mode={mode}, {pool_cls.__name__} x {workers}, "
+          f"기록된 파일 {len(known)}개)")
+
+    start = time.perf_counter()
+    results = {}
+    checked = checked_bytes = 0
+    with pool_cls(max_workers=workers) as pool:
+        chunksize = max(1, len(tasks) // (workers * 16)) if processes else 1
+        for i, (name, (status, record, did_check)) in enumerate(
+                zip(unique_names, pool.map(_check_task, tasks, chunksize=chunksize)), 1):
+            results[name] = status
+            if record is not None:
+                known[name] = record
+            else:
+                known.pop(name, None)
+            if did_check:
+                checked += 1
+                checked_bytes += record["size"] if record is not None else 0
+            if i % 1000 == 0:
+                print(f"  > {i} / {len(tasks)}개 파일 검사 완료.")
+    elapsed = time.perf_counter() - start
 
+    save_manifest(side_path, known)
+
+    missing_files = [n for n in unique_names if results[n] == "missing"]
+    unreadable_files = [n for n in unique_names if results[n] == "unreadable"]
+    throughput = {
+        "mode": mode,
+        "files": len(unique_names),
+        "checked": checked,
+        "reused": len(unique_names) - checked - len(missing_files),
+        "elapsed_s": round(elapsed, 3),
+        "files_per_s": round(checked / elapsed, 1) if elapsed > 0 else None,
+        "mb_per_s": round(checked_bytes / 1024 ** 2 / elapsed, 1) if elapsed > 0 else None,
+    }
 
     # ----------------------------
-    # 4. 결과 출력
+    # 결과 출력
     # ----------------------------
     print("\n" + "="*40)
     print("      ✅ 데이터셋 최종 검증 결과")
     print("="*40)
-    
+    print(f"[INFO] {throughput['files']}개 파일: 검사 {throughput['checked']}개, "
+          f"이전 결과 재사용 {throughput['reused']}개, {elapsed:.2f}s "
+          f"({throughput['files_per_s']} files/s, {throughput['mb_per_s']} MB/s)")
+
+    clean_csv_path = None
     if not missing_files and not unreadable_files:
         print("🎉 축하합니다! 모든 파일이 존재하며 읽기 가능합니다!")
         print("  -> 이제 train_pilotnet.py를 실행하시면 됩니다.")
     else:
         print("🚨 오류 파일이 발견되었습니다. 목록을 확인하고 CSV에서 제거해야 합니다.")
-        
+
         if missing_files:
             print(f"\n[❌ 누락된 파일 (CSV에 있지만 디스크에 없음) - {len(missing_files)}개]")
             for f in missing_files[:5]: # 최대 5개만 출력
@@ -81,17 +274,57 @@ def check_dataset():
                 print(f"  - {f}")
             if len(unreadable_files) > 5:
                 print(f"  ...외 {len(unreadable_files) - 5}개")
-                
-        # 문제 파일 제거를 위한 코드 예시 (선택적)
-        all_bad_files = set(missing_files + unreadable_files)
-        df_clean = df[~df['image_path'].isin(all_bad_files)]
-        
-        clean_csv_path = os.path.join(DATASET_ROOT, "data_labels_clean.csv")
+
+        # 문제 파일 제거 (경로 구분자를 정리한 이름으로 비교)
+        bad = set(missing_files) | set(unreadable_files)
+        df_clean = df[[name not in bad for name in filenames]]
+
+        clean_csv_path = f"{root}/{clean_csv_filename}.csv"
         df_clean.to_csv(clean_csv_path, index=False)
-        
+
         print(f"\n[INFO] 문제 파일이 제거된 CSV 파일이 '{clean_csv_path}'로 저장되었습니다.")
-        print(f"  -> 이 파일(data_labels_clean.csv)을 사용해 학습을 재시도하세요.")
+        print(f"  -> 이 파일({clean_csv_filename}.csv)을 사용해 학습을 재시도하세요.")
+
+    report = {
+        "csv": csv_path,
+        "clean_csv": clean_csv_path,
+        "throughput": throughput,
+        "missing": missing_files,
+        "unreadable": unreadable_files,
+    }
+    report_path = f"{root}/.rc_check/{csv_filename}_report.json"
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"[INFO] 문제 파일 목록 / 처리량 → {report_path}")
+    return report
+
+
+def report_split(root: str = DATASET_ROOT, csv_filename: str = CSV_FILENAME,
+                 split_ratio: float = SPLIT_RATIO, random_seed: int = RANDOM_SEED):
+    """학습 / 평가와 같은 split 매니페스트(training/RCSplit.py)로 split 별 클래스 분포 출력"""
+    manifest = RCSplitManifest(root, csv_filename, split_ratio, random_seed=random_seed)
+    print(f"\n[INFO] split 매니페스트: {manifest.dir} (source={manifest.meta['source']})")
+    for name, counts in manifest.summary().items():
+        print(f"  {name:>6}: {sum(counts.values())}개  {counts}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="dataset CSV / image validation")
+    parser.add_argument("--root", default=DATASET_ROOT, help="dataset 폴더 (CSV + 이미지)")
+    parser.add_argument("--csv", default=CSV_FILENAME, help="검사할 CSV 파일 이름 (.csv 제외)")
+    parser.add_argument("--image-folder", default=IMAGE_FOLDER, help="root 아래 이미지 폴더")
+    parser.add_argument("--clean-csv", default=CLEAN_CSV_FILENAME, help="문제 파일을 뺀 CSV 이름")
+    parser.add_argument("--full-decode", action="store_true", help="헤더 대신 전체 디코드로 검사")
+    parser.add_argument("--workers", type=int, default=None, help="병렬 작업 수")
+    parser.add_argument("--processes", action="store_true", help="스레드 대신 프로세스 풀 사용")
+    args = parser.parse_args()
+
+    report = check_dataset(args.root, args.csv, args.image_folder, args.full_decode,
+                           args.workers, args.processes, args.clean_csv)
+    # 학습에 쓸 CSV 기준으로 split 분포 확인
+    split_csv = args.clean_csv if report["clean_csv"] else args.csv
+    report_split(args.root.replace("\\", "/").rstrip("/"), split_csv)
 
 
 if __name__ == "__main__":
-    check_dataset()
\ No newline at end of file
+    main()
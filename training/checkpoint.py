@@ -0,0 +1,191 @@
+# training/checkpoint.py
+# =============================================================================
+# Description : 학습 중간 체크포인트 (비동기 저장) + 재개
+#               - 학습 루프는 CPU 스냅샷(모델 / 옵티마이저 / 스케일러 / RNG 상태 복사)만 만들고
+#                 디스크 쓰기는 백그라운드 스레드가 처리 → 루프가 디스크를 기다리지 않음
+#               - 최근 N 개 + best 1 개만 유지 (정리 대상은 이 실행이 쓴 파일만)
+#               - 임시 파일에 쓴 뒤 os.replace → 저장 도중 중단돼도 깨진 파일이 남지 않음
+#
+# 디렉토리 구조 (기본 <ckpt_dir> = runs/<timestamp>/checkpoints, 실행마다 따로):
+#   <ckpt_dir>/ckpt_epoch_0007.pth   : epoch 7 이 끝난 시점 (최근 keep_last 개)
+#   <ckpt_dir>/best.pth              : best_metric 이 가장 좋았던 epoch
+# =============================================================================
+
+import glob
+import os
+import queue
+import random
+import re
+import threading
+
+import numpy as np
+import torch
+
+CKPT_VERSION = 1
+_CKPT_RE = re.compile(r"ckpt_epoch_(\d+)\.pth$")
+
+
+def to_cpu(obj):
+    """state_dict 등을 재귀적으로 CPU 복사 (학습이 계속 갱신하는 텐서와 메모리를 공유하지 않음)"""
+    if isinstance(obj, torch.Tensor):
+        return obj.detach().to("cpu", copy=True)
+    if isinstance(obj, dict):
+        return {k: to_cpu(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(to_cpu(v) for v in obj)
+    return obj
+
+
+def capture_rng_state() -> dict:
+    """python / numpy / torch (CPU, CUDA) 전역 난수 상태"""
+    state = {
+        "python": random.getstate(),
+        "numpy": np.random.get_state(),
+        "torch": torch.get_rng_state(),
+    }
+    if torch.cuda.is_available():
+        state["cuda"] = torch.cuda.get_rng_state_all()
+    return state
+
+
+def restore_rng_state(state: dict):
+    random.setstate(state["python"])
+    np.random.set_state(state["numpy"])
+    torch.set_rng_state(state["torch"])
+    if "cuda" in state and torch.cuda.is_available():
+        torch.cuda.set_rng_state_all(state["cuda"])
+
+
+def sampler_generator(loader):
+    """DataLoader 셔플 순서를 정하는 generator (make_loader(seed=...) 로 만든 경우)"""
+    return getattr(getattr(loader, "sampler", None), "generator", None)
+
+
+def list_checkpoints(ckpt_dir: str):
+    """[(epoch, path), ...] epoch 오름차순"""
+    found = []
+    for path in glob.glob(os.path.join(ckpt_dir, "ckpt_epoch_*.pth")):
+        m = _CKPT_RE.search(os.path.basename(path))
+        if m:
+            found.append((int(m.group(1)), path))
+    return sorted(found)
+
+
+def latest_checkpoint(ckpt_dir: str):
+    found = list_checkpoints(ckpt_dir)
+    return found[-1][1] if found else None
+
+
+def latest_run_checkpoint(runs_dir: str = "runs"):
+    """runs/<실행>/checkpoints 들 중 가장 최근에 저장된 epoch 체크포인트 (없으면 None)"""
+    found = [path for run in glob.glob(os.path.join(runs_dir, "*", "checkpoints"))
+             for _, path in list_checkpoints(run)]
+    return max(found, key=os.path.getmtime) if found else None
+
+
+def load_checkpoint(path: str, ckpt_dir: str = None) -> dict:
+    """
+    path: 체크포인트 파일 또는 "latest" (ckpt_dir 에서 가장 최근 epoch)
+    """
+    if path == "latest":
+        path = latest_checkpoint(ckpt_dir)
+        if path is None:
+            raise FileNotFoundError(f"[ERROR] no checkpoint found in {ckpt_dir}")
+    state = torch.load(path, map_location="cpu", weights_only=False)
+    if state.get("version") != CKPT_VERSION:
+        raise RuntimeError(f"[ERROR] unsupported checkpoint version in {path}: {state.get('version')}")
+    print(f"[INFO] loaded checkpoint ← {path} (epoch {state['epoch']})")
+    return state
+
+
+class AsyncCheckpointer:
+    """
+    백그라운드 스레드 체크포인트 저장기
+    - snapshot(): 학습 스레드에서 호출, 모든 상태를 CPU 로 복사한 dict 반환 (동기)
+    - save(state, is_best): 저장 요청만 큐에 넣고 바로 반환 (큐가 차 있으면 이전 저장이 끝날 때까지 대기)
+    - close(): 남은 저장을 모두 끝내고 스레드 종료 (저장 중 에러는 save / close 에서 다시 발생)
+    - keep_last 정리는 이 checkpointer 가 쓴 파일(+ adopt: 재개한 실행의 이전 epoch 파일)만 대상
+      → 같은 폴더에 다른 실행의 체크포인트가 있어도 지우지 않음
+    """
+
+    def __init__(self, ckpt_dir: str, keep_last: int = 3, adopt=()):
+        self.ckpt_dir = ckpt_dir
+        self.keep_last = max(1, keep_last)
+        os.makedirs(ckpt_dir, exist_ok=True)
+        # 저장 순서(= epoch 순)로 정리 대상 경로
+        self._written = list(adopt)
+
+        self._queue = queue.Queue(maxsize=1)
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name="AsyncCheckpointer", daemon=True)
+        self._thread.start()
+
+    @staticmethod
+    def snapshot(epoch: int, model, optimizer, scaler=None, loader=None,
+                 best_metric=None, **extra) -> dict:
+        state = {
+            "version": CKPT_VERSION,
+            "epoch": epoch,
+            "model": to_cpu(model.state_dict()),
+            "optimizer": to_cpu(optimizer.state_dict()),
+            "scaler": scaler.state_dict() if scaler is not None else None,
+            "rng": capture_rng_state(),
+            "best_metric": best_metric,
+            **extra,
+        }
+        gen = sampler_generator(loader) if loader is not None else None
+        if gen is not None:
+            state["sampler_rng"] = gen.get_state()
+        return state
+
+    def save(self, state: dict, is_best: bool = False):
+        self._raise_error()
+        self._queue.put((state, is_best))
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+        self._raise_error()
+
+    def _raise_error(self):
+        if self._error is not None:
+            err, self._error = self._error, None
+            raise RuntimeError("[ERROR] checkpoint save failed") from err
+
+    def _write(self, state, path):
+        tmp = f"{path}.tmp"
+        torch.save(state, tmp)
+        os.replace(tmp, path)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            state, is_best = item
+            try:
+                path = os.path.join(self.ckpt_dir, f"ckpt_epoch_{state['epoch']:04d}.pth")
+                self._write(state, path)
+                if path in self._written:
+                    self._written.remove(path)
+                self._written.append(path)
+                if is_best:
+                    self._write(state, os.path.join(self.ckpt_dir, "best.pth"))
+                while len(self._written) > self.keep_last:
+                    old = self._written.pop(0)
+                    if os.path.exists(old):
+                        os.remove(old)
+            except Exception as e:  # 학습 스레드에서 다시 발생시킴
+                self._error = e
+
+
+def restore_training_state(state: dict, model, optimizer, scaler=None, loader=None):
+    """load_checkpoint() 결과를 모델 / 옵티마이저 / 스케일러 / 난수 상태에 복원"""
+    model.load_state_dict(state["model"])
+    optimizer.load_state_dict(state["optimizer"])
+    if scaler is not None and state.get("scaler"):
+        scaler.load_state_dict(state["scaler"])
+    restore_rng_state(state["rng"])
+    gen = sampler_generator(loader) if loader is not None else None
+    if gen is not None and "sampler_rng" in state:
+        gen.set_state(state["sampler_rng"])
@@ -0,0 +1,283 @@
+# training/distill.py
+# =============================================================================
+# Description : 지식 증류 (knowledge distillation): 큰 teacher(또는 앙상블) → 작은 student PilotNet
+#               - teacher: 학습된 .pth 하나 이상 (앙상블이면 log-확률 평균)
+#                          또는 --teacher-width 로 큰 PilotNet 을 먼저 학습
+#               - student loss = alpha * KL(teacher || student, 온도 T) * T^2 + (1 - alpha) * CE(hard label)
+#               - teacher 출력은 train split 전체에 대해 한 번만 계산해 디스크에 캐시 (memmap)
+#                 → 증류 epoch 의 비용은 일반 학습과 같음 (배치마다 teacher forward 없음)
+#
+# 캐시 / 증강:
+#   - 샘플마다 원본 / 좌우 반전 두 가지 teacher 출력을 저장 → 반전된 샘플은 반전 이미지의 출력 사용
+#     (반전 여부는 증강기가 반환하는 샘플별 반전 플래그로 판단 → 90도(직진)처럼 라벨이 같은 샘플도 구분,
+#      RCDataset.sample_with_flip / samples_with_flip)
+#   - 밝기 / 블러 증강은 라벨을 바꾸지 않는 작은 변화 → 원본 이미지의 teacher 출력을 그대로 사용
+#   - 캐시 키 = teacher (구조, 파일 크기 / mtime) + split 매니페스트(CSV 해시) + 전처리 설정
+#     <cache_dir>/teacher_logits/<키>.npy : (N, 2, num_classes) float32 log-확률
+#
+# 실행 예시 (저장소 루트에서):
+#   # 기존 모델들을 teacher 앙상블로, 0.25 폭 separable student
+#   python -m training.distill --root C:/Users/YJU/Desktop/dataset --student 0.25+sep \
+#       --teacher 1.0=models/pilotnet_steering_20251205_193224.pth --teacher 1.0=models/other.pth
+#
+#   # 2배 폭 teacher 를 먼저 학습한 뒤 증류, 같은 student 를 scratch 로도 학습해 비교
+#   python -m training.distill --root ... --teacher-width 2.0 --teacher-epochs 20 --student 0.25+sep --baseline
+# =============================================================================
+
+import argparse
+import copy
+import hashlib
+import json
+import os
+
+import numpy as np
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+from torch.utils.data import DataLoader, Dataset
+
+from training.model import load_pilotnet, parse_model_spec
+
+DISTILL_VERSION = 1
+
+
+# =============================================================================
+# 1. teacher 출력 캐시
+# =============================================================================
+class TeacherLogits:
+    """
+    train split 전체 샘플의 teacher log-확률 캐시
+    - logits[i, 0]: 원본 이미지, logits[i, 1]: 좌우 반전 이미지 (증강 전 크롭/리사이즈 결과 기준)
+    - 처음 한 번만 teacher 를 실행해 만들고, 이후에는 memmap 으로 읽기만 함
+    """
+
+    def __init__(self, teachers, dataset, cache_dir: str, device=None,
+                 batch_size: int = 256, num_workers: int = 0):
+        if not hasattr(dataset, "split_meta"):
+            raise ValueError("[ERROR] distillation needs RCDataset (CSV + 이미지), not shard datasets")
+        self.specs = [parse_model_spec(t) if isinstance(t, str) else t for t in teachers]
+        if not self.specs:
+            raise ValueError("[ERROR] at least one teacher is required")
+        for spec in self.specs:
+            if spec["weights"] is None:
+                raise ValueError(f"[ERROR] teacher '{spec['name']}' has no weights (<width>=<.pth>)")
+
+        preproc = dataset.preprocessor
+        self.input_shape = (3, preproc.out_h, preproc.out_w)
+        self.num_classes = len(dataset.angles)
+
+        key_src = {
+            "version": DISTILL_VERSION,
+            "teachers": [
+                {
+                    "width_mult": s["width_mult"],
+                    "separable": s["separable"],
+                    "weights": os.path.basename(s["weights"]),
+                    "size": os.path.getsize(s["weights"]),
+                    "mtime_ns": os.stat(s["weights"]).st_mtime_ns,
+                }
+                for s in self.specs
+            ],
+            "split": dataset.split_meta,
+            "preprocessor": preproc.config(),
+            "decode_scale": dataset.decode_scale,
+        }
+        key = hashlib.sha1(json.dumps(key_src, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+        self.path = f"{cache_dir}/teacher_logits/{key}.npy".replace("\\", "/")
+
+        if not os.path.exists(self.path):
+            self._build(dataset, device, batch_size, num_workers, key_src)
+        else:
+            print(f"[Distill] teacher logits cache hit → {self.path}")
+        self.logits = np.load(self.path, mmap_mode="r")
+
+    @torch.no_grad()
+    def _build(self, dataset, device, batch_size, num_workers, key_src):
+        device = torch.device(device or "cpu")
+        models = []
+        for spec in self.specs:
+            model = load_pilotnet(spec["weights"], self.input_shape, spec["width_mult"], spec["separable"])
+            if model.classifier[-1].out_features != self.num_classes:
+                raise ValueError(f"[ERROR] teacher '{spec['name']}' has {model.classifier[-1].out_features} "
+                                 f"classes, dataset has {self.num_classes}")
+            models.append(model.to(device))
+
+        # 증강 없이 크롭/리사이즈된 uint8 만 읽는 사본 (디스크 / 공유 캐시는 그대로 공유)
+        clean = copy.copy(dataset)
+        clean.augmentor = None
+        if getattr(clean, "output_dtype", "uint8") != "uint8":
+            clean.output_dtype = "uint8"
+        loader = DataLoader(clean, batch_size=batch_size, shuffle=False, num_workers=num_workers)
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = f"{self.path}.tmp{os.getpid()}.npy"
+        out = np.lib.format.open_memmap(tmp, mode="w+", dtype=np.float32,
+                                        shape=(len(clean), 2, self.num_classes))
+        print(f"[Distill] computing teacher logits: {len(self.specs)} teacher(s) x {len(clean)} samples x 2 views")
+
+        pos = 0
+        correct = 0
+        for images, labels in loader:
+            images = images.to(device)
+            n = images.size(0)
+            for view, x in enumerate((images, images.flip(-1))):
+                # 앙상블: teacher 별 log-확률 평균 (확률의 기하 평균, 정규화는 KL 계산 시 다시 수행)
+                logp = torch.stack([F.log_softmax(m(x).float(), dim=1) for m in models]).mean(dim=0)
+                out[pos:pos + n, view] = logp.cpu().numpy()
+                if view == 0:
+                    correct += (logp.argmax(dim=1).cpu() == labels).sum().item()
+            pos += n
+        out.flush()
+        del out
+        os.replace(tmp, self.path)
+        with open(self.path[:-4] + ".json", "w", encoding="utf-8") as f:
+            json.dump(key_src, f, indent=2)
+        print(f"[Distill] teacher train accuracy (no augmentation) = {correct / max(pos, 1) * 100:.2f}% "
+              f"→ {self.path}")
+
+
+class DistillDataset(Dataset):
+    """
+    RCDataset 래퍼: (image, label, teacher log-확률) 반환
+    - 증강은 원래 dataset 이 그대로 수행, 좌우 반전된 샘플은 반전 이미지의 teacher 출력 사용
+    """
+
+    def __init__(self, dataset, teacher: TeacherLogits):
+        if len(dataset) != len(teacher.logits):
+            raise ValueError(f"[ERROR] teacher cache has {len(teacher.logits)} samples, dataset {len(dataset)}")
+        self.dataset = dataset
+        self.logits = teacher.logits
+
+    def __len__(self):
+        return len(self.dataset)
+
+    def set_epoch(self, epoch: int):
+        self.dataset.set_epoch(epoch)
+
+    def _teacher(self, indices, flipped):
+        idx = np.asarray(indices, dtype=np.int64)
+        view = np.asarray(flipped, dtype=np.int64)
+        return torch.from_numpy(np.ascontiguousarray(self.logits[idx, view]))
+
+    def __getitem__(self, idx):
+        image, label, flipped = self.dataset.sample_with_flip(idx)
+        return image, label, self._teacher([idx], [flipped])[0]
+
+    def __getitems__(self, indices):
+        items = self.dataset.samples_with_flip(indices)
+        teacher = self._teacher(indices, [flipped for _, _, flipped in items])
+        return [(image, label, teacher[j]) for j, (image, label, _) in enumerate(items)]
+
+
+# =============================================================================
+# 2. 증류 loss
+# =============================================================================
+class DistillLoss(nn.Module):
+    """alpha * KL(teacher || student) * T^2 + (1 - alpha) * CE(hard label, label smoothing)"""
+
+    def __init__(self, alpha: float = 0.5, temperature: float = 4.0, label_smoothing: float = 0.1):
+        super().__init__()
+        if not 0.0 <= alpha <= 1.0:
+            raise ValueError(f"[ERROR] alpha must be in [0, 1], got {alpha}")
+        self.alpha = alpha
+        self.temperature = temperature
+        self.label_smoothing = label_smoothing
+
+    def forward(self, outputs, labels, teacher_logp):
+        outputs = outputs.float()
+        hard = F.cross_entropy(outputs, labels, label_smoothing=self.label_smoothing)
+        t = self.temperature
+        soft = F.kl_div(
+            F.log_softmax(outputs / t, dim=1),
+            F.log_softmax(teacher_logp / t, dim=1),
+            log_target=True,
+            reduction="batchmean",
+        ) * (t * t)
+        return self.alpha * soft + (1.0 - self.alpha) * hard
+
+
+# =============================================================================
+# 3. 실행
+# =============================================================================
+def distill_train(teachers, student: str = "0.25+sep", alpha: float = 0.5,
+                  temperature: float = 4.0, **train_kwargs) -> dict:
+    """student 변형을 teacher 증류로 학습 (train_pilotnet.train() 의 나머지 인자 그대로 전달)"""
+    from training.train_pilotnet import train
+
+    spec = parse_model_spec(student)
+    return train(
+        width_mult=spec["width_mult"],
+        separable=spec["separable"],
+        teachers=teachers,
+        distill_alpha=alpha,
+        distill_temperature=temperature,
+        **train_kwargs,
+    )
+
+
+def main():
+    from training.train_pilotnet import train
+
+    parser = argparse.ArgumentParser(description="PilotNet knowledge distillation")
+    parser.add_argument("--root", required=True, help="dataset 폴더 (CSV + 이미지)")
+    parser.add_argument("--csv", default="data_labels_clean", help="CSV 파일 이름 (.csv 제외)")
+    parser.add_argument("--epochs", type=int, default=20)
+    parser.add_argument("--student", default="0.25+sep", help="student 변형 (<width_mult>[+sep])")
+    parser.add_argument("--teacher", action="append", default=[],
+                        help="teacher '<width_mult>[+sep]=<.pth>' (여러 번 지정하면 앙상블)")
+    parser.add_argument("--teacher-width", type=float, default=None,
+                        help="이 폭의 PilotNet 을 먼저 학습해 teacher 로 사용")
+    parser.add_argument("--teacher-epochs", type=int, default=20)
+    parser.add_argument("--alpha", type=float, default=0.5, help="soft target(KL) 비중")
+    parser.add_argument("--temperature", type=float, default=4.0)
+    parser.add_argument("--baseline", action="store_true", help="같은 student 를 증류 없이도 학습해 비교")
+    parser.add_argument("--no-save", dest="save_model", action="store_false", help="student PTH / ONNX 저장 안 함")
+    parser.add_argument("--out", default=None, help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    common = dict(dataset_root=args.root, csv_filename=args.csv, checkpoint_dir=None)
+    teachers = list(args.teacher)
+    results = {}
+
+    if args.teacher_width is not None:
+        print(f"\n========== teacher (width x{args.teacher_width}) ==========")
+        summary = train(num_epochs=args.teacher_epochs, width_mult=args.teacher_width,
+                        save_model=True, **common)
+        teachers.append(f"{args.teacher_width}={summary['pth_path']}")
+        results["teacher"] = {"spec": teachers[-1], "test_acc": summary["test_acc"]}
+    if not teachers:
+        parser.error("--teacher 또는 --teacher-width 가 필요합니다")
+
+    if args.baseline:
+        print(f"\n========== student {args.student} (scratch) ==========")
+        spec = parse_model_spec(args.student)
+        summary = train(num_epochs=args.epochs, width_mult=spec["width_mult"],
+                        separable=spec["separable"], save_model=False, **common)
+        results["scratch"] = {"test_acc": summary["test_acc"], "best_test_acc": summary["best_test_acc"],
+                              "epoch_time": float(np.mean(summary["epoch_times"]))}
+
+    print(f"\n========== student {args.student} (distilled) ==========")
+    summary = distill_train(teachers, args.student, args.alpha, args.temperature,
+                            num_epochs=args.epochs, save_model=args.save_model, **common)
+    results["distilled"] = {"test_acc": summary["test_acc"], "best_test_acc": summary["best_test_acc"],
+                            "epoch_time": float(np.mean(summary["epoch_times"])),
+                            "pth_path": summary.get("pth_path")}
+
+    print(f"\n{'model':>10} | {'test_acc':>8} | {'best_acc':>8} | {'epoch(s)':>8}")
+    print("-" * 46)
+    if "teacher" in results:
+        print(f"{'teacher':>10} | {results['teacher']['test_acc']:>7.2f}% | {'':>8} | {'':>8}")
+    for name in ("scratch", "distilled"):
+        if name in results:
+            r = results[name]
+            print(f"{name:>10} | {r['test_acc']:>7.2f}% | {r['best_test_acc']:>7.2f}% | {r['epoch_time']:>8.2f}")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"teachers": teachers, "student": args.student, "alpha": args.alpha,
+                       "temperature": args.temperature, **results}, f, indent=2)
+        print(f"[INFO] saved → {args.out}")
+
+
+if __name__ == "__main__":
+    main()
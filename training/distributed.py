@@ -0,0 +1,87 @@
+# training/distributed.py
+# =============================================================================
+# Description : torch.distributed (gloo, CPU) 데이터 병렬 학습 보조 함수
+#               - 프로세스 그룹 초기화 / 종료
+#               - rank / world size 조회 (분산이 아니면 rank 0, world 1)
+#               - rank 0 만 출력하도록 print 교체
+#               - 평가용 RankSliceSampler (패딩 없이 rank 별로 나눔 → 합치면 정확히 전체)
+# =============================================================================
+
+import builtins
+import datetime
+
+import torch.distributed as dist
+from torch.utils.data import Sampler
+
+
+def is_distributed() -> bool:
+    return dist.is_available() and dist.is_initialized()
+
+
+def get_rank() -> int:
+    return dist.get_rank() if is_distributed() else 0
+
+
+def get_world_size() -> int:
+    return dist.get_world_size() if is_distributed() else 1
+
+
+def is_main_process() -> bool:
+    return get_rank() == 0
+
+
+def init_distributed(rank: int, world_size: int, master_addr: str = "127.0.0.1",
+                     master_port: int = 29500, backend: str = "gloo",
+                     timeout_min: int = 30):
+    """tcp:// 로 프로세스 그룹 초기화 (여러 노드면 master_addr 는 node 0 의 주소)"""
+    dist.init_process_group(
+        backend=backend,
+        init_method=f"tcp://{master_addr}:{master_port}",
+        rank=rank,
+        world_size=world_size,
+        timeout=datetime.timedelta(minutes=timeout_min),
+    )
+
+
+def cleanup_distributed():
+    if is_distributed():
+        dist.destroy_process_group()
+
+
+def barrier():
+    if is_distributed():
+        dist.barrier()
+
+
+def setup_for_distributed(is_main: bool):
+    """
+    rank 0 이 아니면 print 를 끈다 (print(..., force=True) 는 항상 출력)
+    - 데이터셋 / 로더 등 기존 코드의 print 를 고치지 않고 rank 0 로그만 남김
+    """
+    builtin_print = builtins.print
+
+    def print(*args, **kwargs):
+        force = kwargs.pop("force", False)
+        if is_main or force:
+            builtin_print(*args, **kwargs)
+
+    builtins.print = print
+
+
+class RankSliceSampler(Sampler):
+    """
+    평가용 sampler: rank r 은 index r, r + world, r + 2*world, ... 만 사용
+    - DistributedSampler 와 달리 개수를 맞추려고 샘플을 반복(패딩)하지 않음
+      → rank 별 합계를 all_reduce 하면 전체 test set 결과와 정확히 같다
+    """
+
+    def __init__(self, dataset, rank: int = None, world_size: int = None):
+        self.num_samples_total = len(dataset)
+        self.rank = get_rank() if rank is None else rank
+        self.world_size = get_world_size() if world_size is None else world_size
+
+    def __iter__(self):
+        return iter(range(self.rank, self.num_samples_total, self.world_size))
+
+    def __len__(self):
+        return len(range(self.rank, self.num_samples_total, self.world_size))
@@ -1,45 +1,353 @@
-# export_onnx.py
+# training/export_onnx.py
+# =============================================================================
+# Description : PilotNet export → 검증 → 최적화 → 벤치마크 (버전별 배포 번들)
+#               - models/ 의 .pth (state_dict 또는 학습 체크포인트) 로드, 구조는 가중치 모양에서 추정
+#               - ONNX export (opset 11, 선택: 동적 batch 축 / 전처리 포함 입력 — training/preproc_graph.py)
+#               - 그래프 단순화 / 상수 폴딩: onnxsim 이 있으면 사용,
+#                 없으면 ONNX Runtime 기본(provider 무관) 최적화 결과를 저장
+#               - 실제 데이터셋 프레임(test split)으로 PyTorch vs ONNX Runtime 출력 패리티 검사
+#               - ONNX Runtime CPU execution provider 지연 측정
+#                 (--fused-preproc: 전처리 포함 vs RCPreprocessor + 전처리 없는 ONNX 전체 지연 비교)
+#
+# 번들: <out-dir>/<checkpoint 이름>/v<NNN>/  (export 할 때마다 다음 번호)
+#   model.onnx    : 배포 모델 (입력 "input", 출력 "output" = logits)
+#   metadata.json : 클래스(조향 각도) 목록, 입력 모양 / dtype / 배치, 전처리 설정,
+#                   원본 체크포인트 해시, 패리티 결과, 측정 지연, 라이브러리 버전
+#
+# 실행 예시 (저장소 루트에서):
+#   python -m training.export_onnx --checkpoint models/pilotnet_steering_20251205_193224.pth \
+#       --root C:/Users/YJU/Desktop/dataset --dynamic-batch
+#   python -m training.export_onnx --checkpoint latest --root ... --fused-preproc --frame-size 640x480
+# =============================================================================
 
+import argparse
+import glob
+import inspect
+import json
+import os
+import platform
+import shutil
+import time
+
+import cv2
+import numpy as np
 import torch
-from model_pilotnet import PilotNet
-
-def export_onnx():
-    # ----------------------------------------------------
-    # 1. 모델 생성 & 가중치 로드
-    # ----------------------------------------------------
-    model = PilotNet(
-        num_classes=5,
-        input_shape=(3, 66, 200)
-    )
+import torch.nn as nn
 
-    model_path = "models/pilotnet_steering.pth"
-    model.load_state_dict(torch.load(model_path, map_location="cpu"))
-    model.eval()
+from preprocessor.RCPreprocessor import RCPreprocessor
+from training.RCDataset import RCDataset
+from training.RCSplit import file_sha1
+from training.model import PilotNet, infer_model_spec, parse_model_spec, read_pilotnet_state
+from training.preproc_graph import FusedPilotNet, check_parity, compare_latency
+from training.quantize import frame_latency_ms
 
-    # ----------------------------------------------------
-    # 2. 더미 입력 (TensorRT에서 사용할 고정 입력)
-    # ----------------------------------------------------
-    dummy_input = torch.randn(1, 3, 66, 200, dtype=torch.float32)
+BUNDLE_VERSION = 1
 
-    # ----------------------------------------------------
-    # 3. ONNX Export
-    # ----------------------------------------------------
-    onnx_path = "models/pilotnet_steering.onnx"
 
+def export_onnx_model(model: nn.Module, onnx_path: str, example: torch.Tensor,
+                      dynamic_batch: bool = False, opset_version: int = 11) -> str:
+    """
+    모듈 → ONNX (입력 "input", 출력 "output")
+    - dynamic_batch: 0 번 축을 "batch" 동적 축으로 (False 면 example 의 batch 로 고정, TensorRT 기본)
+    - torch 2.9+ 기본 exporter 는 opset 18 로만 내보내므로, 있으면 기존(TorchScript) exporter 로 opset 유지
+    """
+    kwargs = {}
+    if "dynamo" in inspect.signature(torch.onnx.export).parameters:
+        kwargs["dynamo"] = False
+    dynamic_axes = {"input": {0: "batch"}, "output": {0: "batch"}} if dynamic_batch else None
+
+    model.eval()
     torch.onnx.export(
         model,
-        dummy_input,
+        example,
         onnx_path,
-        export_params=True,             # 모델 파라미터 포함 저장
-        opset_version=11,               # TensorRT 호환 추천
-        do_constant_folding=True,       # 최적화
-        input_names=["input"],          # TensorRT 바인딩 이름
-        output_names=["output"],        # TensorRT 바인딩 이름
-        dynamic_axes=None               # 고정 Shape (TensorRT 잘 동작함)
+        opset_version=opset_version,
+        export_params=True,
+        do_constant_folding=True,
+        input_names=["input"],
+        output_names=["output"],
+        dynamic_axes=dynamic_axes,
+        **kwargs,
     )
+    return onnx_path
+
+
+def _ort():
+    try:
+        import onnxruntime
+    except ImportError:
+        raise RuntimeError("[ERROR] onnxruntime is required for export verification (pip install onnxruntime)") from None
+    return onnxruntime
+
+
+def ort_session(onnx_path: str, threads: int = 1):
+    ort = _ort()
+    options = ort.SessionOptions()
+    options.intra_op_num_threads = threads
+    options.inter_op_num_threads = 1
+    return ort.InferenceSession(onnx_path, options, providers=["CPUExecutionProvider"])
+
+
+def simplify_onnx(onnx_path: str) -> dict:
+    """
+    그래프 단순화 / 상수 폴딩 (제자리) → {"method", "nodes_before", "nodes_after"}
+    - onnxsim 이 있으면 onnxsim, 없으면 ONNX Runtime ORT_ENABLE_BASIC 결과
+      (상수 폴딩 / 중복 노드 제거 등 provider 무관 최적화만 → 표준 ONNX, TensorRT 에서도 사용 가능)
+    """
+    import onnx
+
+    model = onnx.load(onnx_path)
+    before = len(model.graph.node)
+    try:
+        import onnxsim
+    except ImportError:
+        ort = _ort()
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_BASIC
+        tmp_path = f"{onnx_path}.opt"
+        options.optimized_model_filepath = tmp_path
+        ort.InferenceSession(onnx_path, options, providers=["CPUExecutionProvider"])
+        os.replace(tmp_path, onnx_path)
+        model = onnx.load(onnx_path)
+        method = f"onnxruntime-basic {ort.__version__}"
+    else:
+        model, ok = onnxsim.simplify(model)
+        if not ok:
+            raise RuntimeError(f"[ERROR] onnxsim could not validate the simplified graph ({onnx_path})")
+        onnx.save(model, onnx_path)
+        method = f"onnxsim {onnxsim.__version__}"
+
+    onnx.checker.check_model(model)
+    return {"method": method, "nodes_before": before, "nodes_after": len(model.graph.node)}
+
+
+def resolve_checkpoint(path: str, models_dir: str = "models") -> str:
+    """경로 그대로 / models/ 안의 파일 이름 / "latest" (models/ 에서 가장 최근 .pth)"""
+    if path == "latest":
+        candidates = glob.glob(f"{models_dir}/*.pth")
+        if not candidates:
+            raise FileNotFoundError(f"[ERROR] no .pth found in {models_dir}")
+        return max(candidates, key=os.path.getmtime).replace("\\", "/")
+    if not os.path.exists(path) and os.path.exists(f"{models_dir}/{path}"):
+        return f"{models_dir}/{path}"
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"[ERROR] checkpoint not found: {path}")
+    return path
+
+
+def next_bundle_dir(out_dir: str, name: str) -> str:
+    """<out_dir>/<name>/v001, v002, ... 중 다음 번호 (이전 번들은 그대로 유지)"""
+    # 검증 실패 번들(v003_failed)도 번호를 차지
+    versions = [int(os.path.basename(p)[1:4]) for p in glob.glob(f"{out_dir}/{name}/v[0-9][0-9][0-9]*")]
+    return f"{out_dir}/{name}/v{max(versions, default=0) + 1:03d}"
+
+
+# =============================================================================
+# 패리티 / 지연
+# =============================================================================
+@torch.no_grad()
+def check_onnx_parity(model: nn.Module, session, inputs: np.ndarray, dynamic_batch: bool) -> dict:
+    """같은 입력에서 PyTorch vs ONNX Runtime logits (최대 절대 차이 / argmax 일치율)"""
+    ref = model(torch.from_numpy(inputs)).numpy()
+    if dynamic_batch:
+        out = session.run(["output"], {"input": inputs})[0]
+    else:
+        out = np.concatenate([session.run(["output"], {"input": inputs[i:i + 1]})[0]
+                              for i in range(len(inputs))])
+    return {
+        "samples": int(len(inputs)),
+        "logits_max_abs_diff": float(np.abs(out - ref).max()),
+        "argmax_agreement": float((out.argmax(axis=1) == ref.argmax(axis=1)).mean() * 100.0),
+    }
+
+
+def bench_session(session, example: np.ndarray, warmup: int = 20, iters: int = 200):
+    """ONNX Runtime 한 번 실행 지연 (median, p95) ms"""
+    return frame_latency_ms(lambda x: session.run(["output"], {"input": x}), example, warmup, iters)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="export PilotNet to a verified ONNX bundle")
+    parser.add_argument("--checkpoint", required=True,
+                        help=".pth 경로, models/ 안의 파일 이름, 또는 latest")
+    parser.add_argument("--variant", default=None,
+                        help="모델 변형 <width_mult>[+sep] (기본: 가중치 모양에서 추정)")
+    parser.add_argument("--root", default=None, help="dataset 폴더 (패리티 검사 프레임 + 클래스 목록)")
+    parser.add_argument("--csv", default="data_labels_clean", help="CSV 파일 이름 (.csv 제외)")
+    parser.add_argument("--classes", default=None, help="클래스(조향 각도) 목록 예) 30,60,90,120,150")
+    parser.add_argument("--crop-top", type=float, default=0.4)
+    parser.add_argument("--crop-bottom", type=float, default=1.0)
+    parser.add_argument("--dynamic-batch", action="store_true", help="batch 축을 동적으로")
+    parser.add_argument("--fused-preproc", action="store_true",
+                        help="전처리를 그래프 안에 (입력: uint8 BGR 카메라 프레임)")
+    parser.add_argument("--frame-size", default="640x480", help="--fused-preproc 프레임 크기 WxH")
+    parser.add_argument("--opset", type=int, default=11)
+    parser.add_argument("--no-simplify", dest="simplify", action="store_false")
+    parser.add_argument("--parity-frames", type=int, default=256, help="패리티 검사 프레임 수 (test split)")
+    parser.add_argument("--atol", type=float, default=1e-3, help="허용 logits 최대 절대 차이")
+    parser.add_argument("--threads", type=int, default=1, help="ONNX Runtime 스레드 수 (지연 측정)")
+    parser.add_argument("--bench-batch", type=int, default=32, help="동적 batch 일 때 배치 지연 측정 크기")
+    parser.add_argument("--out-dir", default="exports", help="번들 폴더")
+    args = parser.parse_args()
+
+    # -------------------------------------------------------------------------
+    # 1) 체크포인트 → PilotNet
+    # -------------------------------------------------------------------------
+    ckpt_path = resolve_checkpoint(args.checkpoint)
+    state, extras = read_pilotnet_state(ckpt_path)
+    spec = infer_model_spec(state)
+    if args.variant is not None:
+        spec.update({k: v for k, v in parse_model_spec(args.variant).items() if k in ("width_mult", "separable")})
+
+    preproc = RCPreprocessor(out_size=(200, 66), crop_top_ratio=args.crop_top, crop_bottom_ratio=args.crop_bottom)
+    input_shape = (3, preproc.out_h, preproc.out_w)
+    model = PilotNet(num_classes=spec["num_classes"], input_shape=input_shape,
+                     width_mult=spec["width_mult"], separable=spec["separable"])
+    model.load_state_dict(state)
+    model.eval()
+    print(f"[INFO] {ckpt_path} → PilotNet {model.config}")
+
+    test_ds = None
+    if args.root:
+        test_ds = RCDataset(csv_filename=args.csv, root=args.root, preprocessor=preproc,
+                            augmentor=None, split="test", output_dtype="uint8")
+
+    # 클래스 목록: --classes > 체크포인트 > 데이터셋
+    if args.classes:
+        classes = [int(a) for a in args.classes.split(",")]
+    elif "angles" in extras:
+        classes = [int(a) for a in extras["angles"]]
+    elif test_ds is not None:
+        classes = [int(a) for a in test_ds.angles]
+    else:
+        raise ValueError("[ERROR] class list unknown: pass --classes or --root (state_dict has no angles)")
+    if len(classes) != spec["num_classes"]:
+        raise ValueError(f"[ERROR] {len(classes)} classes {classes} but model has {spec['num_classes']} outputs")
+
+    # -------------------------------------------------------------------------
+    # 2) export + 단순화
+    # -------------------------------------------------------------------------
+    name = os.path.splitext(os.path.basename(ckpt_path))[0] + ("_fused" if args.fused_preproc else "")
+    bundle_dir = next_bundle_dir(args.out_dir, name)
+    os.makedirs(bundle_dir)
+    onnx_path = f"{bundle_dir}/model.onnx"
+
+    if args.fused_preproc:
+        width, height = (int(v) for v in args.frame_size.lower().split("x"))
+        export_model = FusedPilotNet(model, preproc, (width, height)).eval()
+        example = torch.zeros(1, height, width, 3, dtype=torch.uint8)
+        input_meta = {"shape": [height, width, 3], "dtype": "uint8", "layout": "NHWC",
+                      "format": "BGR camera frame (preprocessing in graph)"}
+    else:
+        export_model = model
+        example = torch.zeros(1, *input_shape, dtype=torch.float32)
+        input_meta = {"shape": list(input_shape), "dtype": "float32", "layout": "NCHW",
+                      "format": "RGB [0,1] (RCPreprocessor output)"}
+    input_meta["batch"] = "dynamic" if args.dynamic_batch else 1
+
+    export_onnx_model(export_model, onnx_path, example, args.dynamic_batch, args.opset)
+    print(f"[INFO] Saved ONNX → {onnx_path}")
+    simplify = simplify_onnx(onnx_path) if args.simplify else None
+    if simplify:
+        print(f"[INFO] simplified ({simplify['method']}): {simplify['nodes_before']} → {simplify['nodes_after']} nodes")
+
+    # -------------------------------------------------------------------------
+    # 3) 패리티 (실제 데이터셋 프레임, 없으면 무작위 입력)
+    # -------------------------------------------------------------------------
+    session = ort_session(onnx_path, args.threads)
+    rng = np.random.default_rng(0)
+    if test_ds is not None and len(test_ds):
+        n = min(args.parity_frames, len(test_ds))
+        idx = np.linspace(0, len(test_ds) - 1, n).astype(np.int64)
+        source = f"{args.root} ({args.csv}, test split)"
+    else:
+        print("[WARN] no --root → parity checked on random inputs only")
+        idx, source = None, "random"
+
+    if args.fused_preproc:
+        if idx is not None:
+            frames = [cv2.imread(test_ds.sample_info(int(i))[0], cv2.IMREAD_COLOR) for i in idx]
+            frames = [f for f in frames if f is not None and f.shape == (height, width, 3)]
+        else:
+            frames = []
+        if not frames:
+            frames = list(rng.integers(0, 256, (args.parity_frames, height, width, 3), dtype=np.uint8))
+            source = "random"
+        inputs = np.stack(frames)
+        parity = check_parity(model, preproc, frames)
+        parity.pop("ok")
+        parity_ok = parity["pixel_max_diff"] <= 1 and parity["pixel_mismatch"] <= 1e-3
+    else:
+        if idx is not None:
+            inputs = np.stack([test_ds[int(i)][0].numpy() for i in idx])
+        else:
+            inputs = rng.integers(0, 256, (args.parity_frames, *input_shape), dtype=np.uint8)
+        inputs = inputs.astype(np.float32) / np.float32(255.0)
+        parity, parity_ok = {}, True
+
+    onnx_parity = check_onnx_parity(export_model, session, inputs, args.dynamic_batch)
+    parity.update(onnx_parity, source=source, atol=args.atol)
+    parity_ok = parity_ok and onnx_parity["logits_max_abs_diff"] <= args.atol
+    parity["ok"] = bool(parity_ok)
+    print(f"[INFO] parity ({source}): max |diff|={onnx_parity['logits_max_abs_diff']:.2e}, "
+          f"argmax agreement={onnx_parity['argmax_agreement']:.2f}% over {onnx_parity['samples']} frames")
+
+    # -------------------------------------------------------------------------
+    # 4) ONNX Runtime CPU 지연
+    # -------------------------------------------------------------------------
+    one = inputs[:1]
+    median, p95 = bench_session(session, one)
+    latency = {"provider": "CPUExecutionProvider", "threads": args.threads,
+               "batch1_ms_median": median, "batch1_ms_p95": p95}
+    if args.dynamic_batch:
+        batch = np.repeat(inputs[:1], args.bench_batch, axis=0)
+        batch_ms, _ = bench_session(session, batch, warmup=5, iters=30)
+        latency.update(bench_batch=args.bench_batch, batch_ms_per_frame=batch_ms / args.bench_batch)
+    print(f"[INFO] ONNX Runtime CPU (threads={args.threads}): {median:.3f}ms median, {p95:.3f}ms p95 (batch 1)")
+    if args.fused_preproc:
+        # 전처리 포함 vs RCPreprocessor + 전처리 없는 ONNX (카메라 프레임 → logits 전체)
+        end_to_end = compare_latency(model, preproc, frames[0], onnx_path, args.threads)
+        latency["end_to_end"] = end_to_end
+        print(f"[INFO] end-to-end: fused {end_to_end['fused_ms']:.3f}ms vs unfused "
+              f"{end_to_end['unfused_ms']:.3f}ms (preproc {end_to_end['unfused_preproc_ms']:.3f}ms) "
+              f"→ x{end_to_end['speedup']:.2f}")
+
+    # -------------------------------------------------------------------------
+    # 5) 메타데이터
+    # -------------------------------------------------------------------------
+    import onnx
+    ort = _ort()
+    metadata = {
+        "bundle_version": BUNDLE_VERSION,
+        "version": os.path.basename(bundle_dir),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "source": {
+            "checkpoint": ckpt_path,
+            "sha1": file_sha1(ckpt_path),
+            **{k: extras[k] for k in ("epoch", "metrics") if k in extras},
+        },
+        "model": model.config,
+        "classes": classes,
+        "input": {"name": "input", **input_meta},
+        "output": {"name": "output", "shape": [spec["num_classes"]], "format": "logits (argmax → classes)"},
+        "preprocessor": {**preproc.config(), "in_graph": args.fused_preproc},
+        "onnx": {"file": "model.onnx", "opset": args.opset, "simplify": simplify,
+                 "sha1": file_sha1(onnx_path), "size_mb": os.path.getsize(onnx_path) / 1024 ** 2},
+        "parity": parity,
+        "latency": latency,
+        "environment": {"platform": platform.platform(), "torch": torch.__version__,
+                        "onnx": onnx.__version__, "onnxruntime": ort.__version__},
+    }
+    with open(f"{bundle_dir}/metadata.json", "w", encoding="utf-8") as f:
+        json.dump(metadata, f, indent=2)
+    print(f"[INFO] bundle → {bundle_dir}")
 
-    print(f"[INFO] ONNX model saved to: {onnx_path}")
+    if not parity_ok:
+        # 검증에 실패한 번들은 배포 대상에서 빠지도록 이름 변경
+        failed_dir = f"{bundle_dir}_failed"
+        shutil.move(bundle_dir, failed_dir)
+        raise SystemExit(f"[ERROR] parity check failed → {failed_dir}")
 
 
 if __name__ == "__main__":
-    export_onnx()
+    main()
@@ -0,0 +1,209 @@
+# training/instrumentation.py
+# =============================================================================
+# Description : 학습 루프 step 단위 시간 측정 + epoch 별 내보내기 + torch.profiler 구간
+#               - data_wait : DataLoader 에서 배치를 기다린 시간 (host, perf_counter)
+#               - h2d       : host → device 복사
+#               - forward / backward / optimizer
+#
+# 측정 방식:
+#   - CPU  : 구간 경계마다 time.perf_counter() (단조 시계, 연산이 동기식이므로 정확)
+#   - CUDA : 구간 경계마다 torch.cuda.Event 를 기록하고 epoch 끝에서 한 번만 동기화
+#            (time.time() 은 비동기 커널 실행 시간 대신 launch 시간만 잡음)
+#
+# 출력 (run_dir):
+#   - timing_epoch_XX.json : 구간별 합계 / 평균 / p50 / p90 / p99 / max (ms) + step 별 원시값
+#   - timing.csv           : epoch × 구간 요약 (한 파일에 계속 추가)
+#   - trace_steps_A-B.json : profile_steps=(A, B) 일 때 chrome trace (chrome://tracing, Perfetto)
+# =============================================================================
+
+import csv
+import json
+import os
+import time
+
+import numpy as np
+import torch
+
+PHASES = ("data_wait", "h2d", "forward", "backward", "optimizer")
+TIMING_FORMATS = ("json", "csv", "both")
+
+
+class StepTimer:
+    """
+    step 구간 시간 기록기
+
+    사용 순서 (step 마다):
+        timer.step_begin()          # 배치 요청 직전
+        batch = next(it)
+        timer.data_ready()          # data_wait 종료
+        ... h2d ...      ; timer.mark("h2d")
+        ... forward ...  ; timer.mark("forward")
+        ... backward ... ; timer.mark("backward")
+        ... step ...     ; timer.mark("optimizer")
+        timer.step_end()
+    epoch 끝: summary = timer.end_epoch()
+    """
+
+    def __init__(self, device: torch.device, enabled: bool = True):
+        self.enabled = enabled
+        self.use_cuda = device.type == "cuda" and torch.cuda.is_available()
+        self._pending = []
+        self._wait_start = 0.0
+        self._wait = 0.0
+        self._names = []
+        self._marks = []
+        self._epoch_start = time.perf_counter()
+
+    def _now(self):
+        if self.use_cuda:
+            event = torch.cuda.Event(enable_timing=True)
+            event.record()
+            return event
+        return time.perf_counter()
+
+    def begin_epoch(self):
+        self._pending = []
+        self._epoch_start = time.perf_counter()
+
+    def step_begin(self):
+        if self.enabled:
+            self._wait_start = time.perf_counter()
+
+    def data_ready(self):
+        if not self.enabled:
+            return
+        self._wait = time.perf_counter() - self._wait_start
+        self._names = []
+        self._marks = [self._now()]
+
+    def mark(self, phase: str):
+        if not self.enabled:
+            return
+        self._names.append(phase)
+        self._marks.append(self._now())
+
+    def step_end(self):
+        if self.enabled:
+            self._pending.append((self._wait, self._names, self._marks))
+
+    def end_epoch(self) -> dict:
+        """
+        epoch 의 step 기록을 초 단위로 변환 (CUDA 는 여기서 한 번만 동기화)
+        - 반환: {"steps": n, "wall": 초, "phases": {phase: np.ndarray (n,) 초}}
+        """
+        if self.use_cuda and self._pending:
+            torch.cuda.synchronize()
+
+        phases = {p: np.zeros(len(self._pending)) for p in PHASES}
+        for i, (wait, names, marks) in enumerate(self._pending):
+            phases["data_wait"][i] = wait
+            for j, name in enumerate(names):
+                if self.use_cuda:
+                    dt = marks[j].elapsed_time(marks[j + 1]) / 1000.0
+                else:
+                    dt = marks[j + 1] - marks[j]
+                phases.setdefault(name, np.zeros(len(self._pending)))[i] += dt
+
+        result = {
+            "steps": len(self._pending),
+            "wall": time.perf_counter() - self._epoch_start,
+            "phases": phases,
+        }
+        self._pending = []
+        return result
+
+
+def summarize(timing: dict) -> dict:
+    """end_epoch() 결과 → 구간별 {total_s, mean_ms, p50_ms, p90_ms, p99_ms, max_ms}"""
+    summary = {}
+    for phase, values in timing["phases"].items():
+        if len(values) == 0:
+            continue
+        ms = values * 1000.0
+        p50, p90, p99 = np.percentile(ms, [50, 90, 99])
+        summary[phase] = {
+            "total_s": round(float(values.sum()), 6),
+            "mean_ms": round(float(ms.mean()), 4),
+            "p50_ms": round(float(p50), 4),
+            "p90_ms": round(float(p90), 4),
+            "p99_ms": round(float(p99), 4),
+            "max_ms": round(float(ms.max()), 4),
+        }
+    return summary
+
+
+class TimingLogger:
+    """epoch 별 시간 요약을 run_dir 에 JSON / CSV 로 저장"""
+
+    CSV_FIELDS = ("epoch", "phase", "steps", "total_s", "mean_ms",
+                  "p50_ms", "p90_ms", "p99_ms", "max_ms")
+
+    def __init__(self, run_dir: str, fmt: str = "json"):
+        if fmt not in TIMING_FORMATS:
+            raise ValueError(f"[ERROR] timing format must be one of {TIMING_FORMATS}, got '{fmt}'")
+        self.run_dir = run_dir
+        self.fmt = fmt
+        os.makedirs(run_dir, exist_ok=True)
+
+    def write(self, epoch: int, timing: dict) -> dict:
+        summary = summarize(timing)
+
+        if self.fmt in ("json", "both"):
+            with open(f"{self.run_dir}/timing_epoch_{epoch:02d}.json", "w", encoding="utf-8") as f:
+                json.dump({
+                    "epoch": epoch,
+                    "steps": timing["steps"],
+                    "wall_s": timing["wall"],
+                    "summary": summary,
+                    "steps_ms": {p: np.round(v * 1000.0, 4).tolist()
+                                 for p, v in timing["phases"].items()},
+                }, f, indent=2)
+
+        if self.fmt in ("csv", "both"):
+            path = f"{self.run_dir}/timing.csv"
+            new_file = not os.path.exists(path)
+            with open(path, "a", newline="", encoding="utf-8") as f:
+                writer = csv.DictWriter(f, fieldnames=self.CSV_FIELDS)
+                if new_file:
+                    writer.writeheader()
+                for phase, row in summary.items():
+                    writer.writerow({"epoch": epoch, "phase": phase,
+                                     "steps": timing["steps"], **row})
+
+        return summary
+
+
+class ProfilerWindow:
+    """
+    전체 step 번호 [start, end) 구간만 torch.profiler 로 기록 → chrome trace 저장
+    - step(global_step) 을 매 step 시작에 호출, 학습이 끝나면 close()
+    """
+
+    def __init__(self, steps, out_dir: str, device: torch.device):
+        self.start, self.end = (int(s) for s in steps)
+        if self.end <= self.start:
+            raise ValueError(f"[ERROR] profile_steps must be (start, end) with end > start, got {steps}")
+        self.out_dir = out_dir
+        self.activities = [torch.profiler.ProfilerActivity.CPU]
+        if device.type == "cuda":
+            self.activities.append(torch.profiler.ProfilerActivity.CUDA)
+        self._prof = None
+        self.trace_path = None
+
+    def step(self, global_step: int):
+        if global_step == self.start and self._prof is None and self.trace_path is None:
+            self._prof = torch.profiler.profile(
+                activities=self.activities, record_shapes=True, with_stack=False
+            )
+            self._prof.__enter__()
+        elif global_step == self.end:
+            self.close()
+
+    def close(self):
+        if self._prof is None:
+            return
+        self._prof.__exit__(None, None, None)
+        self.trace_path = f"{self.out_dir}/trace_steps_{self.start}-{self.end}.json"
+        self._prof.export_chrome_trace(self.trace_path)
+        self._prof = None
+        print(f"[INFO] profiler trace → {self.trace_path}")
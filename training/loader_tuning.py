@@ -0,0 +1,212 @@
+# training/loader_tuning.py
+# =============================================================================
+# Description : 플랫폼별 DataLoader 설정 + 짧은 자동 튜닝
+#               - Windows : num_workers = 0 (worker 프로세스의 파일 접근 충돌 회피)
+#               - Linux   : worker 여러 개로 디코드 / 증강 / 전처리를 메인 스레드 밖에서 처리
+#               - autotune_loader(): (num_workers, prefetch_factor) 조합마다
+#                 batches/s 를 잠깐 측정해서 가장 빠른 설정을 고른다
+#               - seed_worker(): worker 마다 다른 seed 로 증강 난수 생성기 재설정
+#                 (fork 된 worker 가 같은 난수 상태를 복사해 같은 증강을 반복하는 문제 방지)
+# =============================================================================
+
+import os
+import platform
+import random
+import time
+
+import numpy as np
+import torch
+from torch.utils.data import DataLoader, IterableDataset, RandomSampler, get_worker_info
+
+
+def available_cpus() -> int:
+    """이 프로세스가 쓸 수 있는 CPU 수 (Linux 는 affinity / 컨테이너 제한 반영)"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def platform_loader_config(device: torch.device) -> dict:
+    """
+    플랫폼 기본 DataLoader 설정과 자동 튜닝 후보
+    - worker_candidates / prefetch_candidates 는 autotune_loader() 에서 사용
+    """
+    system = platform.system()
+    cpus = available_cpus()
+    pin_memory = device.type == "cuda"
+
+    if system == "Windows":
+        # 🚨 Windows: worker 프로세스에서 이미지 파일 접근 충돌 → 메인 스레드에서만 로딩
+        return {
+            "num_workers": 0,
+            "prefetch_factor": None,
+            "pin_memory": pin_memory,
+            "worker_candidates": [0],
+            "prefetch_candidates": [2],
+        }
+
+    # Linux / macOS: 메인 프로세스 몫으로 CPU 1개를 남기고 2 배수로 후보 생성
+    max_workers = max(0, min(cpus - 1, 16))
+    candidates = [0] + [w for w in (2, 4, 6, 8, 12, 16) if w <= max_workers]
+    if max_workers and max_workers not in candidates:
+        candidates.append(max_workers)
+
+    default_workers = min(max_workers, 4)
+    return {
+        "num_workers": default_workers,
+        "prefetch_factor": 2 if default_workers > 0 else None,
+        "pin_memory": pin_memory,
+        "worker_candidates": candidates,
+        "prefetch_candidates": [2, 4],
+    }
+
+
+def seed_worker(worker_id: int):
+    """
+    DataLoader worker_init_fn
+    - torch 가 worker 마다 다르게 정해 주는 seed (base_seed + worker_id) 로
+      python random / numpy / augmentor 난수 생성기를 모두 재설정
+    """
+    seed = torch.initial_seed() % 2 ** 32
+    random.seed(seed)
+    np.random.seed(seed)
+
+    info = get_worker_info()
+    augmentor = getattr(info.dataset, "augmentor", None) if info is not None else None
+    if augmentor is not None and hasattr(augmentor, "reseed"):
+        augmentor.reseed(seed)
+
+
+def make_loader(dataset, batch_size: int, shuffle: bool, num_workers: int,
+                prefetch_factor=None, pin_memory: bool = False,
+                persistent_workers: bool = None, seed: int = None, sampler=None,
+                **kwargs) -> DataLoader:
+    """
+    seed_worker / generator 를 붙인 DataLoader 생성 (IterableDataset 은 셔플 안 함)
+    - seed 가 있으면 셔플 순서는 전용 generator 를 가진 RandomSampler 가 정함
+      (loader.sampler.generator 상태를 체크포인트에 저장 → 재개 시 같은 순서)
+    - sampler 를 직접 주면 (DistributedSampler 등) 그대로 사용하고 shuffle 은 무시
+    """
+    if isinstance(dataset, IterableDataset):
+        shuffle = False
+    if persistent_workers is None:
+        persistent_workers = num_workers > 0
+
+    if sampler is not None:
+        shuffle = False
+
+    generator = None
+    if seed is not None:
+        # worker base seed 용 (epoch 마다 / loader 생성마다 값을 뽑음)
+        generator = torch.Generator()
+        generator.manual_seed(seed + 1)
+        if shuffle and sampler is None:
+            sampler_generator = torch.Generator()
+            sampler_generator.manual_seed(seed)
+            sampler = RandomSampler(dataset, generator=sampler_generator)
+            shuffle = False
+
+    return DataLoader(
+        dataset,
+        batch_size=batch_size,
+        shuffle=shuffle,
+        sampler=sampler,
+        num_workers=num_workers,
+        pin_memory=pin_memory,
+        persistent_workers=persistent_workers and num_workers > 0,
+        prefetch_factor=(prefetch_factor or 2) if num_workers > 0 else None,
+        worker_init_fn=seed_worker,
+        generator=generator,
+        **kwargs
+    )
+
+
+def measure_throughput(loader, warmup_batches: int, measure_batches: int,
+                       time_limit: float = None):
+    """
+    loader 에서 warmup_batches 만큼 버린 뒤 measure_batches 개의 batches/s 측정
+    - worker 시작 / 첫 prefetch 로 채워진 큐는 warmup 에서 소비 → 정상 상태 처리량
+    - time_limit(초) 를 넘기면 그때까지 측정한 값으로 끝냄
+    """
+    it = iter(loader)
+    measured = 0
+    t0 = None
+    try:
+        for _ in range(warmup_batches):
+            next(it)
+        t0 = time.perf_counter()
+        for _ in range(measure_batches):
+            next(it)
+            measured += 1
+            if time_limit is not None and time.perf_counter() - t0 > time_limit:
+                break
+    except StopIteration:
+        pass
+    finally:
+        del it  # worker 종료
+
+    if t0 is None or measured == 0:
+        return 0.0, 0
+    return measured / (time.perf_counter() - t0), measured
+
+
+def autotune_loader(dataset, batch_size: int, device: torch.device,
+                    worker_candidates=None, prefetch_candidates=None,
+                    measure_batches: int = 20, time_limit: float = 15.0,
+                    tolerance: float = 0.05, seed: int = None) -> dict:
+    """
+    (num_workers, prefetch_factor) 조합별 batches/s 를 측정해서 최적 설정 반환
+    - 기본 후보는 platform_loader_config() 값
+    - 최고 처리량의 (1 - tolerance) 이내면 worker 가 적은 설정을 선택
+      (프로세스 / 메모리 사용량을 줄이기 위해)
+    - 반환: {"num_workers", "prefetch_factor", "pin_memory", "batches_per_sec", "results": [...]}
+    """
+    base = platform_loader_config(device)
+    worker_candidates = worker_candidates or base["worker_candidates"]
+    prefetch_candidates = prefetch_candidates or base["prefetch_candidates"]
+
+    results = []
+    print(f"[LoaderTune] candidates workers={worker_candidates} "
+          f"prefetch={prefetch_candidates} (cpus={available_cpus()})")
+
+    for num_workers in worker_candidates:
+        for prefetch in (prefetch_candidates if num_workers > 0 else [None]):
+            loader = make_loader(
+                dataset, batch_size, shuffle=True,
+                num_workers=num_workers, prefetch_factor=prefetch,
+                pin_memory=base["pin_memory"], persistent_workers=False, seed=seed,
+            )
+            warmup = 1 + num_workers * (prefetch or 0)
+            try:
+                # 작은 데이터셋: warmup 이 epoch 를 다 쓰지 않도록 제한
+                warmup = min(warmup, max(1, len(loader) - measure_batches))
+            except TypeError:
+                pass
+            bps, measured = measure_throughput(loader, warmup, measure_batches, time_limit)
+            results.append({
+                "num_workers": num_workers,
+                "prefetch_factor": prefetch,
+                "batches_per_sec": bps,
+                "samples_per_sec": bps * batch_size,
+                "measured_batches": measured,
+            })
+            print(f"    workers={num_workers:>2} prefetch={str(prefetch):>4} "
+                  f"→ {bps:7.2f} batches/s ({bps * batch_size:8.1f} samples/s, n={measured})")
+
+    best_bps = max(r["batches_per_sec"] for r in results)
+    chosen = min(
+        (r for r in results if r["batches_per_sec"] >= best_bps * (1.0 - tolerance)),
+        key=lambda r: (r["num_workers"], r["prefetch_factor"] or 0),
+    )
+
+    print(f"[LoaderTune] chosen workers={chosen['num_workers']} "
+          f"prefetch={chosen['prefetch_factor']} ({chosen['batches_per_sec']:.2f} batches/s)")
+
+    return {
+        "num_workers": chosen["num_workers"],
+        "prefetch_factor": chosen["prefetch_factor"],
+        "pin_memory": base["pin_memory"],
+        "batches_per_sec": chosen["batches_per_sec"],
+        "results": results,
+    }
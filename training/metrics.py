@@ -0,0 +1,58 @@
+# training/metrics.py
+# =============================================================================
+# Description : 학습 / 평가 루프용 지표 누적 (device 동기화 없이)
+#               - 배치마다 loss.item() / .sum().item() 을 부르면 그때마다 CPU 가
+#                 GPU 작업이 끝날 때까지 기다림 → 전송 / forward / backward 가 겹치지 못함
+#               - loss 합, 정답 수는 device 텐서로 더해 두고 compute() 에서 한 번만 읽음
+#               - 샘플 수는 배치 shape 에서 바로 알 수 있으므로 Python int 로 누적 (동기화 없음)
+#               - distributed=True: compute() 에서 모든 rank 의 합계를 all_reduce
+# =============================================================================
+
+import torch
+import torch.distributed as dist
+
+
+class ClassificationMeter:
+    """
+    분류 loss / 정확도 누적기 (train / eval 공용)
+    - update(loss, outputs, labels): loss 는 배치 평균 (CrossEntropyLoss 기본값)
+    - compute(): {"loss": 샘플 평균 loss, "acc": 정확도(%), "total": 샘플 수} — 여기서만 동기화
+    """
+
+    def __init__(self, device: torch.device, distributed: bool = False):
+        self.device = torch.device(device)
+        self.distributed = distributed
+        # MPS 는 float64 미지원
+        self._dtype = torch.float32 if self.device.type == "mps" else torch.float64
+        self.reset()
+
+    def reset(self):
+        self.loss_sum = torch.zeros((), dtype=self._dtype, device=self.device)
+        self.correct = torch.zeros((), dtype=torch.int64, device=self.device)
+        self.total = 0
+
+    @torch.no_grad()
+    def update(self, loss: torch.Tensor, outputs: torch.Tensor, labels: torch.Tensor):
+        n = labels.size(0)
+        self.loss_sum += loss.detach().to(self._dtype) * n
+        self.correct += (outputs.argmax(dim=1) == labels).sum()
+        self.total += n
+
+    def compute(self) -> dict:
+        sums = torch.stack([
+            self.loss_sum,
+            self.correct.to(self._dtype),
+            torch.tensor(self.total, dtype=self._dtype, device=self.device),
+        ])
+        if self.distributed:
+            # 모든 rank 가 같은 시점에 호출해야 함
+            dist.all_reduce(sums)
+        loss_sum, correct, total = sums.tolist()
+        total = int(total)
+        if total == 0:
+            return {"loss": float("nan"), "acc": float("nan"), "total": 0}
+        return {
+            "loss": loss_sum / total,
+            "acc": correct / total * 100.0,
+            "total": total,
+        }
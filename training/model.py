@@ -1,25 +1,88 @@
 # training/model_pilotnet.py
 
+import os
+import pickle
+
 import torch
 import torch.nn as nn
 
+from training.checkpoint import load_checkpoint
+
+
+class InputNorm(nn.Module):
+    """
+    모델 입력 정규화 (device 에서 수행)
+    - uint8 입력 : float32 변환 후 /255 → [0,1] (RCPreprocessor.normalize 와 같은 값)
+    - float 입력 : 이미 [0,1] 로 정규화된 것으로 보고 그대로 통과 (기존 float32 파이프라인 / ONNX)
+    - mean / std : 채널별 정규화가 필요해지면 지정 (state_dict 에는 저장하지 않음)
+    """
+    def __init__(self, mean=None, std=None):
+        super().__init__()
+        if mean is None:
+            self.mean = None
+            self.std = None
+        else:
+            self.register_buffer("mean", torch.tensor(mean, dtype=torch.float32).view(1, -1, 1, 1),
+                                 persistent=False)
+            self.register_buffer("std", torch.tensor(std, dtype=torch.float32).view(1, -1, 1, 1),
+                                 persistent=False)
+
+    def forward(self, x):
+        if x.dtype == torch.uint8:
+            x = x.float().div_(255.0)
+        if self.mean is not None:
+            x = (x - self.mean) / self.std
+        return x
+
+
+def _scaled(channels: int, width_mult: float) -> int:
+    return max(4, int(round(channels * width_mult)))
+
+
+def _conv_block(in_ch: int, out_ch: int, kernel_size: int, stride: int, separable: bool):
+    """
+    Conv + ReLU (separable=True: depthwise k x k + ReLU + pointwise 1x1 + ReLU)
+    - 모든 conv 바로 뒤에 ReLU → int8 양자화 시 Conv+ReLU fusion 그대로 적용 (training/quantize.py)
+    """
+    if not separable:
+        return [nn.Conv2d(in_ch, out_ch, kernel_size=kernel_size, stride=stride), nn.ReLU()]
+    return [
+        nn.Conv2d(in_ch, in_ch, kernel_size=kernel_size, stride=stride, groups=in_ch), nn.ReLU(),
+        nn.Conv2d(in_ch, out_ch, kernel_size=1), nn.ReLU(),
+    ]
+
 
 class PilotNet(nn.Module):
     """
     자율주행 RC카용 소형 CNN (PilotNet 기반)
-    - 입력 : (B, 3, H, W)
+    - 입력 : (B, 3, H, W) float32 [0,1] 또는 uint8 [0,255] (InputNorm 이 device 에서 정규화)
     - 출력 : (B, num_classes)  (각도 분류용)
+    - width_mult: conv 채널(24/36/48/64/64) / FC 크기(100/50) 배율 (최소 4)
+    - separable : 첫 conv 를 제외한 conv 를 depthwise-separable 로 (연산량 / 파라미터 감소)
+    기본값(width_mult=1.0, separable=False)은 기존 구조 / state_dict 키와 동일
     """
-    def __init__(self, num_classes: int = 5, input_shape=(3, 66, 200)):
+    def __init__(self, num_classes: int = 5, input_shape=(3, 66, 200),
+                 width_mult: float = 1.0, separable: bool = False):
         super().__init__()
+        self.config = {
+            "num_classes": num_classes,
+            "input_shape": list(input_shape),
+            "width_mult": width_mult,
+            "separable": separable,
+        }
 
-        self.features = nn.Sequential(
-            nn.Conv2d(3, 24, kernel_size=5, stride=2), nn.ReLU(),
-            nn.Conv2d(24, 36, kernel_size=5, stride=2), nn.ReLU(),
-            nn.Conv2d(36, 48, kernel_size=5, stride=2), nn.ReLU(),
-            nn.Conv2d(48, 64, kernel_size=3, stride=1), nn.ReLU(),
-            nn.Conv2d(64, 64, kernel_size=3, stride=1), nn.ReLU(),
-        )
+        self.input_norm = InputNorm()
+
+        # (출력 채널, kernel, stride)
+        convs = [(24, 5, 2), (36, 5, 2), (48, 5, 2), (64, 3, 1), (64, 3, 1)]
+        layers = []
+        in_ch = input_shape[0]
+        for i, (ch, k, s) in enumerate(convs):
+            out_ch = _scaled(ch, width_mult)
+            # 입력 채널이 3 인 첫 conv 는 separable 로 바꿔도 이득이 거의 없음
+            layers += _conv_block(in_ch, out_ch, k, s, separable and i > 0)
+            in_ch = out_ch
+        self.features = nn.Sequential(*layers)
 
         # input_shape을 기반으로 Flatten 후 차원 자동 계산
         with torch.no_grad():
@@ -27,16 +90,90 @@ class PilotNet(nn.Module):
             feat = self.features(dummy)
             self.flatten_dim = feat.view(1, -1).size(1)
 
+        fc1, fc2 = _scaled(100, width_mult), _scaled(50, width_mult)
         self.classifier = nn.Sequential(
             nn.Flatten(),
-            nn.Linear(self.flatten_dim, 100),
+            nn.Linear(self.flatten_dim, fc1),
             nn.ReLU(),
-            nn.Linear(100, 50),
+            nn.Linear(fc1, fc2),
             nn.ReLU(),
-            nn.Linear(50, num_classes),
+            nn.Linear(fc2, num_classes),
         )
 
     def forward(self, x):
+        x = self.input_norm(x)
         x = self.features(x)
         x = self.classifier(x)
         return x
+
+
+def parse_model_spec(spec: str) -> dict:
+    """
+    PilotNet 변형 표기 → 생성 인자 (+ 가중치 경로)
+    "<width_mult>[+sep][=<.pth>]"  예) "0.5+sep", "2.0=models/teacher.pth"
+    → {"name", "width_mult", "separable", "weights"}
+    """
+    name, _, weights = spec.partition("=")
+    parts = name.split("+")
+    unknown = set(parts[1:]) - {"sep"}
+    if unknown:
+        raise ValueError(f"[ERROR] unknown variant parts {sorted(unknown)} in '{spec}'")
+    try:
+        width_mult = float(parts[0])
+    except ValueError:
+        raise ValueError(f"[ERROR] variant must start with width_mult, got '{spec}'") from None
+    if weights:
+        name = f"{name}={os.path.splitext(os.path.basename(weights))[0]}"
+    return {"name": name, "width_mult": width_mult, "separable": "sep" in parts,
+            "weights": weights or None}
+
+
+def read_pilotnet_state(path: str):
+    """
+    학습 결과 .pth (state_dict) 또는 학습 체크포인트(.pth, "model" 키) → (state_dict, 부가 정보)
+    - 부가 정보: 체크포인트의 epoch / angles / metrics (state_dict 만 저장된 파일이면 빈 dict)
+    """
+    try:
+        return torch.load(path, map_location="cpu"), {}
+    except pickle.UnpicklingError:
+        # 학습 체크포인트 (난수 상태 등 텐서 외 객체 포함)
+        ckpt = load_checkpoint(path)
+        return ckpt["model"], {k: ckpt[k] for k in ("epoch", "angles", "metrics") if k in ckpt}
+
+
+def infer_model_spec(state: dict) -> dict:
+    """
+    state_dict 의 가중치 모양 → {"width_mult", "separable", "num_classes"}
+    - separable: 두 번째 conv 가 depthwise (입력 채널 1)
+    - width_mult: conv / FC 크기가 모두 같은 값이 되는 가장 작은 배율 (같은 모양이면 같은 모델)
+    """
+    separable = state["features.2.weight"].shape[1] == 1
+    convs = [w for k, w in state.items() if k.startswith("features.") and k.endswith(".weight")]
+    # depthwise conv 는 출력 채널이 입력과 같으므로 비교 대상에서 제외
+    channels = [int(w.shape[0]) for i, w in enumerate(convs) if i == 0 or w.shape[1] != 1]
+    sizes = channels + [int(state["classifier.1.weight"].shape[0]), int(state["classifier.3.weight"].shape[0])]
+    bases = [24, 36, 48, 64, 64, 100, 50]
+    if len(sizes) != len(bases):
+        raise ValueError(f"[ERROR] state_dict is not a PilotNet ({len(sizes)} conv/fc layers)")
+
+    candidates = sorted({round(c / b, r) for c, b in zip(sizes, bases) for r in (2, 3, 4)})
+    for width_mult in candidates:
+        if [_scaled(b, width_mult) for b in bases] == sizes:
+            return {"width_mult": width_mult, "separable": bool(separable),
+                    "num_classes": int(state["classifier.5.weight"].shape[0])}
+    raise ValueError(f"[ERROR] cannot infer width_mult from layer sizes {sizes}")
+
+
+def load_pilotnet(path: str, input_shape=(3, 66, 200), width_mult: float = None,
+                  separable: bool = None) -> PilotNet:
+    """
+    .pth (state_dict 또는 학습 체크포인트) → PilotNet (eval, CPU)
+    - width_mult / separable 이 None 이면 가중치 모양에서 추정 (infer_model_spec)
+    """
+    state, _ = read_pilotnet_state(path)
+    spec = infer_model_spec(state)
+    model = PilotNet(num_classes=spec["num_classes"], input_shape=input_shape,
+                     width_mult=spec["width_mult"] if width_mult is None else width_mult,
+                     separable=spec["separable"] if separable is None else separable)
+    model.load_state_dict(state)
+    return model.eval()
@@ -0,0 +1,289 @@
+# training/preproc_graph.py
+# =============================================================================
+# Description : RCPreprocessor 를 모델 그래프 안으로 옮긴 ONNX export (전처리 포함 모델)
+#               - 입력: 카메라 원본 프레임 BGR uint8 (N, H, W, 3) (cap.read() 결과 그대로)
+#               - 그래프 안에서: 세로 크롭 → INTER_AREA 리사이즈 → BGR->RGB → HWC->CHW → [0,1]
+#               - 추론 루프의 NumPy 전처리(여러 번의 전체 프레임 패스 + 버퍼) 제거,
+#                 학습 / 추론 전처리가 서로 달라질 수 없음 (같은 RCPreprocessor 설정에서 생성)
+#
+# INTER_AREA 리사이즈 = 분리 가능한 면적 가중치 행렬 곱:  out = Wy @ crop @ Wx^T
+#   - Wy (out_h, crop_h), Wx (out_w, W): 출력 픽셀이 덮는 원본 픽셀 구간의 겹친 길이 / 배율
+#   - 배율이 유리수라 가중치가 주기적 → Wy / Wx 는 같은 작은 블록의 block-diagonal
+#     (288 → 66 = 48 → 11 블록 x 6, 640 → 200 = 16 → 5 블록 x 40)
+#     → 블록 단위 행렬 곱으로 계산 (전체 행렬 곱과 같은 가중치, 연산량 약 1/8: 61M → 8M MAC)
+#   - 가로 방향은 kron(블록, I3) 으로 HWC 그대로 한 번의 GEMM (큰 텐서 transpose 없음)
+#   - 결과를 반올림해 uint8 단계(학습 캐시 / RCPreprocessor.to_uint8)와 같은 값으로 맞춘 뒤 /255
+#   - OpenCV 의 고정소수점 / 누적 순서 차이로 드물게(< 0.1%) 1 LSB 차이 → 패리티 검사 허용 오차
+#
+# 지연 (640x480, ONNX Runtime CPU 1 스레드): 전처리 그래프 약 0.8ms vs RCPreprocessor.batch 약 1.3ms
+#   → check_parity() 가 전처리 포함 / 분리 경로의 전체(전처리 + 모델) 지연을 함께 측정해 보고
+#
+# 프레임 크기(W, H)는 export 시 고정 (크롭 행 / 가중치 행렬이 해상도에 따라 달라짐)
+#
+# 실행 예시 (저장소 루트에서): 전처리 포함 ONNX 생성 + 데이터셋 프레임으로 패리티 검사
+#   python -m training.preproc_graph --checkpoint models/pilotnet_steering_20251205_193224.pth \
+#       --root C:/Users/YJU/Desktop/dataset --frame-size 640x480
+# =============================================================================
+
+import argparse
+import glob
+import json
+import math
+import os
+
+import cv2
+import numpy as np
+import torch
+import torch.nn as nn
+
+from preprocessor.RCPreprocessor import RCPreprocessor
+from training.model import load_pilotnet, parse_model_spec
+from training.quantize import frame_latency_ms
+
+
+def area_weights(src: int, dst: int) -> np.ndarray:
+    """
+    길이 src → dst INTER_AREA 축소 가중치 (dst, src) float32, 각 행의 합 = 1
+    - 출력 d 는 원본 구간 [d * s, (d + 1) * s) (s = src / dst) 의 면적 평균
+    """
+    if dst > src:
+        raise ValueError(f"[ERROR] area resize only supports downscaling, got {src} → {dst}")
+    scale = src / dst
+    weights = np.zeros((dst, src), dtype=np.float64)
+    for d in range(dst):
+        lo, hi = d * scale, (d + 1) * scale
+        for s in range(int(np.floor(lo)), min(src, int(np.ceil(hi)))):
+            weights[d, s] = max(0.0, min(hi, s + 1) - max(lo, s))
+        weights[d] /= weights[d].sum()
+    return weights.astype(np.float32)
+
+
+def area_blocks(src: int, dst: int):
+    """
+    area_weights(src, dst) = blockdiag(block x groups) 로 분해 → (groups, block (dst/groups, src/groups))
+    - groups = gcd(src, dst) (출력 구간 경계가 원본 픽셀 경계와 다시 맞는 주기)
+    - 주기가 없으면 (groups=1) 전체 행렬 그대로
+    """
+    weights = area_weights(src, dst)
+    groups = math.gcd(src, dst)
+    block = weights[:dst // groups, :src // groups]
+    if not np.allclose(np.kron(np.eye(groups, dtype=np.float32), block), weights, atol=1e-6):
+        return 1, weights
+    return groups, block.copy()
+
+
+class PreprocGraph(nn.Module):
+    """
+    RCPreprocessor 와 같은 전처리를 torch 연산으로 (ONNX export 용)
+    - 입력: BGR uint8 (N, H, W, 3), 출력: RGB float32 (N, 3, out_h, out_w) [0,1]
+    - round_uint8=True: 리사이즈 결과를 반올림 (학습 때 uint8 캐시를 거친 값과 동일)
+    """
+
+    def __init__(self, preproc: RCPreprocessor, frame_size, round_uint8: bool = True):
+        super().__init__()
+        width, height = frame_size
+        self.frame_size = (int(width), int(height))
+        self.y1 = int(height * preproc.crop_top_ratio)
+        self.y2 = int(height * preproc.crop_bottom_ratio)
+        crop_h = self.y2 - self.y1
+        self.out_w, self.out_h = preproc.out_w, preproc.out_h
+        self.round_uint8 = round_uint8
+
+        # 세로: (N, groups_y, block_h, W*3) 에 (out_h/groups_y, block_h) 블록 곱
+        self.groups_y, wy = area_blocks(crop_h, self.out_h)
+        self.block_h = wy.shape[1]
+        # 가로: (N, out_h, groups_x, block_w*3) @ kron(블록, I3)^T → 채널(3) 이 섞이지 않게
+        self.groups_x, wx = area_blocks(width, self.out_w)
+        self.block_w = wx.shape[1]
+        self.register_buffer("wy", torch.from_numpy(wy))
+        self.register_buffer("wx_t", torch.from_numpy(np.kron(wx, np.eye(3, dtype=np.float32)).T.copy()))
+        self.register_buffer("rgb", torch.tensor([2, 1, 0]), persistent=False)
+
+    def forward(self, frame):
+        width = self.frame_size[0]
+        x = frame[:, self.y1:self.y2].float()                                    # 크롭 (N, crop_h, W, 3)
+        x = x.reshape(-1, self.groups_y, self.block_h, width * 3)
+        x = torch.matmul(self.wy, x)                                             # 세로 리사이즈
+        x = x.reshape(-1, self.out_h, self.groups_x, self.block_w * 3)
+        x = torch.matmul(x, self.wx_t)                                           # 가로 리사이즈
+        x = x.reshape(-1, self.out_h, self.out_w, 3)
+        if self.round_uint8:
+            x = torch.round(x)
+        x = x.permute(0, 3, 1, 2)                                                # HWC → CHW
+        x = torch.index_select(x, 1, self.rgb)                                   # BGR → RGB
+        return x / 255.0
+
+
+class FusedPilotNet(nn.Module):
+    """원본 카메라 프레임 (N, H, W, 3) uint8 → logits (PreprocGraph + PilotNet)"""
+
+    def __init__(self, model: nn.Module, preproc: RCPreprocessor, frame_size):
+        super().__init__()
+        self.preproc = PreprocGraph(preproc, frame_size)
+        self.model = model
+
+    def forward(self, frame):
+        return self.model(self.preproc(frame))
+
+
+def export_fused_onnx(model: nn.Module, preproc: RCPreprocessor, frame_size, onnx_path: str,
+                      opset_version: int = 11) -> str:
+    """PilotNet + 전처리 → ONNX (입력 "input": uint8 (1, H, W, 3) BGR, 출력 "output": logits)"""
+    from training.export_onnx import export_onnx_model
+
+    width, height = frame_size
+    fused = FusedPilotNet(model, preproc, frame_size).cpu().eval()
+    dummy_input = torch.zeros(1, height, width, 3, dtype=torch.uint8)
+    export_onnx_model(fused, onnx_path, dummy_input, opset_version=opset_version)
+    print(f"[INFO] Saved fused-preprocessing ONNX → {onnx_path} (input uint8 1x{height}x{width}x3 BGR)")
+    return onnx_path
+
+
+# =============================================================================
+# 패리티 검사: Python RCPreprocessor 경로 vs 그래프 안 전처리
+# =============================================================================
+@torch.no_grad()
+def check_parity(model: nn.Module, preproc: RCPreprocessor, frames, onnx_path: str = None,
+                 max_pixel_diff: int = 1, max_pixel_mismatch: float = 1e-3, threads: int = 1) -> dict:
+    """
+    frames: BGR uint8 (H, W, 3) 리스트 (모두 같은 크기)
+    - 전처리: 그래프 결과 * 255 vs RCPreprocessor.to_uint8 (uint8 단위 최대 차이 / 불일치 비율)
+    - logits: 전처리 포함 모델(torch, ONNX Runtime) vs model(preproc.batch(frames)) (최대 차이 / argmax 일치율)
+    - onnx_path 가 있으면 report["latency"]: 프레임 1장 전체 지연 (ONNX Runtime CPU, threads)
+      전처리 포함 ONNX vs RCPreprocessor.batch + 전처리 없는 ONNX
+    - 기준을 넘으면 report["ok"] = False
+    """
+    model = model.cpu().eval()
+    latency = None
+    height, width = frames[0].shape[:2]
+    fused = FusedPilotNet(model, preproc, (width, height)).eval()
+    stack = np.stack(frames)
+
+    ref_u8 = np.stack([preproc.to_uint8(f) for f in frames]).astype(np.int16)
+    graph_u8 = (fused.preproc(torch.from_numpy(stack)) * 255.0).round().to(torch.int16).numpy()
+    pixel_diff = np.abs(graph_u8 - ref_u8)
+
+    ref_logits = model(torch.from_numpy(preproc.batch(frames)))
+    ref_pred = ref_logits.argmax(dim=1)
+    outputs = {"torch": fused(torch.from_numpy(stack))}
+
+    if onnx_path is not None:
+        try:
+            import onnxruntime as ort
+        except ImportError:
+            print("[WARN] onnxruntime not installed → ONNX parity check skipped")
+        else:
+            session = ort.InferenceSession(onnx_path, providers=["CPUExecutionProvider"])
+            # export 는 batch 1 고정 → 프레임별 실행
+            outputs["onnx"] = torch.from_numpy(np.concatenate(
+                [session.run(["output"], {"input": stack[i:i + 1]})[0] for i in range(len(frames))]))
+            latency = compare_latency(model, preproc, frames[0], onnx_path, threads)
+
+    report = {
+        "frames": len(frames),
+        "frame_size": [width, height],
+        "pixel_max_diff": int(pixel_diff.max()),
+        "pixel_mismatch": float((pixel_diff > 0).mean()),
+    }
+    ok = report["pixel_max_diff"] <= max_pixel_diff and report["pixel_mismatch"] <= max_pixel_mismatch
+    for name, logits in outputs.items():
+        report[f"{name}_logits_max_diff"] = float((logits - ref_logits).abs().max())
+        report[f"{name}_argmax_agreement"] = float((logits.argmax(dim=1) == ref_pred).float().mean() * 100.0)
+    if latency is not None:
+        report["latency"] = latency
+    report["ok"] = bool(ok)
+    return report
+
+
+def compare_latency(model: nn.Module, preproc: RCPreprocessor, frame: np.ndarray, fused_onnx: str,
+                    threads: int = 1) -> dict:
+    """
+    프레임 1장 전체 지연 (median ms, ONNX Runtime CPU execution provider)
+    - fused  : 전처리 포함 ONNX 에 카메라 프레임 그대로
+    - unfused: RCPreprocessor.batch (NumPy / OpenCV) + 전처리 없는 ONNX (기존 추론 루프)
+    """
+    import tempfile
+
+    import onnxruntime as ort
+    from training.export_onnx import export_onnx_model
+
+    options = ort.SessionOptions()
+    options.intra_op_num_threads = threads
+    options.inter_op_num_threads = 1
+    fused = ort.InferenceSession(fused_onnx, options, providers=["CPUExecutionProvider"])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        plain_path = export_onnx_model(model, f"{tmp}/plain.onnx",
+                                       torch.zeros(1, 3, preproc.out_h, preproc.out_w))
+        plain = ort.InferenceSession(plain_path, options, providers=["CPUExecutionProvider"])
+
+    buf = np.empty((1, 3, preproc.out_h, preproc.out_w), dtype=np.float32)
+    raw = np.ascontiguousarray(frame[None])
+    fused_ms, _ = frame_latency_ms(lambda x: fused.run(["output"], {"input": x}), raw)
+    preproc_ms, _ = frame_latency_ms(lambda f: preproc.batch([f], out=buf), frame)
+    model_ms, _ = frame_latency_ms(lambda x: plain.run(["output"], {"input": x}), buf)
+    unfused_ms, _ = frame_latency_ms(
+        lambda f: plain.run(["output"], {"input": preproc.batch([f], out=buf)}), frame)
+    return {
+        "provider": "CPUExecutionProvider",
+        "threads": threads,
+        "fused_ms": fused_ms,
+        "unfused_ms": unfused_ms,
+        "unfused_preproc_ms": preproc_ms,
+        "unfused_model_ms": model_ms,
+        "speedup": unfused_ms / fused_ms,
+    }
+
+
+def load_frames(root: str, frame_size, limit: int):
+    """root 폴더의 이미지 중 frame_size (W, H) 인 것 최대 limit 장 (BGR uint8)"""
+    paths = sorted(p for ext in ("png", "jpg", "jpeg") for p in glob.glob(f"{root}/*.{ext}"))
+    frames = []
+    for path in paths:
+        img = cv2.imread(path, cv2.IMREAD_COLOR)
+        if img is not None and (img.shape[1], img.shape[0]) == tuple(frame_size):
+            frames.append(img)
+            if len(frames) >= limit:
+                break
+    return frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description="export PilotNet ONNX with preprocessing in the graph")
+    parser.add_argument("--checkpoint", required=True, help="PilotNet .pth (state_dict 또는 체크포인트)")
+    parser.add_argument("--variant", default=None, help="모델 변형 <width_mult>[+sep] (기본: 가중치 모양에서 추정)")
+    parser.add_argument("--frame-size", default="640x480", help="카메라 프레임 크기 WxH")
+    parser.add_argument("--crop-top", type=float, default=0.4)
+    parser.add_argument("--crop-bottom", type=float, default=1.0)
+    parser.add_argument("--root", default=None, help="패리티 검사용 이미지 폴더 (없으면 무작위 프레임)")
+    parser.add_argument("--frames", type=int, default=64, help="패리티 검사 프레임 수")
+    parser.add_argument("--threads", type=int, default=1, help="지연 비교 ONNX Runtime 스레드 수")
+    parser.add_argument("--out", default=None, help="ONNX 경로 (기본: <checkpoint>_fused.onnx)")
+    args = parser.parse_args()
+
+    frame_size = tuple(int(v) for v in args.frame_size.lower().split("x"))
+    preproc = RCPreprocessor(out_size=(200, 66), crop_top_ratio=args.crop_top, crop_bottom_ratio=args.crop_bottom)
+    spec = parse_model_spec(args.variant) if args.variant else {"width_mult": None, "separable": None}
+    model = load_pilotnet(args.checkpoint, (3, preproc.out_h, preproc.out_w), spec["width_mult"], spec["separable"])
+
+    onnx_path = args.out or f"{os.path.splitext(args.checkpoint)[0]}_fused.onnx"
+    export_fused_onnx(model, preproc, frame_size, onnx_path)
+
+    frames = load_frames(args.root, frame_size, args.frames) if args.root else []
+    if not frames:
+        if args.root:
+            print(f"[WARN] no {args.frame_size} images in {args.root} → random frames")
+        rng = np.random.default_rng(0)
+        frames = list(rng.integers(0, 256, (args.frames, frame_size[1], frame_size[0], 3), dtype=np.uint8))
+
+    report = check_parity(model, preproc, frames, onnx_path, threads=args.threads)
+    print(json.dumps(report, indent=2))
+    with open(os.path.splitext(onnx_path)[0] + "_parity.json", "w", encoding="utf-8") as f:
+        json.dump({"onnx_path": onnx_path, "preprocessor": preproc.config(), **report}, f, indent=2)
+    if not report["ok"]:
+        raise SystemExit("[ERROR] preprocessing parity check failed")
+    print("[INFO] preprocessing parity OK")
+
+
+if __name__ == "__main__":
+    main()
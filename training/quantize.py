@@ -0,0 +1,241 @@
+# training/quantize.py
+# =============================================================================
+# Description : PilotNet int8 post-training static quantization (CPU 추론용)
+#               - Conv+ReLU / Linear+ReLU 모듈 fusion
+#               - RCDataset test split 에서 뽑은 샘플(--calib-samples)로 activation 범위 calibration
+#               - 양자화 모델을 TorchScript(.pt)로 저장 → CPU 에서 torch.jit.load 로 바로 사용
+#               - fp32 vs int8 비교 보고: test 정확도 / 예측 일치율 / 프레임당 CPU 지연 / 모델 크기
+#
+# 입력: uint8 (B, 3, 66, 200) 또는 float32 [0,1] (InputNorm 이 float 변환 후 QuantStub 으로 양자화)
+# backend: x86 (Intel/AMD, fbgemm 계열) / qnnpack (ARM: Jetson, Raspberry Pi)
+#          → 추론 시 torch.backends.quantized.engine 을 같은 값으로 설정
+#
+# 실행 예시 (저장소 루트에서):
+#   python -m training.quantize --checkpoint models/pilotnet_steering_20251205_193224.pth \
+#       --root C:/Users/YJU/Desktop/dataset --calib-samples 512 --threads 1
+# =============================================================================
+
+import argparse
+import copy
+import io
+import json
+import os
+import platform
+import time
+
+import numpy as np
+import torch
+import torch.nn as nn
+from torch.ao.quantization import DeQuantStub, QuantStub, convert, fuse_modules, get_default_qconfig, prepare
+from torch.utils.data import DataLoader, Subset
+
+from preprocessor.RCPreprocessor import RCPreprocessor
+from training.RCDataset import RCDataset
+from training.model import PilotNet, load_pilotnet
+
+
+def default_backend() -> str:
+    machine = platform.machine().lower()
+    return "qnnpack" if machine.startswith(("arm", "aarch64")) else "x86"
+
+
+def _fusion_groups(seq: nn.Sequential):
+    """Sequential 안의 (Conv2d | Linear) 바로 뒤 ReLU 쌍 → fuse_modules 용 이름 목록"""
+    names = list(seq._modules)
+    groups = []
+    for a, b in zip(names[:-1], names[1:]):
+        if isinstance(seq._modules[a], (nn.Conv2d, nn.Linear)) and isinstance(seq._modules[b], nn.ReLU):
+            groups.append([a, b])
+    return groups
+
+
+class QuantPilotNet(nn.Module):
+    """
+    PilotNet 의 양자화용 래퍼 (가중치는 복사, 원본 모델은 그대로)
+    InputNorm(float 변환) → QuantStub → features → classifier → DeQuantStub
+    """
+
+    def __init__(self, model: PilotNet):
+        super().__init__()
+        self.input_norm = copy.deepcopy(model.input_norm)
+        self.quant = QuantStub()
+        self.features = copy.deepcopy(model.features)
+        self.classifier = copy.deepcopy(model.classifier)
+        self.dequant = DeQuantStub()
+
+    def fuse(self):
+        for seq in (self.features, self.classifier):
+            groups = _fusion_groups(seq)
+            if groups:
+                fuse_modules(seq, groups, inplace=True)
+        return self
+
+    def forward(self, x):
+        x = self.input_norm(x)
+        x = self.quant(x)
+        x = self.features(x)
+        x = self.classifier(x)
+        return self.dequant(x)
+
+
+@torch.no_grad()
+def quantize_pilotnet(model: PilotNet, calib_loader, backend: str = None) -> nn.Module:
+    """fp32 PilotNet → int8 (fusion → observer 삽입 → calibration → convert)"""
+    backend = backend or default_backend()
+    if backend not in torch.backends.quantized.supported_engines:
+        raise RuntimeError(f"[ERROR] quantized engine '{backend}' not supported "
+                           f"(available: {torch.backends.quantized.supported_engines})")
+    torch.backends.quantized.engine = backend
+
+    qmodel = QuantPilotNet(model).eval().fuse()
+    qmodel.qconfig = get_default_qconfig(backend)
+    qmodel.input_norm.qconfig = None  # 정규화는 float 로 수행
+    prepare(qmodel, inplace=True)
+
+    n = 0
+    for images, _ in calib_loader:
+        qmodel(images)
+        n += images.size(0)
+    print(f"[INFO] calibration: {n} samples (backend={backend})")
+
+    return convert(qmodel, inplace=True)
+
+
+# =============================================================================
+# 비교 측정
+# =============================================================================
+@torch.no_grad()
+def predict(model, loader):
+    preds, labels = [], []
+    for images, y in loader:
+        preds.append(model(images).argmax(dim=1))
+        labels.append(y)
+    return torch.cat(preds), torch.cat(labels)
+
+
+@torch.no_grad()
+def frame_latency_ms(model, example, warmup: int = 20, iters: int = 200):
+    """batch 1 프레임당 지연 (median, p95) ms"""
+    for _ in range(warmup):
+        model(example)
+    times = []
+    for _ in range(iters):
+        t0 = time.perf_counter()
+        model(example)
+        times.append((time.perf_counter() - t0) * 1000.0)
+    return float(np.median(times)), float(np.percentile(times, 95))
+
+
+def state_dict_mb(model) -> float:
+    buf = io.BytesIO()
+    torch.save(model.state_dict(), buf)
+    return buf.tell() / 1024 ** 2
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PilotNet int8 post-training quantization")
+    parser.add_argument("--checkpoint", required=True, help="fp32 PilotNet .pth (state_dict 또는 체크포인트)")
+    parser.add_argument("--root", required=True, help="dataset 폴더 (CSV + 이미지)")
+    parser.add_argument("--csv", default="data_labels_clean", help="CSV 파일 이름 (.csv 제외)")
+    parser.add_argument("--width-mult", type=float, default=None,
+                        help="PilotNet 채널 배율 (기본: 가중치 모양에서 추정)")
+    parser.add_argument("--separable", action="store_true", default=None,
+                        help="depthwise-separable PilotNet (기본: 가중치 모양에서 추정)")
+    parser.add_argument("--split-ratio", type=float, default=0.8)
+    parser.add_argument("--crop-top", type=float, default=0.4)
+    parser.add_argument("--crop-bottom", type=float, default=1.0)
+    parser.add_argument("--calib-samples", type=int, default=512, help="calibration 샘플 수 (test split 에서 무작위)")
+    parser.add_argument("--calib-split", default="test", choices=("train", "test"))
+    parser.add_argument("--backend", default=None, help="x86 / qnnpack (기본: CPU 아키텍처로 결정)")
+    parser.add_argument("--threads", type=int, default=1, help="지연 측정 torch 스레드 수 (차량 제어 루프 기준)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default=None, help="저장 경로 (기본: <checkpoint>_int8_<backend>.pt)")
+    args = parser.parse_args()
+
+    backend = args.backend or default_backend()
+    preproc = RCPreprocessor(out_size=(200, 66), crop_top_ratio=args.crop_top, crop_bottom_ratio=args.crop_bottom)
+    input_shape = (3, preproc.out_h, preproc.out_w)
+    model = load_pilotnet(args.checkpoint, input_shape, args.width_mult, args.separable)
+
+    def dataset(split):
+        return RCDataset(csv_filename=args.csv, root=args.root, preprocessor=preproc,
+                         augmentor=None, split=split, split_ratio=args.split_ratio,
+                         output_dtype="uint8")
+
+    # -------------------------------------------------------------------------
+    # 1) calibration → int8
+    # -------------------------------------------------------------------------
+    test_ds = dataset("test")
+    calib_ds = test_ds if args.calib_split == "test" else dataset("train")
+    rng = np.random.default_rng(args.seed)
+    n_calib = min(args.calib_samples, len(calib_ds))
+    calib_idx = np.sort(rng.choice(len(calib_ds), n_calib, replace=False)).tolist()
+    calib_loader = DataLoader(Subset(calib_ds, calib_idx), batch_size=32, shuffle=False)
+
+    qmodel = quantize_pilotnet(model, calib_loader, backend)
+
+    # -------------------------------------------------------------------------
+    # 2) TorchScript 저장 + 저장본 출력 확인
+    # -------------------------------------------------------------------------
+    example = torch.zeros(1, *input_shape, dtype=torch.uint8)
+    scripted = torch.jit.trace(qmodel, example)
+    stem = os.path.splitext(args.checkpoint)[0]
+    out_path = args.out or f"{stem}_int8_{backend}.pt"
+    torch.jit.save(scripted, out_path)
+    print(f"[INFO] Saved int8 TorchScript → {out_path}")
+
+    loaded = torch.jit.load(out_path)
+    eval_loader = DataLoader(test_ds, batch_size=128, shuffle=False)
+
+    # -------------------------------------------------------------------------
+    # 3) fp32 vs int8 비교
+    # -------------------------------------------------------------------------
+    fp32_pred, labels = predict(model, eval_loader)
+    int8_pred, _ = predict(loaded, eval_loader)
+
+    torch.set_num_threads(args.threads)
+    frame = test_ds[0][0].unsqueeze(0) if len(test_ds) else example
+    fp32_lat = frame_latency_ms(model, frame)
+    int8_lat = frame_latency_ms(loaded, frame)
+
+    report = {
+        "checkpoint": args.checkpoint,
+        "int8_path": out_path,
+        "backend": backend,
+        "calib_split": args.calib_split,
+        "calib_samples": n_calib,
+        "test_samples": int(labels.numel()),
+        "threads": args.threads,
+        "fp32": {
+            "acc": (fp32_pred == labels).float().mean().item() * 100.0,
+            "latency_ms_median": fp32_lat[0],
+            "latency_ms_p95": fp32_lat[1],
+            "size_mb": state_dict_mb(model),
+        },
+        "int8": {
+            "acc": (int8_pred == labels).float().mean().item() * 100.0,
+            "latency_ms_median": int8_lat[0],
+            "latency_ms_p95": int8_lat[1],
+            "size_mb": state_dict_mb(qmodel),
+            "file_mb": os.path.getsize(out_path) / 1024 ** 2,
+        },
+        "agreement": (fp32_pred == int8_pred).float().mean().item() * 100.0,
+    }
+
+    print(f"\n{'model':>5} | {'acc':>7} | {'lat med':>8} | {'lat p95':>8} | {'size MB':>7}")
+    print("-" * 48)
+    for name in ("fp32", "int8"):
+        r = report[name]
+        print(f"{name:>5} | {r['acc']:>6.2f}% | {r['latency_ms_median']:>6.3f}ms | "
+              f"{r['latency_ms_p95']:>6.3f}ms | {r['size_mb']:>7.3f}")
+    print(f"[INFO] fp32 / int8 prediction agreement = {report['agreement']:.2f}% "
+          f"(speedup x{fp32_lat[0] / int8_lat[0]:.2f}, threads={args.threads})")
+
+    report_path = os.path.splitext(out_path)[0] + ".json"
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"[INFO] report → {report_path}")
+
+
+if __name__ == "__main__":
+    main()
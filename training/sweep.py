@@ -0,0 +1,291 @@
+# training/sweep.py
+# =============================================================================
+# Description : 하이퍼파라미터 sweep 실행기 (grid / random search)
+#               - 학습 설정을 코드 수정 없이 spec(JSON) 으로 지정 → train_pilotnet.train() 인자로 전달
+#               - 프로세스 풀에서 여러 trial 을 동시에 실행 (CPU 코어 / 메모리 예산 안에서)
+#               - 모든 trial 이 같은 전처리 디스크 캐시(RCTensorCache)를 읽음
+#                 (크롭 비율별로 시작 전에 한 번만 채움 → trial 마다 PNG 디코드 안 함)
+#               - 현재 선두보다 확실히 뒤처지는 trial 은 조기 종료
+#               - 결과는 leaderboard.csv / leaderboard.json 하나로 모음
+#
+# spec 예시 (sweep.json):
+#   {
+#     "method": "random",                 # "grid" 이면 params 의 모든 조합
+#     "num_trials": 16,                   # random 일 때만 사용
+#     "seed": 0,
+#     "fixed": {"num_epochs": 15},
+#     "params": {
+#       "learning_rate": {"loguniform": [1e-4, 3e-3]},
+#       "weight_decay": {"choice": [0, 1e-5, 1e-4]},
+#       "batch_size": [64, 128, 256],     # 리스트 = choice
+#       "crop_top_ratio": {"uniform": [0.3, 0.5]}
+#     }
+#   }
+#
+# 실행 예시 (저장소 루트에서):
+#   python -m training.sweep --spec sweep.json --root C:/Users/YJU/Desktop/dataset \
+#       --threads-per-trial 2 --mem-per-trial-gb 1.5 --out sweeps/lr_wd
+# =============================================================================
+
+import argparse
+import csv
+import itertools
+import json
+import math
+import multiprocessing as mp
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from training.loader_tuning import available_cpus
+
+# spec 에서 지정할 수 있는 train() 인자
+TUNABLE = ("learning_rate", "batch_size", "weight_decay", "num_epochs",
+           "crop_top_ratio", "crop_bottom_ratio", "amp", "channels_last",
+           "width_mult", "separable")
+
+
+# =============================================================================
+# 1. trial 생성
+# =============================================================================
+def _sample(rng, space):
+    if isinstance(space, list):
+        return space[int(rng.integers(len(space)))]
+    if not isinstance(space, dict) or len(space) != 1:
+        return space
+    kind, arg = next(iter(space.items()))
+    if kind == "choice":
+        return arg[int(rng.integers(len(arg)))]
+    if kind == "uniform":
+        return float(rng.uniform(*arg))
+    if kind == "loguniform":
+        return float(math.exp(rng.uniform(math.log(arg[0]), math.log(arg[1]))))
+    if kind == "int":
+        return int(rng.integers(arg[0], arg[1] + 1))
+    raise ValueError(f"[ERROR] unknown search space '{kind}'")
+
+
+def _grid_values(name, space) -> list:
+    """grid 모드: 리스트 / {"choice": [...]} → 후보 목록, 단일 값 → [값], 연속 분포는 거부"""
+    if isinstance(space, list):
+        return space
+    if not isinstance(space, dict):
+        return [space]
+    if len(space) == 1 and isinstance(space.get("choice"), list):
+        return space["choice"]
+    raise ValueError(f"[ERROR] grid sweep needs a list or {{\"choice\": [...]}} for '{name}', "
+                     f"got {space} (uniform / loguniform / int 은 method \"random\" 에서만)")
+
+
+def make_trials(spec: dict):
+    """spec → [{"trial": i, "params": {...}}, ...]"""
+    params = spec.get("params", {})
+    fixed = spec.get("fixed", {})
+    unknown = (set(params) | set(fixed)) - set(TUNABLE)
+    if unknown:
+        raise ValueError(f"[ERROR] unknown sweep params {sorted(unknown)} (allowed: {TUNABLE})")
+
+    method = spec.get("method", "grid")
+    if method == "grid":
+        names = list(params)
+        values = [_grid_values(k, v) for k, v in params.items()]
+        combos = [dict(zip(names, c)) for c in itertools.product(*values)]
+    elif method == "random":
+        rng = np.random.default_rng(spec.get("seed", 0))
+        combos = [{k: _sample(rng, v) for k, v in params.items()}
+                  for _ in range(spec.get("num_trials", 10))]
+    else:
+        raise ValueError(f"[ERROR] method must be 'grid' or 'random', got '{method}'")
+
+    return [{"trial": i, "params": {**fixed, **c}} for i, c in enumerate(combos)]
+
+
+# =============================================================================
+# 2. 자원 예산
+# =============================================================================
+def total_memory_gb() -> float:
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") / 1024 ** 3
+    except (AttributeError, ValueError, OSError):
+        return 8.0
+
+
+def parallel_trials(threads_per_trial: int, mem_per_trial_gb: float,
+                    cores: int = None, mem_budget_gb: float = None) -> int:
+    """코어 / 메모리 예산 안에서 동시에 돌릴 수 있는 trial 수"""
+    cores = cores or available_cpus()
+    mem_budget_gb = mem_budget_gb or total_memory_gb() * 0.8
+    by_cores = cores // max(1, threads_per_trial)
+    by_memory = int(mem_budget_gb // max(mem_per_trial_gb, 1e-3))
+    return max(1, min(by_cores, by_memory))
+
+
+# =============================================================================
+# 3. 조기 종료
+# =============================================================================
+class EarlyStopper:
+    """
+    trial 간 공유되는 조기 종료 판단 (train() 의 epoch_callback)
+    - board[epoch] = 그 epoch 까지 끝난 trial 들의 최고 test_acc (Manager dict, 프로세스 간 공유)
+    - min_epochs 이후, 같은 epoch 의 선두보다 margin(%p) 이상 낮으면 False 반환 → 학습 종료
+    """
+
+    def __init__(self, board, lock, min_epochs: int = 3, margin: float = 5.0):
+        self.board = board
+        self.lock = lock
+        self.min_epochs = min_epochs
+        self.margin = margin
+
+    def __call__(self, epoch: int, metrics: dict) -> bool:
+        acc = metrics["test_acc"]
+        with self.lock:
+            leader = self.board.get(epoch, float("-inf"))
+            if acc > leader:
+                self.board[epoch] = acc
+        return not (epoch >= self.min_epochs and acc < leader - self.margin)
+
+
+# =============================================================================
+# 4. 캐시 준비 / trial 실행
+# =============================================================================
+def warm_caches(trials, root: str, csv_filename: str, cache_dir: str):
+    """trial 들이 쓰는 크롭 설정마다 train / test 캐시를 미리 채움 (이후 trial 은 읽기만)"""
+    from preprocessor.RCPreprocessor import RCPreprocessor
+    from training.RCDataset import RCDataset
+    from training.RCTensorCache import warm_up
+
+    crops = sorted({(t["params"].get("crop_top_ratio", 0.4),
+                     t["params"].get("crop_bottom_ratio", 1.0)) for t in trials})
+    for top, bottom in crops:
+        print(f"[Sweep] warm cache crop=({top:.3f}, {bottom:.3f})")
+        preproc = RCPreprocessor(out_size=(200, 66), crop_top_ratio=top, crop_bottom_ratio=bottom)
+        for split in ("train", "test"):
+            ds = RCDataset(csv_filename=csv_filename, root=root, preprocessor=preproc,
+                           augmentor=None, split=split, cache_dir=cache_dir,
+                           output_dtype="uint8")
+            warm_up(ds)
+
+
+def run_trial(trial: dict, common: dict, stopper: EarlyStopper) -> dict:
+    """프로세스 풀 worker 에서 실행: train() 한 번"""
+    import torch
+    from training.train_pilotnet import train
+
+    torch.set_num_threads(common["threads"])
+    run_dir = f"{common['out']}/trial_{trial['trial']:03d}"
+    os.makedirs(run_dir, exist_ok=True)
+
+    start = time.time()
+    try:
+        summary = train(
+            dataset_root=common["root"],
+            csv_filename=common["csv"],
+            cache_dir=common["cache_dir"],
+            run_dir=run_dir,
+            autotune_workers=False,
+            num_workers=0,
+            save_model=False,
+            checkpoint_dir=None,
+            epoch_callback=stopper,
+            **trial["params"],
+        )
+        error = None
+    except Exception as e:  # 한 trial 실패가 sweep 전체를 멈추지 않도록
+        summary, error = {}, repr(e)
+
+    return {
+        "trial": trial["trial"],
+        "params": trial["params"],
+        "best_test_acc": summary.get("best_test_acc"),
+        "final_test_acc": summary.get("test_acc"),
+        "epochs_run": summary.get("epochs_run"),
+        "stopped_early": summary.get("stopped_early"),
+        "time_s": time.time() - start,
+        "error": error,
+    }
+
+
+# =============================================================================
+# 5. leaderboard
+# =============================================================================
+def write_leaderboard(results, out_dir: str):
+    ranked = sorted(results, key=lambda r: -(r["best_test_acc"] if r["best_test_acc"] is not None
+                                             else float("-inf")))
+    with open(f"{out_dir}/leaderboard.json", "w", encoding="utf-8") as f:
+        json.dump(ranked, f, indent=2)
+
+    param_names = sorted({k for r in ranked for k in r["params"]})
+    fields = ["rank", "trial", "best_test_acc", "final_test_acc", "epochs_run",
+              "stopped_early", "time_s", *param_names, "error"]
+    with open(f"{out_dir}/leaderboard.csv", "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        for i, r in enumerate(ranked, 1):
+            writer.writerow({"rank": i, **{k: v for k, v in r.items() if k != "params"},
+                             **r["params"]})
+    return ranked
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PilotNet hyperparameter sweep")
+    parser.add_argument("--spec", required=True, help="sweep spec JSON")
+    parser.add_argument("--root", required=True, help="dataset 폴더 (CSV + 이미지)")
+    parser.add_argument("--csv", default="data_labels_clean", help="CSV 파일 이름 (.csv 제외)")
+    parser.add_argument("--cache-dir", default=None, help="공유 전처리 캐시 (기본: <root>/.rc_cache)")
+    parser.add_argument("--out", default=None, help="결과 폴더 (기본: sweeps/<timestamp>)")
+    parser.add_argument("--threads-per-trial", type=int, default=2)
+    parser.add_argument("--mem-per-trial-gb", type=float, default=1.5)
+    parser.add_argument("--cores", type=int, default=None, help="사용할 코어 수 (기본: 전체)")
+    parser.add_argument("--mem-budget-gb", type=float, default=None, help="기본: 전체 RAM 의 80%%")
+    parser.add_argument("--min-epochs", type=int, default=3, help="조기 종료 판단 시작 epoch")
+    parser.add_argument("--margin", type=float, default=5.0, help="선두 대비 허용 차이 (%%p)")
+    args = parser.parse_args()
+
+    with open(args.spec, "r", encoding="utf-8") as f:
+        spec = json.load(f)
+    trials = make_trials(spec)
+
+    out_dir = args.out or f"sweeps/{time.strftime('%Y%m%d_%H%M%S')}"
+    os.makedirs(out_dir, exist_ok=True)
+    with open(f"{out_dir}/spec.json", "w", encoding="utf-8") as f:
+        json.dump({"spec": spec, "trials": trials}, f, indent=2)
+
+    root = args.root.replace("\\", "/").rstrip("/")
+    cache_dir = args.cache_dir or f"{root}/.rc_cache"
+    warm_caches(trials, root, args.csv, cache_dir)
+
+    n_parallel = parallel_trials(args.threads_per_trial, args.mem_per_trial_gb,
+                                 args.cores, args.mem_budget_gb)
+    print(f"[Sweep] {len(trials)} trials, {n_parallel} in parallel "
+          f"(threads/trial={args.threads_per_trial}, mem/trial={args.mem_per_trial_gb}GB)")
+
+    common = {"root": root, "csv": args.csv, "cache_dir": cache_dir,
+              "out": out_dir, "threads": args.threads_per_trial}
+
+    ctx = mp.get_context("spawn")
+    results = []
+    with ctx.Manager() as manager:
+        stopper = EarlyStopper(manager.dict(), manager.Lock(), args.min_epochs, args.margin)
+        with ProcessPoolExecutor(max_workers=n_parallel, mp_context=ctx) as pool:
+            futures = [pool.submit(run_trial, t, common, stopper) for t in trials]
+            for fut in as_completed(futures):
+                r = fut.result()
+                results.append(r)
+                status = "error" if r["error"] else ("stopped" if r["stopped_early"] else "done")
+                print(f"[Sweep] trial {r['trial']:03d} {status}: best_acc={r['best_test_acc']} "
+                      f"epochs={r['epochs_run']} ({r['time_s']:.1f}s) {r['params']}")
+                write_leaderboard(results, out_dir)
+
+    ranked = write_leaderboard(results, out_dir)
+    print(f"\n{'rank':>4} | {'trial':>5} | {'best_acc':>8} | {'epochs':>6} | params")
+    print("-" * 72)
+    for i, r in enumerate(ranked[:10], 1):
+        acc = f"{r['best_test_acc']:.2f}" if r["best_test_acc"] is not None else "error"
+        print(f"{i:>4} | {r['trial']:>5} | {acc:>8} | {str(r['epochs_run']):>6} | {r['params']}")
+    print(f"[INFO] leaderboard → {out_dir}/leaderboard.csv")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+# training/train_distributed.py
+# =============================================================================
+# Description : CPU 다중 프로세스 데이터 병렬 학습 실행기 (torch.distributed, gloo)
+#               - 노드 하나에서 --nproc 개 프로세스를 띄우고 각각 train_pilotnet.train() 실행
+#               - 여러 노드: 노드마다 같은 명령을 --nnodes / --node-rank / --master-addr 만 바꿔 실행
+#               - torchrun 으로 띄운 경우 (RANK / WORLD_SIZE 환경 변수) 그대로 사용
+#               - 프로세스마다 torch 스레드 수 = 사용 가능 CPU / nproc (과다 구독 방지)
+#
+# 실행 예시 (저장소 루트에서):
+#   # 한 노드, 8 프로세스
+#   python -m training.train_distributed --nproc 8 --root /data/dataset --epochs 20
+#
+#   # 두 노드 × 8 프로세스 (node 0 주소 = 10.0.0.1, 데이터셋 / 체크포인트 폴더는 공유 스토리지)
+#   node0$ python -m training.train_distributed --nproc 8 --nnodes 2 --node-rank 0 --master-addr 10.0.0.1 ...
+#   node1$ python -m training.train_distributed --nproc 8 --nnodes 2 --node-rank 1 --master-addr 10.0.0.1 ...
+#
+#   # torchrun 사용
+#   torchrun --nproc_per_node 8 -m training.train_distributed --root /data/dataset
+# =============================================================================
+
+import argparse
+import json
+import os
+
+import torch
+import torch.multiprocessing as mp
+
+from training.distributed import cleanup_distributed, init_distributed, setup_for_distributed
+from training.loader_tuning import available_cpus
+from training.train_pilotnet import AMP_MODES, train
+
+
+def run(rank: int, world_size: int, args, master_addr: str, master_port: int):
+    """프로세스 하나: 프로세스 그룹 초기화 → train() → 종료"""
+    torch.set_num_threads(args.threads)
+    init_distributed(rank, world_size, master_addr, master_port)
+    setup_for_distributed(rank == 0)
+    try:
+        summary = train(
+            dataset_root=args.root,
+            csv_filename=args.csv,
+            num_epochs=args.epochs,
+            amp=args.amp,
+            channels_last=args.channels_last,
+            save_model=args.save_model,
+            checkpoint_dir=args.checkpoint_dir,
+            keep_last=args.keep_last,
+            resume=args.resume,
+            num_workers=args.workers,
+        )
+        if rank == 0 and args.result_json:
+            with open(args.result_json, "w", encoding="utf-8") as f:
+                json.dump(summary, f, indent=2)
+    finally:
+        cleanup_distributed()
+
+
+def _spawned(local_rank: int, args):
+    rank = args.node_rank * args.nproc + local_rank
+    run(rank, args.nnodes * args.nproc, args, args.master_addr, args.master_port)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="distributed (gloo, CPU) PilotNet training")
+    parser.add_argument("--nproc", type=int, default=2, help="이 노드에서 띄울 프로세스 수")
+    parser.add_argument("--nnodes", type=int, default=1)
+    parser.add_argument("--node-rank", type=int, default=0)
+    parser.add_argument("--master-addr", default="127.0.0.1")
+    parser.add_argument("--master-port", type=int, default=29500)
+    parser.add_argument("--threads", type=int, default=None,
+                        help="프로세스당 torch 스레드 수 (기본: 사용 가능 CPU / nproc)")
+    parser.add_argument("--workers", type=int, default=0, help="프로세스당 DataLoader worker 수")
+
+    parser.add_argument("--root", default="C:/Users/YJU/Desktop/dataset", help="dataset 폴더 (CSV + 이미지)")
+    parser.add_argument("--csv", default="data_labels_clean", help="CSV 파일 이름 (.csv 제외)")
+    parser.add_argument("--epochs", type=int, default=20)
+    parser.add_argument("--amp", choices=AMP_MODES, default="off")
+    parser.add_argument("--channels-last", action="store_true")
+    parser.add_argument("--no-save", dest="save_model", action="store_false",
+                        help="학습 후 PTH / ONNX 저장 안 함 (벤치마크용)")
+    parser.add_argument("--checkpoint-dir", default="auto", help="기본: runs/<timestamp>/checkpoints")
+    parser.add_argument("--keep-last", type=int, default=3)
+    parser.add_argument("--resume", nargs="?", const="latest", default=None)
+    parser.add_argument("--result-json", default=None, help="rank 0 의 train() 결과 저장 경로")
+    args = parser.parse_args()
+
+    if "RANK" in os.environ and "WORLD_SIZE" in os.environ:
+        # torchrun: 프로세스 / 주소는 이미 정해져 있음
+        world_size = int(os.environ["WORLD_SIZE"])
+        local_world = int(os.environ.get("LOCAL_WORLD_SIZE", world_size))
+        args.threads = args.threads or max(1, available_cpus() // local_world)
+        run(int(os.environ["RANK"]), world_size, args,
+            os.environ["MASTER_ADDR"], int(os.environ["MASTER_PORT"]))
+        return
+
+    args.threads = args.threads or max(1, available_cpus() // args.nproc)
+    print(f"[INFO] node {args.node_rank}/{args.nnodes}: spawning {args.nproc} processes "
+          f"(threads/proc={args.threads}, master={args.master_addr}:{args.master_port})")
+    mp.spawn(_spawned, args=(args,), nprocs=args.nproc, join=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,103 +1,338 @@
+import argparse
+import json
 import os
+import platform
 import time
 import torch
-from torch.utils.data import DataLoader
 from torch import nn, optim
+from torch.nn.parallel import DistributedDataParallel
+from torch.utils.data.distributed import DistributedSampler
 
-from training.RCDataset import RCDataset
-from preprocessor.RCPreprocessor import RCPreprocessor
+from training.RCDataset import AUGMENT_STAGES, OUTPUT_DTYPES, RCDataset
+from training.RCShards import RCShardDataset
+from preprocessor.RCPreprocessor import RCPreprocessor, REDUCED_DECODE_FLAGS
 from preprocessor.RCAugmentor import RCAugmentor
 from training.model import PilotNet
+from training.distill import DistillDataset, DistillLoss, TeacherLogits
+from training.export_onnx import export_onnx_model
+from training.preproc_graph import export_fused_onnx
+from training.metrics import ClassificationMeter
+from training.instrumentation import ProfilerWindow, StepTimer, TimingLogger
+from training.checkpoint import (
+    AsyncCheckpointer, latest_checkpoint, latest_run_checkpoint, list_checkpoints, load_checkpoint,
+    restore_training_state
+)
+from training.distributed import (
+    RankSliceSampler, barrier, get_rank, get_world_size, is_distributed
+)
+from training.instrumentation import summarize
+from training.loader_tuning import (
+    autotune_loader, available_cpus, make_loader, platform_loader_config
+)
 
 torch.backends.cudnn.benchmark = True
 
+AMP_MODES = ("off", "bf16", "fp16")
 
-def train():
+
+@torch.no_grad()
+def evaluate(model, loader, criterion, device, meter: ClassificationMeter = None,
+             memory_format=torch.contiguous_format, amp_dtype=None) -> dict:
+    """
+    loader 전체 평가 → {"loss", "acc", "total"}
+    - 배치마다 동기화하지 않고 meter 에 누적, 끝에서 한 번만 읽음
+    """
+    meter = meter or ClassificationMeter(device)
+    meter.reset()
+    model.eval()
+
+    for images, labels in loader:
+        images = images.to(device, non_blocking=True, memory_format=memory_format)
+        labels = labels.to(device, non_blocking=True)
+
+        with torch.autocast(device.type, dtype=amp_dtype, enabled=amp_dtype is not None):
+            outputs = model(images)
+            loss = criterion(outputs, labels)
+
+        meter.update(loss, outputs, labels)
+
+    return meter.compute()
+
+
+def train(
+    dataset_root: str = "C:/Users/YJU/Desktop/dataset",
+    csv_filename: str = "data_labels_clean",
+    num_epochs: int = 20,
+    batch_size: int = 128,
+    learning_rate: float = 5e-4,
+    weight_decay: float = 1e-4,
+    crop_top_ratio: float = 0.4,
+    crop_bottom_ratio: float = 1.0,
+    width_mult: float = 1.0,
+    separable: bool = False,
+    amp: str = "off",
+    channels_last: bool = False,
+    compile_model: bool = False,
+    autotune_workers: bool = True,
+    save_model: bool = True,
+    log_interval: int = 0,
+    timing_format: str = "json",
+    profile_steps=None,
+    checkpoint_dir: str = "auto",
+    checkpoint_every: int = 1,
+    keep_last: int = 3,
+    resume: str = None,
+    num_workers: int = None,
+    cache_dir: str = None,
+    augment_stage: str = "resized",
+    shard_dir: str = None,
+    shared_cache_mb: float = None,
+    decode_scale: int = 1,
+    input_dtype: str = "uint8",
+    run_dir: str = None,
+    epoch_callback=None,
+    teachers=None,
+    distill_alpha: float = 0.5,
+    distill_temperature: float = 4.0,
+    export_frame_size=None,
+):
+    """
+    PilotNet 학습
+    - dataset_root / csv_filename: CSV + 이미지 폴더, 최종 균등화된 CSV 파일 이름 (.csv 제외)
+    - batch_size / learning_rate / weight_decay / crop_top_ratio / crop_bottom_ratio: 학습 / 전처리 설정
+    - width_mult / separable: PilotNet 변형 (채널 배율, depthwise-separable conv) — model.PilotNet 참고
+    - amp          : "off" / "bf16" (CPU, CUDA) / "fp16" (CUDA 전용, GradScaler 사용)
+    - channels_last: 모델 가중치 / 입력 배치를 NHWC 메모리 배치로
+    - compile_model: torch.compile 적용 (첫 epoch 에 컴파일 시간 포함)
+    - autotune_workers: DataLoader (num_workers, prefetch_factor) 자동 튜닝 (False 면 플랫폼 기본값)
+    - save_model   : 학습 후 PTH / ONNX 저장 (벤치마크에서는 False)
+    - log_interval : N step 마다 누적 train loss / acc 출력 (0 이면 epoch 끝에서만, 출력 시에만 동기화)
+    - timing_format: step 구간 시간 요약 저장 형식 "json" / "csv" / "both" (run_dir, instrumentation.py)
+    - profile_steps: (start, end) 전체 step 번호 구간을 torch.profiler 로 기록 (None 이면 사용 안 함)
+    - checkpoint_dir / checkpoint_every / keep_last:
+                     N epoch 마다 백그라운드 저장, 최근 keep_last 개 + best.pth 유지 (None 이면 저장 안 함)
+                     "auto" 면 <run_dir>/checkpoints (실행마다 따로, 다른 실행의 파일을 지우거나 덮지 않음)
+    - resume       : "latest" 또는 체크포인트 경로 → 그 epoch 다음부터 이어서 학습
+                     ("latest" + checkpoint_dir="auto": runs/ 아래에서 가장 최근에 저장된 실행,
+                      재개한 실행의 폴더에 이어서 저장)
+                     (모델 / 옵티마이저 / 스케일러 / 난수 / 셔플 상태 복원, CPU 에서 중단 없이 돌린 것과 동일)
+    - num_workers  : DataLoader worker 수 직접 지정 (None 이면 플랫폼 기본값 / 자동 튜닝)
+    - cache_dir    : 전처리 결과 디스크 캐시 폴더 (None 이면 <dataset_root>/.rc_cache, 여러 실행이 공유 가능)
+    - augment_stage: 증강 위치 "resized" = 66x200 으로 줄인 뒤 증강 (캐시와 함께 사용 가능)
+                     / "full" = 원본 프레임에 증강 후 전처리 (RCDataset 참고)
+    - shard_dir    : shard 데이터셋 폴더 (python -m training.RCShards 로 생성, <shard_dir>/train, /test)
+                     None 이면 CSV + 이미지 (RCDataset), 분산 학습 / 지식 증류는 RCDataset 만 지원
+    - shared_cache_mb: DataLoader worker 간 공유 RAM 캐시 예산 MB (None 이면 사용 안 함, RCSharedCache 참고)
+    - decode_scale : JPEG 축소 디코드 배율 1 / 2 / 4 / 8 (PNG 는 영향 없음, 크롭이 출력보다 작아지지 않게 제한)
+                     → training/bench_decode.py 참고
+    - input_dtype  : 배치 dtype "uint8" = 정규화 전 uint8 로 옮기고 device 에서 /255 (전송량 1/4, 결과 동일)
+                     / "float32" = worker 에서 정규화 (기존 방식, training/bench_input_dtype.py 비교용)
+    - run_dir      : 실행 기록 폴더 (None 이면 runs/<timestamp>)
+    - epoch_callback(epoch, metrics) : epoch 마다 호출, False 를 반환하면 학습 조기 종료 (training/sweep.py)
+    - teachers     : 지식 증류 teacher 목록 ["<width_mult>[+sep]=<.pth>", ...] (None 이면 일반 학습)
+                     teacher 출력은 <cache_dir>/teacher_logits 에 한 번만 계산 → training/distill.py 참고
+    - distill_alpha / distill_temperature: 증류 loss 의 soft target 비중 / 온도
+    - export_frame_size: 카메라 프레임 크기 (W, H) → 전처리를 그래프 안에 넣은 ONNX 도 저장
+                     (입력 uint8 BGR 원본 프레임, training/preproc_graph.py 참고)
+
+    분산 학습 (training/train_distributed.py 가 프로세스 그룹을 만든 뒤 호출):
+    - batch_size 는 전체 배치 → rank 마다 batch_size / world_size
+    - train: DistributedSampler, test: RankSliceSampler (지표는 all_reduce 로 합침)
+    - DistributedDataParallel 로 gradient all_reduce
+    - 로그 / 체크포인트 / 기록 / 모델 저장은 rank 0 만
+    - 반환: {"epoch_times": [...], "test_acc": 마지막 epoch test 정확도(%), ...}
+    """
     # =====================
     # 1. Hyperparameters
     # =====================
-    # 최종 균등화된 파일 이름 사용
-    csv_filename = "data_labels_clean" 
-    dataset_root = "C:/Users/YJU/Desktop/dataset"
-    num_epochs = 20
-    batch_size = 128
-    learning_rate = 5e-4
-    weight_decay = 1e-4
     split_ratio = 0.8
+    # 전처리 결과 디스크 캐시 (크롭 비율 등 전처리 설정별로 하위 폴더가 나뉨)
+    cache_dir = cache_dir or f"{dataset_root}/.rc_cache"
+    seed = 42
+
+    distributed = is_distributed()
+    rank, world_size = get_rank(), get_world_size()
+    is_main = rank == 0
+    local_batch_size = max(1, batch_size // world_size)
+
+    timestamp = time.strftime("%Y%m%d_%H%M%S")
+    # 실행별 기록 폴더 (loader 설정 / 측정값 등)
+    run_dir = run_dir or f"runs/{timestamp}"
+    auto_checkpoint_dir = checkpoint_dir == "auto"
+    if auto_checkpoint_dir:
+        checkpoint_dir = f"{run_dir}/checkpoints"
+    if is_main:
+        os.makedirs(run_dir, exist_ok=True)
 
     device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
     print(f"[INFO] device = {device}")
 
+    if amp not in AMP_MODES:
+        raise ValueError(f"[ERROR] amp must be one of {AMP_MODES}, got '{amp}'")
+    if amp == "fp16" and device.type != "cuda":
+        raise ValueError("[ERROR] amp='fp16' 은 CUDA 전용입니다 (CPU 는 'bf16' 사용)")
+    if decode_scale not in REDUCED_DECODE_FLAGS:
+        raise ValueError(f"[ERROR] decode_scale must be one of {sorted(REDUCED_DECODE_FLAGS)}, got {decode_scale}")
+    if input_dtype not in OUTPUT_DTYPES:
+        raise ValueError(f"[ERROR] input_dtype must be one of {OUTPUT_DTYPES}, got '{input_dtype}'")
+    amp_dtype = {"bf16": torch.bfloat16, "fp16": torch.float16}.get(amp)
+    memory_format = torch.channels_last if channels_last else torch.contiguous_format
+    print(f"[INFO] amp={amp}, channels_last={channels_last}, compile={compile_model}")
+    if distributed:
+        print(f"[INFO] distributed: world_size={world_size}, batch/rank={local_batch_size} "
+              f"(global {local_batch_size * world_size}), threads/rank={torch.get_num_threads()}")
+
+    torch.manual_seed(seed)
+
     # =====================
     # 2. Dataset & Loader
     # =====================
     preproc = RCPreprocessor(
         out_size=(200, 66),
-        crop_top_ratio=0.4,
-        crop_bottom_ratio=1.0
+        crop_top_ratio=crop_top_ratio,
+        crop_bottom_ratio=crop_bottom_ratio
     )
 
-    # Train에만 augmentation 적용/ 사용여부 검토
+    # Train에만 augmentation 적용 (축소 후 적용하므로 비용이 거의 없음)
     augment = RCAugmentor(
         hflip_prob=0.5,
         brightness_delta=0.2,
         blur_prob=0.3
     )
 
-    train_dataset = RCDataset(
-        csv_filename=csv_filename,
-        root=dataset_root,
-        preprocessor=preproc,
-        augmentor=None,
-        split="train",
-        split_ratio=split_ratio
-    )
+    if shard_dir is not None and distributed:
+        # rank 별 샘플 수가 달라지면 DDP all_reduce 가 마지막 배치에서 멈춤
+        raise ValueError("[ERROR] 분산 학습은 RCDataset(CSV + 이미지) 만 지원합니다 (shard_dir=None)")
+
+    # 디스크 캐시 인덱스는 rank 0 이 먼저 만들고, 나머지 rank 는 그 뒤에 같은 인덱스를 연다
+    if not is_main:
+        barrier()
+
+    if shard_dir is not None:
+        # shard 를 순차로 읽는 스트리밍 Dataset
+        train_dataset = RCShardDataset(f"{shard_dir}/train", preproc, augmentor=augment,
+                                       decode_scale=decode_scale, output_dtype=input_dtype)
+        test_dataset = RCShardDataset(f"{shard_dir}/test", preproc, shuffle=False,
+                                      decode_scale=decode_scale, output_dtype=input_dtype)
+    else:
+        train_dataset = RCDataset(
+            csv_filename=csv_filename,
+            root=dataset_root,
+            preprocessor=preproc,
+            augmentor=augment,
+            split="train",
+            split_ratio=split_ratio,
+            cache_dir=cache_dir,
+            augment_stage=augment_stage,
+            shared_cache_mb=shared_cache_mb,
+            decode_scale=decode_scale,
+            output_dtype=input_dtype
+        )
 
-    test_dataset = RCDataset(
-        csv_filename=csv_filename,
-        root=dataset_root,
-        preprocessor=preproc,
-        augmentor=None,
-        split="test",
-        split_ratio=split_ratio
-    )
+        test_dataset = RCDataset(
+            csv_filename=csv_filename,
+            root=dataset_root,
+            preprocessor=preproc,
+            augmentor=None,
+            split="test",
+            split_ratio=split_ratio,
+            cache_dir=cache_dir,
+            shared_cache_mb=shared_cache_mb,
+            decode_scale=decode_scale,
+            output_dtype=input_dtype
+        )
+
+    # 지식 증류: teacher 출력 캐시도 rank 0 이 먼저 만들고 나머지 rank 는 읽기만
+    teacher_logits = None
+    if teachers:
+        if shard_dir is not None:
+            raise ValueError("[ERROR] 지식 증류는 RCDataset(CSV + 이미지) 만 지원합니다 (shard_dir=None)")
+        teacher_logits = TeacherLogits(teachers, train_dataset, cache_dir, device)
+
+    if is_main:
+        barrier()
 
     num_classes = len(train_dataset.angles)
     print(f"[INFO] classes = {num_classes}")
     print(f"[INFO] train samples = {len(train_dataset)}")
     print(f"[INFO] test  samples = {len(test_dataset)}")
 
-    pin_memory = (device.type == "cuda")
-    
-    # 🚨 CRITICAL FIX: num_workers를 0으로 설정하여 Windows 파일 접근 충돌을 해결
-    num_workers = 0 
-
-    train_loader = DataLoader(
-        train_dataset,
-        batch_size=batch_size,
-        shuffle=True,
+    # 🚨 Windows 는 파일 접근 충돌로 num_workers = 0 고정 (platform_loader_config 참고)
+    loader_cfg = platform_loader_config(device)
+    if num_workers is not None:
+        loader_cfg.update(num_workers=num_workers, prefetch_factor=2 if num_workers > 0 else None)
+    elif autotune_workers and not distributed and len(loader_cfg["worker_candidates"]) > 1:
+        loader_cfg = autotune_loader(train_dataset, batch_size, device, seed=seed)
+        # 튜닝 중 채워진 캐시는 유지하고 hit / miss 카운터만 초기화
+        for ds in (train_dataset, test_dataset):
+            if getattr(ds, "shared_cache", None) is not None:
+                ds.shared_cache.reset_stats()
+
+    num_workers = loader_cfg["num_workers"]
+    prefetch_factor = loader_cfg["prefetch_factor"]
+    pin_memory = loader_cfg["pin_memory"]
+    print(f"[INFO] loader: num_workers={num_workers}, prefetch_factor={prefetch_factor}, "
+          f"pin_memory={pin_memory}")
+
+    if is_main:
+        with open(f"{run_dir}/loader.json", "w", encoding="utf-8") as f:
+            json.dump({
+                "platform": platform.platform(),
+                "cpus": available_cpus(),
+                "batch_size": batch_size,
+                "world_size": world_size,
+                "autotuned": "results" in loader_cfg,
+                **{k: v for k, v in loader_cfg.items() if not k.endswith("_candidates")},
+            }, f, indent=2)
+
+    train_sampler = test_sampler = None
+    if distributed:
+        train_sampler = DistributedSampler(train_dataset, num_replicas=world_size, rank=rank,
+                                           shuffle=True, seed=seed)
+        test_sampler = RankSliceSampler(test_dataset, rank, world_size)
+
+    train_loader = make_loader(
+        DistillDataset(train_dataset, teacher_logits) if teacher_logits is not None else train_dataset,
+        batch_size=local_batch_size,
+        shuffle=True,  # shard(IterableDataset) 는 자체 셔플
         num_workers=num_workers,
+        prefetch_factor=prefetch_factor,
         pin_memory=pin_memory,
-        persistent_workers=(num_workers > 0), # num_workers가 0보다 클 때만 사용
-        prefetch_factor=2 if num_workers > 0 else None,
+        seed=seed,
+        sampler=train_sampler,
     )
 
-    test_loader = DataLoader(
+    test_loader = make_loader(
         test_dataset,
-        batch_size=batch_size,
+        batch_size=local_batch_size,
         shuffle=False,
         num_workers=num_workers,
+        prefetch_factor=prefetch_factor,
         pin_memory=pin_memory,
-        persistent_workers=(num_workers > 0),
-        prefetch_factor=2 if num_workers > 0 else None,
+        sampler=test_sampler,
     )
 
     # =====================
     # 3. Model / Loss / Optim
     # =====================
-    model = PilotNet(num_classes=num_classes, input_shape=(3, 66, 200)).to(device)
+    model = PilotNet(num_classes=num_classes, input_shape=(3, 66, 200),
+                     width_mult=width_mult, separable=separable).to(device)
+    model = model.to(memory_format=memory_format)
+
+    # 저장 / ONNX export 는 DDP / 컴파일 전 모듈로 (state_dict 키 유지)
+    train_model = DistributedDataParallel(model) if distributed else model
+    # 평가는 DDP 없이: RankSliceSampler 는 rank 마다 배치 수가 달라 DDP forward 의 buffer broadcast 가
+    # 배치가 하나 더 많은 rank 에서 멈출 수 있음 (지표는 ClassificationMeter.compute() 가 all_reduce)
+    eval_model = model
+    if compile_model:
+        train_model = torch.compile(train_model)
+        eval_model = torch.compile(model) if distributed else train_model
+
+    # fp16 은 gradient underflow 방지용 스케일러 필요 (bf16 / fp32 는 비활성)
+    scaler = torch.amp.GradScaler(device.type, enabled=(amp == "fp16"))
 
     criterion = nn.CrossEntropyLoss(label_smoothing=0.1)
+    distill_criterion = DistillLoss(distill_alpha, distill_temperature) if teacher_logits is not None else None
     optimizer = optim.Adam(model.parameters(),
                             lr=learning_rate,
                             weight_decay=weight_decay)
@@ -106,108 +341,280 @@ def train():
     # 4. Train + Eval Loop
     # =====================
     train_start = time.time()
-
-    for epoch in range(1, num_epochs + 1):
-        model.train()
-        train_loss = 0.0
-        train_correct = 0
-        train_total = 0
+    epoch_times = []
+    train_meter = ClassificationMeter(device, distributed=distributed)
+    test_meter = ClassificationMeter(device, distributed=distributed)
+
+    # step 구간 시간 (data_wait / h2d / forward / backward / optimizer), 파일 기록은 rank 0 만
+    timer = StepTimer(device)
+    timing_logger = TimingLogger(run_dir, fmt=timing_format) if is_main else None
+    profiler = ProfilerWindow(profile_steps, run_dir, device) if profile_steps and is_main else None
+    global_step = 0
+
+    # 체크포인트 (백그라운드 저장) / 재개
+    start_epoch = 1
+    best_metric = None
+    epoch_train_acc = epoch_test_acc = epoch_test_loss = float("nan")
+    adopt = []
+    if resume:
+        resume_path = resume
+        if resume == "latest":
+            resume_path = latest_checkpoint(checkpoint_dir) if checkpoint_dir else None
+            if resume_path is None and auto_checkpoint_dir:
+                resume_path = latest_run_checkpoint(os.path.dirname(run_dir) or ".")
+            if resume_path is None:
+                raise FileNotFoundError(f"[ERROR] no checkpoint to resume (checkpoint_dir={checkpoint_dir})")
+        state = load_checkpoint(resume_path)
+        if auto_checkpoint_dir:
+            # 같은 실행을 이어감 → 재개한 체크포인트 폴더에 계속 저장
+            checkpoint_dir = os.path.dirname(resume_path)
+        if checkpoint_dir:
+            adopt = [p for e, p in list_checkpoints(checkpoint_dir) if e <= state["epoch"]]
+        if state["angles"] != [int(a) for a in train_dataset.angles]:
+            raise RuntimeError(f"[ERROR] checkpoint angles {state['angles']} != "
+                               f"dataset angles {list(train_dataset.angles)}")
+        restore_training_state(state, model, optimizer, scaler, train_loader)
+        start_epoch = state["epoch"] + 1
+        best_metric = state["best_metric"]
+        global_step = state["global_step"]
+        epoch_times = list(state["epoch_times"])
+        epoch_train_acc = state["metrics"]["train_acc"]
+        epoch_test_acc = state["metrics"]["test_acc"]
+        epoch_test_loss = state["metrics"]["test_loss"]
+        print(f"[INFO] resume from epoch {start_epoch} (best test_acc={best_metric})")
+    best_test_acc = best_metric if best_metric is not None else float("-inf")
+    epochs_run = start_epoch - 1
+    stopped_early = False
+    if checkpoint_dir and is_main and not resume and (
+            list_checkpoints(checkpoint_dir) or os.path.exists(f"{checkpoint_dir}/best.pth")):
+        # 다른 실행의 체크포인트와 섞이면 best.pth / "latest" 가 그 실행 것과 뒤바뀜
+        raise ValueError(f"[ERROR] checkpoint_dir '{checkpoint_dir}' already has checkpoints from another run "
+                         f"(use a new folder, checkpoint_dir='auto', or resume)")
+    checkpointer = AsyncCheckpointer(checkpoint_dir, keep_last, adopt) if checkpoint_dir and is_main else None
+
+    for epoch in range(start_epoch, num_epochs + 1):
+        if hasattr(train_dataset, "set_epoch"):
+            train_dataset.set_epoch(epoch)
+        if train_sampler is not None:
+            train_sampler.set_epoch(epoch)
+
+        train_model.train()
+        train_meter.reset()
 
         epoch_start = time.time()
-        data_move_time = 0.0
-        compute_time = 0.0
-
-        for images, labels in train_loader:
-            t0 = time.time()
-            images = images.to(device, non_blocking=True)
-            labels = labels.to(device)
-            t1 = time.time()
-            data_move_time += (t1 - t0)
-
-            optimizer.zero_grad()
-
-            t2 = time.time()
-            outputs = model(images)
-            loss = criterion(outputs, labels)
-            loss.backward()
-            optimizer.step()
-            t3 = time.time()
-            compute_time += (t3 - t2)
-
-            train_loss += loss.item() * images.size(0)
-
-            _, predicted = outputs.max(1)
-            train_total += labels.size(0)
-            train_correct += (predicted == labels).sum().item()
-
-        epoch_train_loss = train_loss / train_total
-        epoch_train_acc = train_correct / train_total * 100.0
+        timer.begin_epoch()
+
+        train_iter = iter(train_loader)
+        step = 0
+        while True:
+            if profiler is not None:
+                profiler.step(global_step + 1)
+
+            timer.step_begin()
+            try:
+                batch = next(train_iter)
+            except StopIteration:
+                break
+            timer.data_ready()
+            step += 1
+            global_step += 1
+
+            # uint8 배치는 그대로 옮기고 model.input_norm 이 device 에서 /255
+            images = batch[0].to(device, non_blocking=True, memory_format=memory_format)
+            labels = batch[1].to(device, non_blocking=True)
+            teacher_logp = batch[2].to(device, non_blocking=True) if distill_criterion is not None else None
+            timer.mark("h2d")
+
+            optimizer.zero_grad(set_to_none=True)
+
+            with torch.autocast(device.type, dtype=amp_dtype, enabled=amp_dtype is not None):
+                outputs = train_model(images)
+                if distill_criterion is not None:
+                    loss = distill_criterion(outputs, labels, teacher_logp)
+                else:
+                    loss = criterion(outputs, labels)
+            timer.mark("forward")
+
+            scaler.scale(loss).backward()
+            timer.mark("backward")
+
+            scaler.step(optimizer)
+            scaler.update()
+            timer.mark("optimizer")
+            timer.step_end()
+
+            # device 텐서로 누적 (배치마다 .item() 동기화 없음)
+            train_meter.update(loss, outputs, labels)
+
+            if log_interval and step % log_interval == 0:
+                m = train_meter.compute()
+                print(f"    [step {step:05d}] train_loss={m['loss']:.4f}, train_acc={m['acc']:.2f}%")
+
+        timing = timer.end_epoch()
+        phase_times = timing_logger.write(epoch, timing) if timing_logger else summarize(timing)
+        train_metrics = train_meter.compute()
+        epoch_train_loss = train_metrics["loss"]
+        epoch_train_acc = train_metrics["acc"]
 
         # ===== Eval =====
-        model.eval()
-        test_loss = 0.0
-        test_correct = 0
-        test_total = 0
-
-        with torch.no_grad():
-            for images, labels in test_loader:
-                images = images.to(device, non_blocking=True)
-                labels = labels.to(device)
-
-                outputs = model(images)
-                loss = criterion(outputs, labels)
-
-                test_loss += loss.item() * images.size(0)
-
-                _, predicted = outputs.max(1)
-                test_total += labels.size(0)
-                test_correct += (predicted == labels).sum().item()
-
-        epoch_test_loss = test_loss / test_total
-        epoch_test_acc = test_correct / test_total * 100.0
+        test_metrics = evaluate(eval_model, test_loader, criterion, device, meter=test_meter,
+                                memory_format=memory_format, amp_dtype=amp_dtype)
+        epoch_test_loss = test_metrics["loss"]
+        epoch_test_acc = test_metrics["acc"]
 
         epoch_time = time.time() - epoch_start
+        epoch_times.append(epoch_time)
 
         print(
             f"[Epoch {epoch:02d}] "
             f"train_loss={epoch_train_loss:.4f}, train_acc={epoch_train_acc:.2f}% | "
             f"test_loss={epoch_test_loss:.4f}, test_acc={epoch_test_acc:.2f}% | "
             f"time={epoch_time:.2f}s "
-            f"(data={data_move_time:.2f}s, compute={compute_time:.2f}s)"
+            f"(wait={phase_times.get('data_wait', {}).get('total_s', 0.0):.2f}s, "
+            f"h2d={phase_times.get('h2d', {}).get('total_s', 0.0):.2f}s, "
+            f"fwd={phase_times.get('forward', {}).get('total_s', 0.0):.2f}s, "
+            f"bwd={phase_times.get('backward', {}).get('total_s', 0.0):.2f}s, "
+            f"opt={phase_times.get('optimizer', {}).get('total_s', 0.0):.2f}s)"
         )
 
-    print(f"Total train time={time.time()-train_start:.2f}s")
+        # 공유 RAM 캐시 hit / miss (epoch 단위)
+        for name, ds in (("train", train_dataset), ("test", test_dataset)):
+            shared_cache = getattr(ds, "shared_cache", None)
+            if shared_cache is not None:
+                st = shared_cache.stats()
+                print(
+                    f"    [cache:{name}] hits={st['hits']} misses={st['misses']} "
+                    f"hit_rate={st['hit_rate'] * 100:.1f}% "
+                    f"cached={st['cached']}/{st['capacity']}"
+                )
+                shared_cache.reset_stats()
+
+        best_test_acc = max(best_test_acc, epoch_test_acc)
+        epochs_run = epoch
+
+        # 체크포인트: 학습 스레드는 CPU 스냅샷만 만들고 저장은 백그라운드에서
+        if checkpointer is not None and (epoch % checkpoint_every == 0 or epoch == num_epochs):
+            is_best = best_metric is None or epoch_test_acc > best_metric
+            if is_best:
+                best_metric = epoch_test_acc
+            checkpointer.save(
+                checkpointer.snapshot(
+                    epoch, model, optimizer, scaler, train_loader,
+                    best_metric=best_metric,
+                    global_step=global_step,
+                    epoch_times=list(epoch_times),
+                    angles=[int(a) for a in train_dataset.angles],
+                    metrics={"train_acc": epoch_train_acc, "test_acc": epoch_test_acc,
+                             "test_loss": epoch_test_loss},
+                ),
+                is_best=is_best,
+            )
+
+        # 조기 종료 (sweep 등 호출한 쪽에서 판단)
+        if epoch_callback is not None and epoch_callback(epoch, {
+            "train_acc": epoch_train_acc,
+            "test_acc": epoch_test_acc,
+            "test_loss": epoch_test_loss,
+        }) is False:
+            print(f"[INFO] stopped early after epoch {epoch}")
+            stopped_early = True
+            break
+
+    if profiler is not None:
+        profiler.close()
+    if checkpointer is not None:
+        checkpointer.close()
+
+    total_time = time.time() - train_start
+    print(f"Total train time={total_time:.2f}s")
+
+    summary = {
+        "model_config": model.config,
+        "amp": amp,
+        "channels_last": channels_last,
+        "compile": compile_model,
+        "world_size": world_size,
+        "epoch_times": epoch_times,
+        "total_time": total_time,
+        "train_acc": epoch_train_acc,
+        "test_acc": epoch_test_acc,
+        "test_loss": epoch_test_loss,
+        "best_test_acc": best_test_acc,
+        "epochs_run": epochs_run,
+        "stopped_early": stopped_early,
+    }
+    if teacher_logits is not None:
+        summary["distill"] = {
+            "teachers": [s["name"] for s in teacher_logits.specs],
+            "alpha": distill_alpha,
+            "temperature": distill_temperature,
+            "logits_cache": teacher_logits.path,
+        }
+    if not save_model or not is_main:
+        return summary
 
     # =====================
     # 5. Save Model + ONNX
     # =====================
     os.makedirs("models", exist_ok=True)
-    timestamp = time.strftime("%Y%m%d_%H%M%S")
 
-    # PyTorch 저장
+    # PyTorch 저장 (channels_last 여도 state_dict 텐서 값 / 키는 동일)
+    model = model.to(memory_format=torch.contiguous_format)
     pth_path = f"models/pilotnet_steering_{timestamp}.pth"
     torch.save(model.state_dict(), pth_path)
     print(f"[INFO] Saved PTH → {pth_path}")
 
-    # ONNX 저장
+    # ONNX 저장 (배포용 검증 / 최적화 / 번들은 python -m training.export_onnx)
     onnx_path = f"models/pilotnet_steering_{timestamp}.onnx"
-    dummy_input = torch.randn(1, 3, 66, 200, dtype=torch.float32).to(device)
-
-    model.eval()
-    torch.onnx.export(
-        model,
-        dummy_input,
-        onnx_path,
-        opset_version=11,
-        export_params=True,
-        do_constant_folding=True,
-        input_names=["input"],
-        output_names=["output"],
-        dynamic_axes=None,
-    )
+    export_onnx_model(model.cpu(), onnx_path, torch.zeros(1, 3, 66, 200, dtype=torch.float32))
 
     print(f"[INFO] Saved ONNX → {onnx_path}")
 
+    summary["pth_path"] = pth_path
+    summary["onnx_path"] = onnx_path
+    if export_frame_size is not None:
+        fused_path = f"models/pilotnet_steering_{timestamp}_fused.onnx"
+        summary["fused_onnx_path"] = export_fused_onnx(model, preproc, export_frame_size, fused_path)
+    return summary
+
 
 if __name__ == "__main__":
-    train()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="train PilotNet")
+    parser.add_argument("--root", default="C:/Users/YJU/Desktop/dataset", help="dataset 폴더 (CSV + 이미지)")
+    parser.add_argument("--csv", default="data_labels_clean", help="CSV 파일 이름 (.csv 제외)")
+    parser.add_argument("--epochs", type=int, default=20)
+    parser.add_argument("--amp", choices=AMP_MODES, default="off")
+    parser.add_argument("--channels-last", action="store_true")
+    parser.add_argument("--compile", action="store_true")
+    parser.add_argument("--augment-stage", choices=AUGMENT_STAGES, default="resized",
+                        help="증강 위치 (resized: 리사이즈 후, full: 원본 프레임)")
+    parser.add_argument("--shard-dir", default=None,
+                        help="shard 데이터셋 폴더 (python -m training.RCShards, 기본: CSV + 이미지)")
+    parser.add_argument("--shared-cache-mb", type=float, default=None,
+                        help="worker 간 공유 RAM 캐시 예산 MB (기본: 사용 안 함)")
+    parser.add_argument("--decode-scale", type=int, choices=sorted(REDUCED_DECODE_FLAGS), default=1,
+                        help="JPEG 축소 디코드 배율 (PNG 는 영향 없음)")
+    parser.add_argument("--input-dtype", choices=OUTPUT_DTYPES, default="uint8",
+                        help="배치 dtype (uint8: device 에서 /255, float32: worker 에서 정규화)")
+    parser.add_argument("--checkpoint-dir", default="auto", help="기본: runs/<timestamp>/checkpoints")
+    parser.add_argument("--keep-last", type=int, default=3)
+    parser.add_argument("--resume", nargs="?", const="latest", default=None,
+                        help="체크포인트 경로 (값 없이 쓰면 checkpoint-dir, 기본은 runs/ 아래 최신 체크포인트)")
+    args = parser.parse_args()
+
+    train(
+        dataset_root=args.root,
+        csv_filename=args.csv,
+        num_epochs=args.epochs,
+        amp=args.amp,
+        channels_last=args.channels_last,
+        compile_model=args.compile,
+        augment_stage=args.augment_stage,
+        shard_dir=args.shard_dir,
+        shared_cache_mb=args.shared_cache_mb,
+        decode_scale=args.decode_scale,
+        input_dtype=args.input_dtype,
+        checkpoint_dir=args.checkpoint_dir,
+        keep_last=args.keep_last,
+        resume=args.resume,
+    )
\ No newline at end of file